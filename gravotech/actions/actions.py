@@ -1,7 +1,23 @@
+import socket
+import time
 from enum import Enum
-
-from gravotech.streamers.ip_streamer import IPStreamer
-from gravotech.utils.errors import check_err
+from typing import Callable, Dict, List, Optional, Union
+
+from gravotech.actions.shadow import ShadowState
+from gravotech.actions.validation import CommandValidator
+from gravotech.stats.store import CycleStatsStore
+from gravotech.streamers.base import Streamer
+from gravotech.utils.commands import pf_command
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import (
+    MASTER_REQUIRED,
+    CommandTimeoutError,
+    TL07ContextError,
+    TL07ProcessingError,
+    check_err,
+    error_code,
+)
+from gravotech.utils.templates import ValueCursor
 
 
 class LDMode(str, Enum):
@@ -17,47 +33,157 @@ class GraveuseAction:
     High-level command interface for controlling a Gravotech marking machine.
 
     This class provides methods to execute specific machine instructions via
-    the TCP/IP streamer, abstracting the low-level protocol details.
-
-    :param streamer: TCP/IP communication interface.
-    :type streamer: IPStreamer
+    a streamer, abstracting the low-level protocol details. The streamer is an
+    :class:`IPStreamer` (over TCP or another transport) or a proxy in front of it.
+
+    When a statistics store is attached, the duration of each cycle phase (LD,
+    VS writes, GO M latency and marking) is recorded at the end of every GO.
+
+    When a shadow state is attached, SP and LD requests whose effect is already
+    in place, and unchanged values passed to :meth:`set_variables`, are answered
+    locally without a round trip. The shadow is cleared on reconnection, and
+    its master role when a command is refused with "ER 4 1".
+
+    :param streamer: Session with the machine.
+    :type streamer: Streamer
+    :param stats: Optional store receiving the cycle timings.
+    :type stats: CycleStatsStore, optional
+    :param machine: Machine name used in the statistics, defaults to "ip:port".
+    :type machine: str, optional
+    :param shadow: Optional model of the machine state used to skip redundant commands.
+    :type shadow: ShadowState, optional
+    :param validator: Optional checks raising :class:`TL07Error` before invalid
+                      commands are sent. Rejections based on the known machine
+                      state are confirmed with ST first.
+    :type validator: CommandValidator, optional
     """
 
-    def __init__(self, streamer: IPStreamer):
+    def __init__(
+        self,
+        streamer: Streamer,
+        stats: Optional[CycleStatsStore] = None,
+        machine: Optional[str] = None,
+        shadow: Optional[ShadowState] = None,
+        validator: Optional[CommandValidator] = None,
+    ):
         self.streamer = streamer
+        self.stats = stats
+        self.machine = machine
+        self.shadow = shadow
+        self.validator = validator
+        if shadow is not None:
+            streamer.reconnect_hooks.append(shadow.invalidate)
+        if validator is not None:
+            streamer.reconnect_hooks.append(validator.forget)
+        # [loaded file, LD duration, accumulated VS duration] of the current cycle
+        self._cycle: List = ["", 0.0, 0.0]
+
+    def _write(self, cmd: str, timeout: Optional[float]) -> str:
+        """Sends a command within its optional time budget."""
+        resp = self.streamer.write(cmd, timeout=timeout)
+        # A VG response is a variable's text, not a status.
+        if not cmd.startswith("VG"):
+            self._observe(resp)
+        return resp
+
+    def _check_state(
+        self, check: Callable[[], None], deadline: Optional[Deadline]
+    ) -> None:
+        """
+        Runs a validator check. A rejection based on the known state is only
+        kept once ST confirms that state, which may have changed on the machine
+        panel since it was observed.
+        """
+        try:
+            check()
+        except (TL07ContextError, TL07ProcessingError):
+            self.st(None if deadline is None else deadline.check("ST"))
+            check()
+
+    def _observe(self, resp: str) -> None:
+        """Updates the validator and the shadow from a status response."""
+        if self.validator is not None:
+            self.validator.observe(resp)
+        # Another session took the master role: SP must be sent again.
+        if self.shadow is not None and error_code(resp) == MASTER_REQUIRED:
+            self.shadow.master = None
+
+    def _read_cycle(self, deadline: Optional[Deadline]) -> str:
+        """Reads the next GO status line within the cycle's time budget."""
+        remaining = None if deadline is None else deadline.check("GO monitoring")
+        try:
+            resp = self.streamer.unsafe_read(timeout=remaining)
+        except CommandTimeoutError:
+            raise
+        except socket.timeout as e:
+            if deadline is None:
+                raise
+            raise CommandTimeoutError(
+                f"Time budget of {deadline.timeout}s exhausted during GO monitoring"
+            ) from e
+        self._observe(resp)
+        return resp
 
-    def ad(self) -> str:
+    def _record_cycle(self, sent: float, started: float, resp: str) -> None:
+        """Appends the timings of the cycle that just ended to the store."""
+        if self.machine is None:
+            self.machine = f"{self.streamer.ip}:{self.streamer.port}"
+        filename, ld_time, vs_time = self._cycle
+        self.stats.record(
+            self.machine,
+            filename,
+            ld=ld_time,
+            vs=vs_time,
+            go_latency=started - sent,
+            marking=time.perf_counter() - started,
+            status=resp,
+        )
+        self._cycle[2] = 0.0
+
+    def ad(self, timeout: Optional[float] = None) -> str:
         """
         Fault acknowledgment (Acquittement défaut).
 
         This command is used to acknowledge a fault once the cause has been resolved.
 
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "AD 1" if the execution is successful.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write("AD\r")
+        deadline = Deadline.of(timeout)
+        if self.validator is not None:
+            self._check_state(self.validator.ad, deadline)
+        resp = self._write("AD\r", None if deadline is None else deadline.check("AD"))
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def am(self) -> str:
+    def am(self, timeout: Optional[float] = None) -> str:
         """
         Stop marking (Arrêt marquage).
 
         Stopping a marking process puts the machine into a "Fault" state.
         The fault must then be acknowledged using the AD command.
 
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "AM 1" if successful.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write("AM\r")
+        resp = self._write("AM\r", timeout)
+        if self.shadow is not None:
+            self.shadow.loaded = None
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def go(self) -> str:
+    def go(self, timeout: Optional[float] = None) -> str:
         """
         Start marking cycle.
 
@@ -65,44 +191,75 @@ class GraveuseAction:
         This method is blocking and monitors the marking status until it pauses (GO P),
         stops due to a fault (GO S), or finishes successfully (GO F).
 
+        :param timeout: Optional time budget for the whole cycle, from the lock
+                        wait to the final status.
+        :type timeout: float, optional
         :return: The final status of the marking cycle ("GO P", "GO S", or "GO F").
         :rtype: str
         :raises RuntimeError: If the initial marking start confirmation ("GO M") is not received.
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        unlock = self.streamer.lock()
+        deadline = Deadline.of(timeout)
+        if self.validator is not None:
+            self._check_state(self.validator.go, deadline)
+        unlock = self.streamer.lock(timeout=timeout)
         try:
+            sent = time.perf_counter()
             self.streamer.unsafe_write("GO")
-            resp = self.streamer.unsafe_read()
+            resp = self._read_cycle(deadline)
             if resp.startswith("ER"):
                 return check_err(resp)
             if "GO M" not in resp:
                 raise RuntimeError(f"Expected 'GO M', got '{resp}'")
-            while True:
-                resp = self.streamer.unsafe_read()
-                if resp in ["GO P", "GO S", "GO F"]:
-                    return resp
-                if resp.startswith("ER"):
-                    return check_err(resp)
+            started = time.perf_counter()
+            end_monitoring = self.streamer.begin_monitoring()
+            try:
+                while True:
+                    resp = self._read_cycle(deadline)
+                    if resp in ["GO P", "GO S", "GO F"]:
+                        if resp == "GO S" and self.shadow is not None:
+                            self.shadow.loaded = None
+                        if self.stats is not None:
+                            self._record_cycle(sent, started, resp)
+                        return resp
+                    if resp.startswith("ER"):
+                        if self.stats is not None:
+                            self._record_cycle(sent, started, resp)
+                        return check_err(resp)
+            finally:
+                end_monitoring()
         finally:
             unlock()
 
-    def gp(self) -> str:
+    def gp(self, timeout: Optional[float] = None) -> str:
         """
         Get connection type (Master/Slave).
 
         Checks if the current connection has master or slave privileges.
 
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: A string indicating master status (e.g., 'GP "MASTER":"1"') or slave status ('GP "MASTER":"0"').
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write('GP "MASTER"\r')
+        resp = self._write('GP "MASTER"\r', timeout)
+        if self.shadow is not None and resp.startswith("GP"):
+            self.shadow.master = resp.endswith('"1"')
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def ld(self, filename: str, nb_marking: int, mode: LDMode) -> str:
+    def ld(
+        self,
+        filename: str,
+        nb_marking: int,
+        mode: LDMode,
+        timeout: Optional[float] = None,
+    ) -> str:
         """
         Load a marking file.
 
@@ -114,16 +271,44 @@ class GraveuseAction:
         :type nb_marking: int
         :param mode: Execution mode (NORMAL, SIMULATION, or AUTONOME).
         :type mode: LDMode
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "LD 1" if the file is loaded successfully.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write(f'LD "{filename}" {nb_marking} {mode.value}\r')
+        deadline = Deadline.of(timeout)
+        if self.validator is not None:
+            validator = self.validator
+            self._check_state(
+                lambda: validator.ld(filename, nb_marking, mode), deadline
+            )
+        if self.shadow is not None and self.shadow.loaded == (
+            filename,
+            nb_marking,
+            mode.value,
+        ):
+            if self.stats is not None:
+                # Nothing was sent: the next cycle has no LD time.
+                self._cycle = [filename, 0.0, 0.0]
+            return "LD 1"
+        started = time.perf_counter()
+        resp = self._write(
+            f'LD "{filename}" {nb_marking} {mode.value}\r',
+            None if deadline is None else deadline.check("LD"),
+        )
+        if self.shadow is not None:
+            loaded = resp.startswith("LD 1")
+            self.shadow.loaded = (filename, nb_marking, mode.value) if loaded else None
+        if self.stats is not None:
+            self._cycle = [filename, time.perf_counter() - started, 0.0]
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def ls(self, mask: str = None) -> str:
+    def ls(self, mask: str = None, timeout: Optional[float] = None) -> str:
         """
         List files present in the machine.
 
@@ -131,17 +316,23 @@ class GraveuseAction:
 
         :param mask: Optional filter (e.g., "*.t21" or "CE.103").
         :type mask: str, optional
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: The number of files found followed by the list of filenames.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
+        if self.validator is not None:
+            self.validator.ls(mask)
         cmd = f"LS {mask}\r" if mask else "LS\r"
-        resp = self.streamer.write(cmd)
+        resp = self._write(cmd, timeout)
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def pf(self, filename: str, data: bytes) -> str:
+    def pf(self, filename: str, data: bytes, timeout: Optional[float] = None) -> str:
         """
         Push a file to the machine's memory.
 
@@ -151,16 +342,22 @@ class GraveuseAction:
         :type filename: str
         :param data: Byte list of the file content in hexadecimal representation.
         :type data: bytes
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "PF 1" if the upload is successful.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write(f'PF "{filename}" {data}\r')
+        if self.validator is not None:
+            self.validator.pf(filename, data)
+        resp = self._write(pf_command(filename, data), timeout)
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def rm(self, mask: str) -> str:
+    def rm(self, mask: str, timeout: Optional[float] = None) -> str:
         """
         Remove files from the machine.
 
@@ -168,17 +365,23 @@ class GraveuseAction:
 
         :param mask: The filename or mask (e.g., "example.t21" or "*.t21") to delete.
         :type mask: str
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "RM 1" if successful.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
+        if self.validator is not None:
+            self.validator.rm(mask)
         cmd = f"RM {mask}\r" if mask else "RM\r"
-        resp = self.streamer.write(cmd)
+        resp = self._write(cmd, timeout)
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def sp(self, value: bool) -> str:
+    def sp(self, value: bool, timeout: Optional[float] = None) -> str:
         """
         Set connection type (Master/Slave).
 
@@ -187,34 +390,44 @@ class GraveuseAction:
 
         :param value: True to request master status ("1"), False for slave status ("0").
         :type value: bool
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "SP 1" if the change is successful.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write(f'SP "MASTER":"{int(value)}"\r')
+        if self.shadow is not None and self.shadow.master == value:
+            return "SP 1"
+        resp = self._write(f'SP "MASTER":"{int(value)}"\r', timeout)
+        if self.shadow is not None and resp.startswith("SP 1"):
+            self.shadow.master = value
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def st(self) -> str:
+    def st(self, timeout: Optional[float] = None) -> str:
         """
         Get current machine status.
 
         Returns the state, safety status (rearm), and marking mode.
 
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: A status string (e.g., "ST 4 0 1") where:
                  - State: 1 (Init), 2 (Alive), 4 (Ready), 8 (Marking), 16 (Paused), 32 (Fault).
                  - Rearm: Safety/shutter status.
                  - Markmode: Normal (0), Autonomous (1), or Simulation (2).
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write(f"ST\r")
+        resp = self._write(f"ST\r", timeout)
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def vg(self, index: int) -> str:
+    def vg(self, index: int, timeout: Optional[float] = None) -> str:
         """
         Get variable value.
 
@@ -222,16 +435,29 @@ class GraveuseAction:
 
         :param index: The variable number (0 to 9).
         :type index: int
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: The value of the requested variable.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write(f"VG {index}\r")
+        if self.validator is not None:
+            self.validator.vg(index)
+        resp = self._write(f"VG {index}\r", timeout)
+        if self.shadow is not None and not resp.startswith("ER"):
+            self.shadow.variables[index] = resp
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
 
-    def vs(self, index: int, text: str) -> str:
+    def vs(
+        self,
+        index: int,
+        text: Union[str, ValueCursor],
+        timeout: Optional[float] = None,
+    ) -> str:
         """
         Set variable value.
 
@@ -239,13 +465,79 @@ class GraveuseAction:
 
         :param index: The variable number (0 to 9).
         :type index: int
-        :param text: The UTF-8 text to store in the variable.
-        :type text: str
+        :param text: The UTF-8 text to store in the variable, or a cursor of a
+                     :class:`ValueTemplate` whose next value is used.
+        :type text: Union[str, ValueCursor]
+        :param timeout: Optional end-to-end time budget in seconds.
+        :type timeout: float, optional
         :return: "VS 1" followed by the variable number if successful.
         :rtype: str
         :raises ValueError: If the machine returns an error code (ER).
+        :raises TL07Error: If the validator rejects the command.
+        :raises CommandTimeoutError: If the time budget is exhausted.
         """
-        resp = self.streamer.write(f'VS {index} "{text}"\r')
+        if isinstance(text, ValueCursor):
+            text = next(text)
+        if self.validator is not None:
+            self.validator.vs(index, text)
+        started = time.perf_counter()
+        resp = self._write(f'VS {index} "{text}"\r', timeout)
+        if self.shadow is not None:
+            if resp.startswith("VS 1"):
+                self.shadow.variables[index] = text
+            else:
+                self.shadow.variables.pop(index, None)
+        if self.stats is not None:
+            self._cycle[2] += time.perf_counter() - started
         if resp.startswith("ER"):
             return check_err(resp)
         return resp
+
+    def set_variables(
+        self,
+        values: Dict[int, Union[str, ValueCursor]],
+        timeout: Optional[float] = None,
+    ) -> Dict[int, str]:
+        """
+        Set several variables, sending only the values that changed.
+
+        With a shadow state attached, variables already holding the requested
+        text are skipped. Without one, every value is sent.
+
+        :param values: Texts or value cursors keyed by variable number (0 to 9).
+        :type values: Dict[int, Union[str, ValueCursor]]
+        :param timeout: Optional time budget in seconds shared by all VS commands.
+        :type timeout: float, optional
+        :return: The response of each VS command actually sent, keyed by index.
+        :rtype: Dict[int, str]
+        :raises CommandTimeoutError: If the time budget is exhausted.
+        """
+        deadline = Deadline.of(timeout)
+        responses = {}
+        for index, text in sorted(values.items()):
+            if isinstance(text, ValueCursor):
+                text = next(text)
+            if self.shadow is not None and self.shadow.variables.get(index) == text:
+                continue
+            remaining = None if deadline is None else deadline.check("VS")
+            responses[index] = self.vs(index, text, remaining)
+        return responses
+
+    def resync(self, timeout: Optional[float] = None) -> None:
+        """
+        Rebuild the shadow state from the machine.
+
+        Queries the master status (GP) and the ten variables (VG). The loaded
+        file cannot be queried and is marked unknown.
+
+        :param timeout: Optional time budget in seconds shared by all commands.
+        :type timeout: float, optional
+        :raises CommandTimeoutError: If the time budget is exhausted.
+        """
+        if self.shadow is None:
+            return
+        deadline = Deadline.of(timeout)
+        self.shadow.invalidate()
+        self.gp(timeout)
+        for index in range(10):
+            self.vg(index, None if deadline is None else deadline.check("VG"))
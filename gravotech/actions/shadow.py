@@ -0,0 +1,29 @@
+from typing import Dict, Optional, Tuple
+
+# (filename, nb_marking, mode value) of a loaded marking file.
+LoadedFile = Tuple[str, int, str]
+
+
+class ShadowState:
+    """
+    Client-side copy of the machine state set through one session.
+
+    Tracks the master status of the session, the loaded file with its LD
+    parameters and the values of variables 0 to 9, as confirmed by the
+    machine's responses. ``None`` (or a missing variable) means unknown, in
+    which case the command is always sent.
+
+    Fields are updated by single assignments, which need no lock of their
+    own: the session's lock already orders the commands that change them.
+    """
+
+    def __init__(self):
+        self.master: Optional[bool] = None
+        self.loaded: Optional[LoadedFile] = None
+        self.variables: Dict[int, str] = {}
+
+    def invalidate(self) -> None:
+        """Forgets everything, e.g. after a reconnection."""
+        self.master = None
+        self.loaded = None
+        self.variables.clear()
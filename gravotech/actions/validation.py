@@ -0,0 +1,137 @@
+from typing import Optional
+
+from gravotech.utils.errors import tl07_error
+from gravotech.utils.responses import MachineState, parse_status
+
+# Largest number of markings accepted by LD.
+MAX_MARKINGS = 4294967295
+# Characters that would break the quoting or the framing of a command.
+FORBIDDEN_CHARACTERS = ('"', "\r", "\n")
+
+# Machine state implied by a successful response.
+STATE_AFTER = {
+    "LD 1": MachineState.READY,
+    "AD 1": MachineState.ALIVE,
+    "AM 1": MachineState.FAULT,
+    "GO M": MachineState.MARKING,
+    "GO F": MachineState.READY,
+    "GO P": MachineState.PAUSE,
+    "GO S": MachineState.FAULT,
+}
+
+# Values of LDMode.
+LD_MODES = {"N", "S", "A"}
+# States in which LD is accepted.
+LD_STATES = {MachineState.ALIVE, MachineState.READY}
+
+
+class CommandValidator:
+    """
+    Client-side checks of TL07 commands, run before anything is sent.
+
+    Parameters the machine would reject with a syntax error (``ER 1 x``) raise
+    the same :class:`TL07SyntaxError` locally. With ``check_state``, commands
+    the machine would refuse in its last known state raise
+    :class:`TL07ContextError` (``ER 2 <state>``) or :class:`TL07ProcessingError`.
+
+    The known state is updated by :meth:`observe` from ST responses, context
+    errors and the outcome of LD, AD, AM and GO. It is unknown (no check)
+    until then and after a reconnection.
+
+    :param check_state: Also check commands against the last known state,
+                        defaults to False.
+    """
+
+    def __init__(self, check_state: bool = False):
+        self.check_state = check_state
+        self.state: Optional[int] = None
+
+    def forget(self) -> None:
+        """Marks the machine state as unknown, e.g. after a reconnection."""
+        self.state = None
+
+    def observe(self, resp: str) -> None:
+        """
+        Updates the known machine state from a raw response.
+
+        :param resp: A response read from the machine.
+        """
+        if resp in STATE_AFTER:
+            self.state = STATE_AFTER[resp]
+            return
+        status = parse_status(resp)
+        if status is not None:
+            self.state = status.state
+            return
+        parts = resp.split()
+        if len(parts) == 3 and parts[:2] == ["ER", "2"] and parts[2].isdigit():
+            self.state = int(parts[2])
+
+    # ========================================================================
+    # COMMAND CHECKS
+    # ========================================================================
+
+    def ad(self) -> None:
+        if self.check_state and self.state not in (None, MachineState.FAULT):
+            raise tl07_error("3", "5")
+
+    def go(self) -> None:
+        if self.check_state and self.state not in (None, MachineState.READY):
+            raise tl07_error("2", str(int(self.state)))
+
+    def ld(self, filename: str, nb_marking: int, mode) -> None:
+        self._filename(filename)
+        self._integer(nb_marking, 0, MAX_MARKINGS)
+        if getattr(mode, "value", None) not in LD_MODES:
+            raise tl07_error("1", "4")
+        if self.check_state and self.state is not None and self.state not in LD_STATES:
+            raise tl07_error("2", str(int(self.state)))
+
+    def ls(self, mask: Optional[str]) -> None:
+        if mask:
+            self._mask(mask)
+
+    def pf(self, filename: str, data: bytes) -> None:
+        self._filename(filename)
+        if not data:
+            raise tl07_error("1", "2")
+
+    def rm(self, mask: str) -> None:
+        if not mask:
+            raise tl07_error("1", "2")
+        self._mask(mask)
+
+    def vg(self, index: int) -> None:
+        self._integer(index, 0, 9)
+
+    def vs(self, index: int, text: str) -> None:
+        self._integer(index, 0, 9)
+        self._text(text)
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    @staticmethod
+    def _integer(value: int, low: int, high: int) -> None:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise tl07_error("1", "4")
+        if not low <= value <= high:
+            raise tl07_error("1", "7")
+
+    @staticmethod
+    def _text(text: str) -> None:
+        if not isinstance(text, str):
+            raise tl07_error("1", "9")
+        if any(c in text for c in FORBIDDEN_CHARACTERS):
+            raise tl07_error("1", "4")
+
+    def _filename(self, filename: str) -> None:
+        self._text(filename)
+        if not filename.strip():
+            raise tl07_error("1", "2")
+
+    def _mask(self, mask: str) -> None:
+        self._text(mask)
+        if len(mask.split()) > 1:
+            raise tl07_error("1", "3")
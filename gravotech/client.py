@@ -1,5 +1,16 @@
+import logging
+from typing import Optional
+
 from .actions.actions import GraveuseAction
+from .actions.shadow import ShadowState
+from .actions.validation import CommandValidator
+from .streamers.flow_control import FlowController
 from .streamers.ip_streamer import IPStreamer
+from .streamers.router import CommandRouter
+from .streamers.scheduler import CommandScheduler
+from .streamers.transports import Transport
+from .utils.errors import check_err
+from .utils.events import EventSink
 
 
 class Gravotech:
@@ -12,14 +23,40 @@ class Gravotech:
 
     :ivar Streamer: The low-level TCP/IP communication interface.
     :vartype Streamer: IPStreamer
+    :ivar Monitor: The slave monitoring session, if enabled.
+    :vartype Monitor: Optional[IPStreamer]
+    :ivar Router: The router splitting traffic between the sessions, if the
+        monitoring session is enabled. Its ``monitor`` is the slave session
+        behind its own scheduler and rate limiter, when enabled.
+    :vartype Router: Optional[CommandRouter]
+    :ivar FlowControl: The adaptive rate limiter, if enabled.
+    :vartype FlowControl: Optional[FlowController]
+    :ivar Scheduler: The priority command scheduler, if enabled.
+    :vartype Scheduler: Optional[CommandScheduler]
     :ivar Actions: The high-level command interface to execute machine instructions.
     :vartype Actions: GraveuseAction
     """
 
     Streamer: IPStreamer
+    Monitor: Optional[IPStreamer]
+    Router: Optional[CommandRouter]
+    FlowControl: Optional[FlowController]
+    Scheduler: Optional[CommandScheduler]
     Actions: GraveuseAction
 
-    def __init__(self, ip: str, port: int, timeout: float = 5.0):
+    def __init__(
+        self,
+        ip: str,
+        port: int,
+        timeout: float = 5.0,
+        priority_scheduling: bool = False,
+        flow_control: bool = False,
+        monitor_connection: bool = False,
+        shadow_state: bool = False,
+        event_sink: Optional[EventSink] = None,
+        transport: Optional[Transport] = None,
+        validation: bool = False,
+    ):
         """
         Initialize the Gravotech controller and its communication components.
 
@@ -32,12 +69,62 @@ class Gravotech:
         :type port: int
         :param timeout: Maximum time in seconds to wait for a network response, defaults to 5.0.
         :type timeout: float, optional
+        :param priority_scheduling: Route commands through a :class:`CommandScheduler`
+            so that AM/AD preempt queued traffic, defaults to False.
+        :type priority_scheduling: bool, optional
+        :param flow_control: Throttle commands with a :class:`FlowController` that
+            backs off when the machine reports overload, defaults to False.
+        :type flow_control: bool, optional
+        :param monitor_connection: Open a second, slave session serving read-only
+            commands (ST, VG, LS) so they are not blocked by marking, defaults to False.
+        :type monitor_connection: bool, optional
+        :param shadow_state: Keep a :class:`ShadowState` of the machine so that
+            redundant SP, LD and VS commands are skipped, defaults to False.
+        :type shadow_state: bool, optional
+        :param event_sink: Optional audit trail receiving every command exchange.
+        :type event_sink: EventSink, optional
+        :param transport: Optional transport replacing TCP for both sessions, such as a
+            :class:`UnixTransport` or a :class:`LoopbackTransport`.
+        :type transport: Transport, optional
+        :param validation: Check commands with a :class:`CommandValidator`, including
+            against the last known machine state, and raise :class:`TL07Error` instead
+            of sending invalid ones, defaults to False.
+        :type validation: bool, optional
         """
-        self.Streamer = IPStreamer(ip, port, timeout)
-        self.Actions = GraveuseAction(self.Streamer)
+        self.Streamer = IPStreamer(ip, port, timeout, transport=transport)
+        self.Streamer.event_sink = event_sink
+        streamer = self.Streamer
+        self.Scheduler = None
+        if priority_scheduling:
+            self.Scheduler = streamer = CommandScheduler(streamer)
+        # Pacing and backoff happen before the scheduler's lanes, so that a
+        # throttled command does not hold the connection while it waits.
+        self.FlowControl = None
+        if flow_control:
+            self.FlowControl = streamer = FlowController(streamer)
+        self.Monitor = None
+        self.Router = None
+        if monitor_connection:
+            self.Monitor = IPStreamer(ip, port, timeout, transport=transport)
+            self.Monitor.event_sink = event_sink
+            # The slave session gets its own lanes and pacing.
+            monitor = self.Monitor
+            if priority_scheduling:
+                monitor = CommandScheduler(monitor)
+            if flow_control:
+                monitor = FlowController(monitor)
+            self.Router = streamer = CommandRouter(streamer, monitor)
+        shadow = ShadowState() if shadow_state else None
+        validator = CommandValidator(check_state=True) if validation else None
+        self.Actions = GraveuseAction(streamer, shadow=shadow, validator=validator)
 
     def connect(self):
         self.Streamer.connect()
+        if self.Monitor is not None:
+            self.Monitor.connect()
+            resp = self.Monitor.write('SP "MASTER":"0"\r')
+            if resp.startswith("ER"):
+                logging.warning("Monitor session role unchanged: %s", check_err(resp))
         return self
 
     def __enter__(self):
@@ -46,3 +133,5 @@ class Gravotech:
 
     def __exit__(self, exc_type, exc, tb):
         self.Streamer.close()
+        if self.Monitor is not None:
+            self.Monitor.close()
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+from gravotech.client import Gravotech
+from gravotech.utils.commands import pf_payload
+from gravotech.utils.errors import check_err
+
+
+class UploadResult(NamedTuple):
+    """Outcome of an upload to one machine."""
+
+    machine: str
+    ok: bool
+    response: str
+    duration: float
+
+
+def broadcast_pf(
+    machines: Dict[str, Gravotech],
+    filename: str,
+    data: bytes,
+    max_concurrency: int = 8,
+    timeout: Optional[float] = None,
+) -> Dict[str, UploadResult]:
+    """
+    Uploads one file to several machines concurrently.
+
+    The PF command is encoded once, in the same wire form as
+    :meth:`GraveuseAction.pf`, and the resulting buffer is shared read-only
+    by every upload through a :class:`memoryview`. Each upload goes through
+    the client's command stack like :meth:`GraveuseAction.pf`: the validator
+    checks it, then the flow controller and the scheduler's bulk lane pace
+    it. Up to ``max_concurrency`` uploads run at the same time on the
+    machines' master sessions, so the rollout takes about as long as the
+    slowest upload of each wave.
+
+    :param machines: Connected clients keyed by machine name.
+    :param filename: Target filename on the machines.
+    :param data: The file content.
+    :param max_concurrency: Maximum number of simultaneous uploads, defaults to 8.
+    :param timeout: Optional time budget of each upload.
+    :return: The result of each upload, keyed by machine name. Error responses
+             are decoded, exceptions are reported as failures.
+    """
+    payload = memoryview(pf_payload(filename, data))
+
+    def upload(name: str) -> UploadResult:
+        actions = machines[name].Actions
+        started = time.perf_counter()
+        try:
+            if actions.validator is not None:
+                actions.validator.pf(filename, data)
+            resp = actions.streamer.write_raw(payload, timeout=timeout)
+            if actions.validator is not None:
+                actions.validator.observe(resp)
+        except Exception as e:
+            resp = f"{type(e).__name__}: {e}"
+            return UploadResult(name, False, resp, time.perf_counter() - started)
+        ok = resp.startswith("PF")
+        if resp.startswith("ER"):
+            resp = check_err(resp)
+        return UploadResult(name, ok, resp, time.perf_counter() - started)
+
+    workers = max(1, min(max_concurrency, len(machines)))
+    with ThreadPoolExecutor(workers, thread_name_prefix="gravotech-pf") as pool:
+        return {result.machine: result for result in pool.map(upload, machines)}
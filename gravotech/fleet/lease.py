@@ -0,0 +1,204 @@
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from gravotech.actions.actions import GraveuseAction
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import LockTimeoutError
+from gravotech.utils.locks import FairRLock
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _try_lock(fd: int) -> bool:
+    """Takes the exclusive lock of a file without waiting; False if it is held."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class MasterLease:
+    """
+    Master role of one machine, shared by the processes of a host.
+
+    Each process creates a lease on its own session; leases of the same
+    machine coordinate through a lock file. A holder gets exclusive use of the
+    master role for the duration of :meth:`hold`, which the holding thread may
+    nest::
+
+        lease = MasterLease(gravotech.Actions)
+        with lease.hold(timeout=10) as actions:
+            actions.ld("part.t2l", 1, LDMode.NORMAL)
+            actions.go()
+
+    The lock file records which lease last took the role, so ``SP`` is only
+    sent when another process (or a reconnection) took it in between: a
+    process sending several batches in a row switches once.
+
+    Threads of one process queue in arrival order. While some are waiting,
+    the file lock is kept and they are served under the same lease, up to
+    ``max_hold`` seconds after it was taken. The lease is then handed over,
+    and the process waits ``handoff`` seconds before competing again so that
+    other processes get their turn. Batches are never interrupted: a single
+    :meth:`hold` may last longer than ``max_hold``.
+
+    The lock is released by the operating system if the process dies.
+
+    :param actions: The command interface of this process's session.
+    :param path: Lock file shared by the processes, defaults to
+                 ``gravotech-<ip>-<port>.lease`` in the temporary directory.
+    :param max_hold: Seconds a lease may be renewed for waiting threads of the
+                     process, defaults to 5.0.
+    :param handoff: Seconds to wait after handing a lease over, defaults to 0.05.
+    :param poll_interval: Period of the lock attempts while it is held by
+                          another process, defaults to 0.01.
+    """
+
+    def __init__(
+        self,
+        actions: GraveuseAction,
+        path: Optional[str] = None,
+        max_hold: float = 5.0,
+        handoff: float = 0.05,
+        poll_interval: float = 0.01,
+    ):
+        streamer = actions.streamer
+        if path is None:
+            name = f"gravotech-{streamer.ip}-{streamer.port}.lease"
+            path = os.path.join(tempfile.gettempdir(), name.replace(":", "_"))
+        self.actions = actions
+        self.path = path
+        self.max_hold = max_hold
+        self.handoff = handoff
+        self.poll_interval = poll_interval
+        self.acquisitions = 0
+        self.switches = 0
+        self._token = f"{os.getpid()}:{id(self):x}".encode("ascii")
+        self._mu = FairRLock()
+        self._fd: Optional[int] = None
+        # Nested holds of the owning thread; only the outermost releases.
+        self._depth = 0
+        self._acquired_at = 0.0
+        self._yielded_at = 0.0
+        self._master = False
+        streamer.reconnect_hooks.append(self._forget)
+
+    @property
+    def held(self) -> bool:
+        """Whether this process currently holds the lease."""
+        return self._fd is not None
+
+    @contextmanager
+    def hold(self, timeout: Optional[float] = None) -> Iterator[GraveuseAction]:
+        """
+        Holds the master role for a batch of commands.
+
+        :param timeout: Maximum wait for the lease in seconds, None for no limit.
+        :return: A context manager giving the command interface.
+        :raises LockTimeoutError: If the lease is not obtained in time.
+        :raises RuntimeError: If the machine refuses the master role.
+        """
+        deadline = Deadline.of(timeout)
+        self._mu.acquire_or_raise(timeout, f"Master lease of {self.path}")
+        self._depth += 1
+        try:
+            if self._fd is None:
+                self._acquire(deadline)
+            yield self.actions
+        finally:
+            self._depth -= 1
+            try:
+                if self._depth == 0 and self._fd is not None and not self._renew():
+                    self._release()
+            finally:
+                self._mu.release()
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _forget(self) -> None:
+        """Reconnection hook: a new session is never master."""
+        self._master = False
+
+    def _renew(self) -> bool:
+        """Whether to keep the file lock for the threads waiting in this process."""
+        waiting = self._mu.stats()["waiters"] > 0
+        return waiting and time.monotonic() - self._acquired_at < self.max_hold
+
+    def _acquire(self, deadline: Optional[Deadline]) -> None:
+        wait = self._yielded_at + self.handoff - time.monotonic()
+        if wait > 0:
+            time.sleep(wait if deadline is None else min(wait, deadline.remaining()))
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            while not _try_lock(fd):
+                if deadline is not None and deadline.expired():
+                    raise LockTimeoutError(
+                        f"Master lease of {self.path} not acquired within "
+                        f"{deadline.timeout}s: held by another process"
+                    )
+                time.sleep(self.poll_interval)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._acquired_at = time.monotonic()
+        self.acquisitions += 1
+        try:
+            self._take_master()
+        except BaseException:
+            self._release()
+            raise
+
+    def _take_master(self) -> None:
+        """Sends SP unless this lease was the last to take the role."""
+        os.lseek(self._fd, 1, os.SEEK_SET)
+        previous = os.read(self._fd, 64)
+        if previous == self._token and self._master:
+            return
+        self._master = False
+        shadow = self.actions.shadow
+        if shadow is not None:
+            # Another process may have taken the role since it was recorded.
+            shadow.master = None
+        resp = self.actions.sp(True)
+        if not resp.startswith("SP"):
+            raise RuntimeError(f"Master role refused: {resp}")
+        self._master = True
+        self.switches += 1
+        logging.info("Took the master role of %s", self.path)
+        # Byte 0 is the lock region on Windows; the owner follows it.
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, b"\n" + self._token)
+        os.ftruncate(self._fd, 1 + len(self._token))
+
+    def _release(self) -> None:
+        fd, self._fd = self._fd, None
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+        if self._mu.stats()["waiters"] > 0:
+            self._yielded_at = time.monotonic()
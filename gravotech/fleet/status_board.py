@@ -0,0 +1,327 @@
+import logging
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, NamedTuple, Optional
+
+from gravotech.actions.shadow import LoadedFile
+from gravotech.client import Gravotech
+from gravotech.utils.responses import MachineStatus, parse_status
+
+MAGIC = b"GTSB"
+VERSION = 1
+VARIABLES = 10
+
+# magic, version, number of slots, slot size
+_HEADER = struct.Struct("<4sHHI")
+_SEQUENCE = struct.Struct("<Q")
+# name, updated, state, rearm, markmode, loaded file, nb marking, mode,
+# known variables mask, variables 0 to 9, last error, time of the last error
+_RECORD = struct.Struct("<32sd3i64sI1sH" + "64s" * VARIABLES + "128sd")
+_SLOT_SIZE = (_SEQUENCE.size + _RECORD.size + 7) & ~7
+
+
+class MachineSnapshot(NamedTuple):
+    """Consistent copy of one machine's slot on a :class:`StatusBoard`."""
+
+    machine: str
+    sequence: int
+    updated: float
+    status: Optional[MachineStatus]
+    loaded: Optional[LoadedFile]
+    variables: Dict[int, str]
+    last_error: Optional[str]
+    error_at: float
+
+
+def _encode(text: Optional[str], size: int) -> bytes:
+    return (text or "").encode("utf-8")[:size]
+
+
+def _decode(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8", "ignore")
+
+
+class StatusBoard:
+    """
+    Fixed-layout shared-memory table of the latest status of each machine.
+
+    One process publishes (typically a :class:`StatusPoller`) and any number
+    of local processes read, without network traffic or locks. Each slot is
+    protected by a sequence counter: the writer makes it odd while it updates
+    the slot and even afterwards, and readers retry until they copy a slot
+    with the same even counter before and after.
+
+    Create the board in the publishing process and :meth:`attach` to it by
+    name elsewhere::
+
+        board = StatusBoard(["line-1", "line-2"], name="gravotech-status")
+        reader = StatusBoard.attach("gravotech-status")
+        reader.read("line-1").status
+
+    :param machines: Machine names, one slot each (at most 32 UTF-8 bytes).
+    :param name: Shared memory name, defaults to a generated one.
+    :raises ValueError: If a machine name is duplicated or too long.
+    """
+
+    def __init__(self, machines: List[str], name: Optional[str] = None):
+        if len(set(machines)) != len(machines):
+            raise ValueError("machine names must be unique")
+        if any(len(m.encode("utf-8")) > 32 for m in machines):
+            raise ValueError("machine names are limited to 32 bytes")
+        size = _HEADER.size + len(machines) * _SLOT_SIZE
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._owner = True
+        _HEADER.pack_into(self._shm.buf, 0, MAGIC, VERSION, len(machines), _SLOT_SIZE)
+        self._slots: Dict[str, int] = {}
+        for i, machine in enumerate(machines):
+            offset = _HEADER.size + i * _SLOT_SIZE
+            self._slots[machine] = offset
+            self._write(offset, [_encode(machine, 32)] + self._empty_record()[1:])
+
+    @classmethod
+    def attach(cls, name: str) -> "StatusBoard":
+        """
+        Opens an existing board for reading.
+
+        :param name: Shared memory name of the board.
+        :raises ValueError: If the segment is not a status board.
+        """
+        board = cls.__new__(cls)
+        board._shm = _open_shared_memory(name)
+        board._owner = False
+        magic, version, count, slot_size = _HEADER.unpack_from(board._shm.buf, 0)
+        if magic != MAGIC or version != VERSION or slot_size != _SLOT_SIZE:
+            board._shm.close()
+            raise ValueError(f"{name} is not a version {VERSION} status board")
+        board._slots = {}
+        for i in range(count):
+            offset = _HEADER.size + i * _SLOT_SIZE
+            board._slots[board._read(offset).machine] = offset
+        return board
+
+    @property
+    def name(self) -> str:
+        """Shared memory name, to be passed to :meth:`attach`."""
+        return self._shm.name
+
+    @property
+    def machines(self) -> List[str]:
+        return list(self._slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        """Detaches from the board; the creator also destroys it."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def read(self, machine: str, retries: int = 1000) -> MachineSnapshot:
+        """
+        Returns a consistent copy of a machine's slot.
+
+        :param machine: The machine name.
+        :param retries: Maximum number of copies attempted while the slot is
+                        being updated, defaults to 1000.
+        :raises KeyError: If the machine has no slot.
+        :raises TimeoutError: If no consistent copy could be made.
+        """
+        return self._read(self._slots[machine], retries)
+
+    def snapshot(self) -> Dict[str, MachineSnapshot]:
+        """Returns a consistent copy of every slot, keyed by machine name."""
+        return {machine: self._read(offset) for machine, offset in self._slots.items()}
+
+    def publish(
+        self,
+        machine: str,
+        status: Optional[MachineStatus] = None,
+        loaded: Optional[LoadedFile] = None,
+        variables: Optional[Dict[int, str]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Updates a machine's slot. Fields left to None keep their last value.
+
+        Only one process may publish; it must not be called concurrently for
+        the same machine.
+
+        :param machine: The machine name.
+        :param status: The decoded ST response.
+        :param loaded: The loaded file, as tracked by :class:`ShadowState`; an
+                       empty filename clears it.
+        :param variables: Known variable values, keyed by index (0 to 9).
+        :param error: A new error message.
+        :raises KeyError: If the machine has no slot.
+        """
+        offset = self._slots[machine]
+        record = list(_RECORD.unpack_from(self._shm.buf, offset + _SEQUENCE.size))
+        record[1] = time.time()
+        if status is not None:
+            record[2:5] = status
+        if loaded is not None:
+            record[5:8] = _encode(loaded[0], 64), loaded[1], _encode(loaded[2], 1)
+        if variables is not None:
+            mask = 0
+            for index in range(VARIABLES):
+                value = variables.get(index)
+                mask |= (value is not None) << index
+                record[9 + index] = _encode(value, 64)
+            record[8] = mask
+        if error is not None:
+            record[-2:] = _encode(error, 128), record[1]
+        self._write(offset, record)
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    @staticmethod
+    def _empty_record() -> list:
+        return [b"", 0.0, 0, 0, 0, b"", 0, b"", 0] + [b""] * VARIABLES + [b"", 0.0]
+
+    def _write(self, offset: int, record: list) -> None:
+        buf = self._shm.buf
+        (sequence,) = _SEQUENCE.unpack_from(buf, offset)
+        _SEQUENCE.pack_into(buf, offset, sequence + 1)
+        _RECORD.pack_into(buf, offset + _SEQUENCE.size, *record)
+        _SEQUENCE.pack_into(buf, offset, sequence + 2)
+
+    def _read(self, offset: int, retries: int = 1000) -> MachineSnapshot:
+        buf = self._shm.buf
+        start, end = offset + _SEQUENCE.size, offset + _SEQUENCE.size + _RECORD.size
+        for attempt in range(retries):
+            (sequence,) = _SEQUENCE.unpack_from(buf, offset)
+            if not sequence & 1:
+                raw = bytes(buf[start:end])
+                if _SEQUENCE.unpack_from(buf, offset)[0] == sequence:
+                    return self._snapshot(sequence, _RECORD.unpack(raw))
+            if attempt % 64 == 63:
+                time.sleep(0)
+        raise TimeoutError("status slot kept changing during the read")
+
+    @staticmethod
+    def _snapshot(sequence: int, record: tuple) -> MachineSnapshot:
+        name, updated, state, rearm, markmode, filename, nb, mode, mask = record[:9]
+        values = record[9 : 9 + VARIABLES]
+        error, error_at = record[-2:]
+        return MachineSnapshot(
+            machine=_decode(name),
+            sequence=sequence,
+            updated=updated,
+            status=MachineStatus(state, rearm, markmode) if state else None,
+            loaded=(
+                (_decode(filename), nb, _decode(mode))
+                if filename.strip(b"\0")
+                else None
+            ),
+            variables={i: _decode(v) for i, v in enumerate(values) if mask >> i & 1},
+            last_error=_decode(error) or None,
+            error_at=error_at,
+        )
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches to a segment without letting this process destroy it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attached segment is tracked and unlinked
+        # when the process exits.
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class StatusPoller:
+    """
+    Publishes the status of a fleet on a :class:`StatusBoard`.
+
+    Each machine is queried with ``ST`` every ``interval`` seconds (over its
+    monitoring session when enabled). The loaded file and variable values come
+    from the client's shadow state when it keeps one; otherwise variables are
+    read with ``VG`` if ``poll_variables`` is set. Error responses and
+    exceptions are published as the machine's last error.
+
+    :param board: The board, with one slot per machine.
+    :param machines: Connected clients keyed by machine name.
+    :param interval: Polling period in seconds, defaults to 1.0.
+    :param poll_variables: Read variables with VG when there is no shadow
+                           state, defaults to False.
+    """
+
+    def __init__(
+        self,
+        board: StatusBoard,
+        machines: Dict[str, Gravotech],
+        interval: float = 1.0,
+        poll_variables: bool = False,
+    ):
+        self.board = board
+        self.machines = machines
+        self.interval = interval
+        self.poll_variables = poll_variables
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> None:
+        """Starts the polling thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="gravotech-status-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll_once(self) -> None:
+        """Queries every machine once and publishes the results."""
+        for name, client in self.machines.items():
+            try:
+                self._poll(name, client)
+            except Exception as e:
+                logging.warning("Status poll of %s failed: %s", name, e)
+                self.board.publish(name, error=f"{type(e).__name__}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _poll(self, name: str, client: Gravotech) -> None:
+        actions = client.Actions
+        resp = actions.st()
+        status = parse_status(resp)
+        error = None if status is not None else resp
+        loaded = variables = None
+        shadow = actions.shadow
+        if shadow is not None:
+            loaded = shadow.loaded or ("", 0, "")
+            variables = dict(shadow.variables)
+        elif self.poll_variables:
+            variables = {}
+            for index in range(VARIABLES):
+                # Raw response: an error must not be taken for a value.
+                value = actions.streamer.write(f"VG {index}\r")
+                if not value.startswith("ER"):
+                    variables[index] = value
+        self.board.publish(name, status, loaded, variables, error)
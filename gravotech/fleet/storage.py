@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from gravotech.actions.actions import GraveuseAction, LDMode
+from gravotech.utils.errors import check_err
+from gravotech.utils.responses import parse_file_list
+
+# Response of PF when the machine memory is full.
+MEMORY_FULL = check_err("ER 3 4")
+
+
+class _File:
+    """Size (None if unknown) and last use of a file stored on the machine."""
+
+    __slots__ = ("size", "last_used")
+
+    def __init__(self, size: Optional[int], last_used: float):
+        self.size = size
+        self.last_used = last_used
+
+
+class StorageManager:
+    """
+    Keeps room for uploads on a machine by evicting least-recently-used files.
+
+    Files are tracked from :meth:`sync` (``LS``), :meth:`pf` uploads and
+    :meth:`ld` loads, which count as uses. When an upload would exceed
+    ``capacity * high_water`` bytes, the least recently used files uploaded
+    through the manager are removed with ``RM`` first. If the machine still
+    answers "Memory full" (``ER 3 4``), any least recently used file is
+    removed and the upload is retried. The loaded file and protected files
+    are never evicted.
+
+    Files found by :meth:`sync` but never uploaded through the manager have
+    an unknown size and are considered older than any tracked use.
+
+    :param actions: The command interface of the machine.
+    :param capacity: Storage capacity in bytes, if known, compared to the
+                     size of the uploaded contents.
+    :param high_water: Fraction of the capacity kept in use at most, defaults to 0.9.
+    :param protected: Filenames that must never be evicted.
+    """
+
+    def __init__(
+        self,
+        actions: GraveuseAction,
+        capacity: Optional[int] = None,
+        high_water: float = 0.9,
+        protected: Iterable[str] = (),
+    ):
+        self.actions = actions
+        self.capacity = capacity
+        self.high_water = high_water
+        self.protected = set(protected)
+        self.loaded: Optional[str] = None
+        self.evictions = 0
+        self._files: "OrderedDict[str, _File]" = OrderedDict()
+        self._mu = threading.RLock()
+
+    @property
+    def used(self) -> int:
+        """Bytes used by the files of known size."""
+        return sum(f.size or 0 for f in self._files.values())
+
+    def files(self) -> List[str]:
+        """Returns the tracked files, least recently used first."""
+        with self._mu:
+            return list(self._files)
+
+    def sync(self) -> List[str]:
+        """
+        Updates the tracked files from the machine's listing.
+
+        :return: The files present on the machine.
+        """
+        names = parse_file_list(self.actions.ls())
+        with self._mu:
+            for name in list(self._files):
+                if name not in names:
+                    del self._files[name]
+            for name in names:
+                if name not in self._files:
+                    self._files[name] = _File(None, 0.0)
+                    self._files.move_to_end(name, last=False)
+        return names
+
+    def touch(self, filename: str) -> None:
+        """
+        Records a use of a file.
+
+        :param filename: The file used.
+        """
+        with self._mu:
+            entry = self._files.setdefault(filename, _File(None, 0.0))
+            entry.last_used = time.time()
+            self._files.move_to_end(filename)
+
+    def ld(
+        self,
+        filename: str,
+        nb_marking: int,
+        mode: LDMode,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Loads a file with :meth:`GraveuseAction.ld` and records the use.
+
+        :return: The LD response.
+        """
+        resp = self.actions.ld(filename, nb_marking, mode, timeout=timeout)
+        if resp.startswith("LD"):
+            with self._mu:
+                self.loaded = filename
+                self.touch(filename)
+        return resp
+
+    def pf(self, filename: str, data: bytes, timeout: Optional[float] = None) -> str:
+        """
+        Uploads a file, evicting least-recently-used files to make room.
+
+        :param filename: Target filename on the machine.
+        :param data: The file content.
+        :param timeout: Optional time budget of each command.
+        :return: "PF 1" if the upload succeeded, otherwise the last decoded
+                 error (still "Memory full" if nothing could be evicted).
+        """
+        size = len(data)
+        with self._mu:
+            if self.capacity is not None:
+                limit = self.capacity * self.high_water
+                previous = self._files.get(filename)
+                while (
+                    self.used - (previous.size or 0 if previous else 0) + size > limit
+                ):
+                    if not self._evict(filename, timeout, sized_only=True):
+                        break
+            while True:
+                resp = self.actions.pf(filename, data, timeout=timeout)
+                if resp != MEMORY_FULL or not self._evict(filename, timeout):
+                    break
+            if resp.startswith("PF"):
+                self._files[filename] = _File(size, time.time())
+                self._files.move_to_end(filename)
+            return resp
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _evict(
+        self, keep: str, timeout: Optional[float], sized_only: bool = False
+    ) -> bool:
+        """Removes the least recently used evictable file; False if there is none."""
+        for name, entry in self._files.items():
+            if name == keep or name == self.loaded or name in self.protected:
+                continue
+            if sized_only and entry.size is None:
+                continue
+            # RM takes a mask: never send a name that would match other files.
+            if "*" in name or "?" in name:
+                continue
+            resp = self.actions.rm(name, timeout=timeout)
+            if not resp.startswith("RM"):
+                logging.warning("Eviction of %s failed: %s", name, resp)
+                continue
+            logging.info("Evicted %s to free storage", name)
+            del self._files[name]
+            self.evictions += 1
+            return True
+        return False
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from gravotech.actions.actions import GraveuseAction, LDMode
+from gravotech.client import Gravotech
+from gravotech.jobs.dispatcher import IDLE_STATES
+from gravotech.stats.store import CycleStatsStore
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import CommandTimeoutError
+from gravotech.utils.responses import parse_file_list, parse_status
+
+# Phases summed into the cost of a file.
+COST_PHASES = ("ld", "marking")
+# Longest wait for the session lock before a machine is considered busy.
+LOCK_WAIT = 0.05
+
+
+@dataclass
+class CalibrationReport:
+    """
+    Outcome of a :meth:`CalibrationRunner.run`.
+
+    :ivar runs: Simulated cycles completed, keyed by machine name.
+    :ivar errors: Error of each (machine, filename) pair that could not be
+                  measured; it is retried by the next run.
+    :ivar pending: Number of cycles still missing when the run ended.
+    """
+
+    runs: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[Tuple[str, str], str] = field(default_factory=dict)
+    pending: int = 0
+
+
+class CalibrationRunner:
+    """
+    Measures how long each file of a library takes on each machine.
+
+    Files are loaded with ``LDMode.SIMULATION`` and run with ``GO``, so the
+    machine goes through the cycle without marking. Each machine is calibrated
+    by its own worker, in parallel. Before each cycle, the worker asks the
+    ``idle`` predicate whether production is stopped on the machine, takes the
+    session lock if it is free, and checks with ``ST`` that the machine is
+    Alive or Ready; it keeps the lock from ``LD`` to the end of the cycle.
+    Otherwise it tries again after ``poll_interval``.
+
+    Neither the lock nor ``ST`` tells a production job apart from an idle
+    machine: :func:`run_job` locks each command separately, so a calibration
+    cycle may slip between a production ``LD`` and its ``GO``, which would
+    then run the calibration file in simulation without marking the part.
+    Pass an ``idle`` predicate reflecting the production schedule, or do not
+    run calibration while production may start on the same machines.
+
+    Successful cycles are recorded in ``store`` under the machine name, with
+    the LD duration and the time from GO to "GO F" as the marking duration.
+    Pairs already measured ``runs`` times in the store are skipped, so a run
+    interrupted at the end of an idle window resumes where it stopped when the
+    store is persisted. Use a store separate from production statistics.
+
+    :param machines: Connected clients keyed by machine name.
+    :param library: Filenames to calibrate, or their contents keyed by
+                    filename to upload files missing on a machine.
+    :param store: Store receiving the measurements, defaults to a new
+                  in-memory store.
+    :param runs: Simulated cycles per file and machine, defaults to 1.
+    :param poll_interval: Seconds between two checks of a busy machine,
+                          defaults to 1.0.
+    :param timeout: Optional time budget of each simulated cycle.
+    :param idle: Optional predicate called with a machine name, returning
+                 whether no production job may run on it during a cycle.
+    """
+
+    def __init__(
+        self,
+        machines: Dict[str, Gravotech],
+        library: Union[Iterable[str], Mapping[str, bytes]],
+        store: Optional[CycleStatsStore] = None,
+        runs: int = 1,
+        poll_interval: float = 1.0,
+        timeout: Optional[float] = None,
+        idle: Optional[Callable[[str], bool]] = None,
+    ):
+        self.machines = machines
+        if isinstance(library, Mapping):
+            self.library: Dict[str, Optional[bytes]] = dict(library)
+        else:
+            self.library = dict.fromkeys(library)
+        self.store = store if store is not None else CycleStatsStore()
+        self.runs = runs
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.idle = idle
+
+    def run(
+        self,
+        duration: Optional[float] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> CalibrationReport:
+        """
+        Calibrates the library until it is complete, ``duration`` elapses or
+        ``stop`` is set. A cycle in progress is always completed.
+
+        The store is flushed at the end when it has a database path.
+
+        :param duration: Optional length of the idle window in seconds.
+        :param stop: Optional event ending the run early.
+        :return: The runs completed, the errors and the cycles still missing.
+        """
+        deadline = Deadline.of(duration)
+        stop = stop if stop is not None else threading.Event()
+        report = CalibrationReport(runs=dict.fromkeys(self.machines, 0))
+        workers = max(1, len(self.machines))
+        with ThreadPoolExecutor(
+            workers, thread_name_prefix="gravotech-calibration"
+        ) as pool:
+            for name in self.machines:
+                pool.submit(self._calibrate, name, report, deadline, stop)
+        report.pending = sum(
+            self.runs - self.store.count(name, filename)
+            for name in self.machines
+            for filename in self._pending(name)
+        )
+        if self.store.path is not None:
+            self.store.flush()
+        return report
+
+    def cost_model(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the measured cycle time of each file on each machine.
+
+        The cost is the sum of the median LD and marking durations in the
+        store. Pairs without a measurement are absent.
+
+        :return: Cycle time in seconds keyed by machine name, then filename.
+        """
+        model: Dict[str, Dict[str, float]] = {}
+        for name in self.machines:
+            for filename in self.library:
+                if not self.store.count(name, filename):
+                    continue
+                model.setdefault(name, {})[filename] = sum(
+                    self.store.percentiles(phase, (50,), name, filename)[50]
+                    for phase in COST_PHASES
+                )
+        return model
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _pending(self, name: str) -> List[str]:
+        return [f for f in self.library if self.store.count(name, f) < self.runs]
+
+    def _calibrate(
+        self,
+        name: str,
+        report: CalibrationReport,
+        deadline: Optional[Deadline],
+        stop: threading.Event,
+    ) -> None:
+        failed = set()
+        while not stop.is_set() and (deadline is None or not deadline.expired()):
+            todo = [f for f in self._pending(name) if f not in failed]
+            if not todo:
+                return
+            try:
+                resp = self._measure(name, todo[0])
+            except Exception as e:
+                resp = f"{type(e).__name__}: {e}"
+            if resp is None:
+                wait = self.poll_interval
+                stop.wait(wait if deadline is None else min(wait, deadline.remaining()))
+            elif resp == "GO F":
+                report.runs[name] += 1
+            else:
+                logging.warning(
+                    "Calibration of %s on %s failed: %s", todo[0], name, resp
+                )
+                failed.add(todo[0])
+                report.errors[(name, todo[0])] = resp
+
+    def _measure(self, name: str, filename: str) -> Optional[str]:
+        """Runs one simulated cycle; None if the machine is not idle."""
+        if self.idle is not None and not self.idle(name):
+            return None
+        client = self.machines[name]
+        # Separate actions so that production statistics are not affected.
+        actions = GraveuseAction(client.Actions.streamer)
+        try:
+            unlock = actions.streamer.lock(timeout=LOCK_WAIT)
+        except CommandTimeoutError:
+            return None
+        try:
+            status = parse_status(actions.st())
+            if status is None or status.state not in IDLE_STATES:
+                return None
+            data = self.library[filename]
+            if data is not None and filename not in parse_file_list(
+                actions.ls(filename)
+            ):
+                resp = actions.pf(filename, data)
+                if not resp.startswith("PF"):
+                    return resp
+            started = time.perf_counter()
+            resp = actions.ld(filename, 1, LDMode.SIMULATION)
+            if client.Actions.shadow is not None:
+                client.Actions.shadow.loaded = None
+            if not resp.startswith("LD"):
+                return resp
+            loaded = time.perf_counter()
+            resp = actions.go(timeout=self.timeout)
+            if resp == "GO F":
+                self.store.record(
+                    name,
+                    filename,
+                    ld=loaded - started,
+                    marking=time.perf_counter() - loaded,
+                )
+            return resp
+        finally:
+            unlock()
@@ -0,0 +1,317 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from gravotech.client import Gravotech
+from gravotech.jobs.job import MarkingJob, run_job
+from gravotech.utils.responses import MachineState, parse_file_list, parse_status
+
+# States in which a machine accepts a new job.
+IDLE_STATES = {MachineState.ALIVE, MachineState.READY}
+
+_Entry = Tuple[MarkingJob, Future]
+
+
+class _Machine:
+    """Dispatcher-side bookkeeping for one engraver."""
+
+    def __init__(self, name: str, client: Gravotech):
+        self.name = name
+        self.client = client
+        self.queue: Deque[_Entry] = deque()
+        self.busy = False
+        self.state: Optional[int] = None
+        self.state_at = 0.0
+        self.files: Optional[Set[str]] = None
+        self.cycle_time: Optional[float] = None
+        self.file_cycle_times: Dict[str, float] = {}
+        self.thread: Optional[threading.Thread] = None
+
+
+class FleetDispatcher:
+    """
+    Routes marking jobs across several engravers.
+
+    Each submitted job is queued on the machine with the lowest expected
+    completion time, based on its queue length, its last known ``ST`` state,
+    whether the file is already present (``LS``) and the cycle times measured
+    so far. Machines in Init, Pause or Fault receive no new jobs. A worker
+    thread per machine executes its queue and, once empty, steals jobs from the
+    back of the longest queue in the fleet. Jobs without file content only go
+    to machines already holding the file.
+
+    :param machines: Connected clients keyed by machine name.
+    :param default_cycle_time: Cycle time in seconds assumed before any
+                               measurement, defaults to 10.0.
+    :param upload_penalty: Extra time in seconds charged when the file must be
+                           uploaded first, defaults to 5.0.
+    :param status_ttl: Maximum age in seconds of a cached ST state, defaults to 1.0.
+    :param smoothing: Weight of the latest sample in cycle time averages,
+                      defaults to 0.3.
+    """
+
+    def __init__(
+        self,
+        machines: Dict[str, Gravotech],
+        default_cycle_time: float = 10.0,
+        upload_penalty: float = 5.0,
+        status_ttl: float = 1.0,
+        smoothing: float = 0.3,
+    ):
+        self.default_cycle_time = default_cycle_time
+        self.upload_penalty = upload_penalty
+        self.status_ttl = status_ttl
+        self.smoothing = smoothing
+        self._machines = [_Machine(name, client) for name, client in machines.items()]
+        self._backlog: Deque[_Entry] = deque()
+        self._cv = threading.Condition()
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> None:
+        """Starts one worker thread per machine."""
+        with self._cv:
+            self._running = True
+        for machine in self._machines:
+            machine.thread = threading.Thread(
+                target=self._worker,
+                args=(machine,),
+                name=f"gravotech-dispatch-{machine.name}",
+                daemon=True,
+            )
+            machine.thread.start()
+
+    def stop(self) -> None:
+        """Stops the workers once their current job is finished."""
+        with self._cv:
+            self._running = False
+            self._cv.notify_all()
+        for machine in self._machines:
+            if machine.thread is not None:
+                machine.thread.join()
+                machine.thread = None
+
+    def submit(self, job: MarkingJob) -> Future:
+        """
+        Queues a job on the best machine.
+
+        :param job: The job to execute.
+        :return: A future resolved with the final GO status or error message.
+        """
+        future: Future = Future()
+        target = self._choose(job)
+        with self._cv:
+            if target is None:
+                self._backlog.append((job, future))
+            else:
+                target.queue.append((job, future))
+            self._cv.notify_all()
+        return future
+
+    def load_cycle_times(self, model: Dict[str, Dict[str, float]]) -> None:
+        """
+        Seeds the per-file cycle times, e.g. from
+        :meth:`CalibrationRunner.cost_model`. Completed jobs keep refining them.
+
+        :param model: Cycle time in seconds keyed by machine name, then filename.
+        """
+        with self._cv:
+            for machine in self._machines:
+                times = model.get(machine.name)
+                if not times:
+                    continue
+                machine.file_cycle_times.update(times)
+                if machine.cycle_time is None:
+                    machine.cycle_time = sum(times.values()) / len(times)
+
+    def cycle_times(self) -> Dict[str, Optional[float]]:
+        """Returns the smoothed cycle time in seconds measured on each machine."""
+        return {machine.name: machine.cycle_time for machine in self._machines}
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _refresh_state(self, machine: _Machine) -> Optional[int]:
+        """Returns the machine state, querying ST on idle machines when stale."""
+        with self._cv:
+            if machine.busy:
+                return MachineState.MARKING
+            if time.monotonic() - machine.state_at < self.status_ttl:
+                return machine.state
+        try:
+            status = parse_status(machine.client.Actions.st())
+        except Exception as e:
+            logging.error("Status of %s unavailable: %s", machine.name, e)
+            status = None
+        with self._cv:
+            # A job started meanwhile: the answer is already stale.
+            if machine.busy:
+                return MachineState.MARKING
+            machine.state = status.state if status else None
+            machine.state_at = time.monotonic()
+            return machine.state
+
+    def _list_files(self, machine: _Machine) -> Optional[Set[str]]:
+        """Lists the files of a machine and caches them; None on failure."""
+        try:
+            files = set(parse_file_list(machine.client.Actions.ls()))
+        except Exception as e:
+            logging.error("File list of %s unavailable: %s", machine.name, e)
+            return None
+        with self._cv:
+            if machine.files is None:
+                machine.files = files
+            return machine.files
+
+    def _has_file(self, machine: _Machine, filename: str, worker: bool = False) -> bool:
+        """
+        Whether a machine has a file. Its files are listed if unknown, unless
+        it is busy and the caller is not its worker.
+        """
+        with self._cv:
+            files, busy = machine.files, machine.busy
+            if files is not None:
+                return filename in files
+        if busy and not worker:
+            return False
+        files = self._list_files(machine)
+        with self._cv:
+            return files is not None and filename in files
+
+    def _expected_time(
+        self, machine: _Machine, job: MarkingJob, has_file: bool
+    ) -> float:
+        cycle = machine.cycle_time or self.default_cycle_time
+        file_cycle = machine.file_cycle_times.get(job.filename, cycle)
+        pending = len(machine.queue) + int(machine.busy)
+        cost = pending * cycle + file_cycle * max(job.count, 1)
+        if not has_file:
+            cost += self.upload_penalty
+        return cost
+
+    def _choose(self, job: MarkingJob) -> Optional[_Machine]:
+        # Machine queries first, then the costs under the condition.
+        candidates = []
+        for machine in self._machines:
+            state = self._refresh_state(machine)
+            if state not in IDLE_STATES and state != MachineState.MARKING:
+                continue
+            has_file = self._has_file(machine, job.filename)
+            if job.data is None and not has_file:
+                continue
+            candidates.append((machine, has_file))
+        best: Optional[_Machine] = None
+        best_cost = 0.0
+        with self._cv:
+            for machine, has_file in candidates:
+                cost = self._expected_time(machine, job, has_file)
+                if best is None or cost < best_cost:
+                    best, best_cost = machine, cost
+        return best
+
+    @staticmethod
+    def _can_run(machine: _Machine, job: MarkingJob) -> bool:
+        """Whether a machine has, or can be sent, the file of a job."""
+        if job.data is not None:
+            return True
+        return machine.files is not None and job.filename in machine.files
+
+    @staticmethod
+    def _pop_runnable(
+        machine: _Machine, entries: Deque[_Entry], from_back: bool = False
+    ) -> Optional[_Entry]:
+        """Removes the first entry a machine can run, from the front or the back."""
+        order = reversed(entries) if from_back else iter(entries)
+        for entry in order:
+            if FleetDispatcher._can_run(machine, entry[0]):
+                entries.remove(entry)
+                return entry
+        return None
+
+    def _take(self, machine: _Machine) -> Optional[_Entry]:
+        """Pops the next job for a machine, stealing from others if needed."""
+        if machine.queue:
+            return machine.queue.popleft()
+        entry = self._pop_runnable(machine, self._backlog)
+        if entry is not None:
+            return entry
+        victims: List[_Machine] = [
+            m
+            for m in self._machines
+            if m is not machine
+            and m.queue
+            and (len(m.queue) > 1 or m.busy or m.state not in IDLE_STATES)
+        ]
+        for victim in sorted(victims, key=lambda m: len(m.queue), reverse=True):
+            entry = self._pop_runnable(machine, victim.queue, from_back=True)
+            if entry is not None:
+                return entry
+        return None
+
+    def _worker(self, machine: _Machine) -> None:
+        while True:
+            state = self._refresh_state(machine)
+            if machine.files is None and state in IDLE_STATES:
+                # Known files decide which backlog and stolen jobs may run here.
+                self._list_files(machine)
+            with self._cv:
+                if not self._running:
+                    return
+                entry = self._take(machine) if state in IDLE_STATES else None
+                if entry is None:
+                    self._cv.wait(self.status_ttl)
+                    continue
+                machine.busy = True
+            job, future = entry
+            if future.set_running_or_notify_cancel():
+                self._execute(machine, job, future)
+            with self._cv:
+                machine.busy = False
+                machine.state_at = 0.0
+                self._cv.notify_all()
+
+    def _execute(self, machine: _Machine, job: MarkingJob, future: Future) -> None:
+        actions = machine.client.Actions
+        try:
+            if job.data is not None and not self._has_file(
+                machine, job.filename, worker=True
+            ):
+                resp = actions.pf(job.filename, job.data)
+                if not resp.startswith("PF"):
+                    future.set_result(resp)
+                    return
+                with self._cv:
+                    if machine.files is not None:
+                        machine.files.add(job.filename)
+            started = time.monotonic()
+            resp = run_job(actions, job)
+            if resp == "GO F":
+                self._record(machine, job, time.monotonic() - started)
+            future.set_result(resp)
+        except Exception as e:
+            logging.error("Job %s failed on %s: %s", job.filename, machine.name, e)
+            future.set_exception(e)
+
+    def _record(self, machine: _Machine, job: MarkingJob, elapsed: float) -> None:
+        sample = elapsed / max(job.count, 1)
+        alpha = self.smoothing
+        with self._cv:
+            previous = machine.file_cycle_times.get(job.filename)
+            machine.file_cycle_times[job.filename] = (
+                sample if previous is None else alpha * sample + (1 - alpha) * previous
+            )
+            machine.cycle_time = (
+                sample
+                if machine.cycle_time is None
+                else alpha * sample + (1 - alpha) * machine.cycle_time
+            )
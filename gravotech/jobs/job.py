@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from gravotech.actions.actions import GraveuseAction, LDMode
+
+
+@dataclass
+class MarkingJob:
+    """
+    A marking job: one file marked ``count`` times with a set of variables.
+
+    :ivar filename: The T2L file to load.
+    :ivar variables: Variable values to set before marking, keyed by index (0 to 9).
+    :ivar count: Number of markings passed to LD.
+    :ivar mode: LD execution mode.
+    :ivar data: Optional file content, uploaded with PF when the file is
+                missing on the target machine.
+    """
+
+    filename: str
+    variables: Dict[int, str] = field(default_factory=dict)
+    count: int = 1
+    mode: LDMode = LDMode.NORMAL
+    data: Optional[bytes] = None
+
+
+def run_job(actions: GraveuseAction, job: MarkingJob) -> str:
+    """
+    Loads the job's file, sets its variables and runs the marking cycle.
+
+    Only variables that changed are sent when the actions keep a shadow state.
+    The sequence stops at the first error response, which is returned.
+
+    :param actions: The command interface of the target machine.
+    :param job: The job to execute.
+    :return: The final GO status ("GO P", "GO S" or "GO F") or the error message.
+    """
+    resp = actions.ld(job.filename, job.count, job.mode)
+    if not resp.startswith("LD"):
+        return resp
+    for resp in actions.set_variables(job.variables).values():
+        if not resp.startswith("VS"):
+            return resp
+    return actions.go()
@@ -0,0 +1,206 @@
+import json
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from gravotech.actions.actions import GraveuseAction
+
+# Index layout: id after the highest marked record, log offset covering every
+# record before it, number of unmarked ids below it, followed by those ids.
+_INDEX = struct.Struct("<QQI")
+_ID = struct.Struct("<Q")
+
+
+class JobJournal:
+    """
+    Write-ahead journal of a marking campaign.
+
+    Every part is identified by a sequential record id. Before a part is marked
+    an ``intent`` entry is appended, and once GO returns an ``outcome`` entry
+    records the result. Entries are JSON lines appended to ``path``.
+
+    Durability is batched: an fsync happens every ``sync_every`` intents and
+    covers the previous outcomes too, so with the default of 1 each part costs
+    a single fsync. After each fsync, a small index (``path + ".idx"``) stores
+    the id after the highest marked record (:attr:`frontier`), the ids of the
+    failed parts and the log offset it covers. On restart only the entries
+    written after that offset are replayed, so resuming does not depend on the
+    campaign length.
+
+    A part whose last outcome is not "GO F" stays in :attr:`unmarked` until it
+    is marked, and :attr:`next_id` never moves past it: a failure followed by
+    successes is not skipped on resume.
+
+    A part whose intent was logged without an outcome may or may not have been
+    marked; it is reported by :attr:`in_doubt` for reconciliation.
+
+    :param path: Path of the journal log.
+    :param sync_every: Number of intents grouped under one fsync, defaults to 1.
+    """
+
+    def __init__(self, path: str, sync_every: int = 1):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.sync_every = sync_every
+        self.frontier = 0
+        self.in_doubt: Optional[int] = None
+        self._failed: Set[int] = set()
+        self._doubt_offset = 0
+        self._pending = 0
+        self._mu = threading.Lock()
+        self._recover()
+        self._log = open(self.path, "ab")
+        self._index_fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @property
+    def next_id(self) -> int:
+        """The lowest record id not marked yet."""
+        return min(self._failed, default=self.frontier)
+
+    @property
+    def unmarked(self) -> List[int]:
+        """Ids of the parts whose last outcome was a failure, in order."""
+        return sorted(self._failed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _recover(self) -> None:
+        """Restores the journal state from the index and the log tail."""
+        offset = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                raw = f.read()
+            # A missing or torn index means replaying the whole log.
+            if len(raw) >= _INDEX.size:
+                frontier, index_offset, count = _INDEX.unpack_from(raw)
+                if len(raw) == _INDEX.size + count * _ID.size:
+                    self.frontier, offset = frontier, index_offset
+                    self._failed = {
+                        _ID.unpack_from(raw, _INDEX.size + i * _ID.size)[0]
+                        for i in range(count)
+                    }
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r+b") as f:
+            f.seek(offset)
+            good = offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(entry, good)
+                good += len(line)
+            # Drop a torn entry left by a crash in the middle of a write.
+            f.truncate(good)
+
+    def _apply(self, entry: Dict[str, Any], offset: int) -> None:
+        record_id = entry["id"]
+        if entry["op"] == "intent":
+            self.in_doubt = record_id
+            self._doubt_offset = offset
+        elif entry["op"] == "outcome":
+            if self.in_doubt == record_id:
+                self.in_doubt = None
+            if entry["result"] == "GO F":
+                self._failed.discard(record_id)
+                self.frontier = max(self.frontier, record_id + 1)
+            else:
+                self._failed.add(record_id)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        offset = self._log.tell()
+        self._log.write(line.encode("utf-8"))
+        self._apply(entry, offset)
+
+    def _sync(self) -> None:
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        # Keep an unresolved intent inside the replayed tail.
+        offset = self._log.tell() if self.in_doubt is None else self._doubt_offset
+        failed = sorted(self._failed)
+        index = _INDEX.pack(self.frontier, offset, len(failed)) + b"".join(
+            _ID.pack(record_id) for record_id in failed
+        )
+        os.lseek(self._index_fd, 0, os.SEEK_SET)
+        os.write(self._index_fd, index)
+        os.ftruncate(self._index_fd, len(index))
+        os.fsync(self._index_fd)
+        self._pending = 0
+
+    # ========================================================================
+    # PUBLIC METHODS
+    # ========================================================================
+
+    def begin(self, record_id: int, payload: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Logs the intent to mark a part.
+
+        :param record_id: The part's record id.
+        :param payload: Optional JSON-serializable data (variables, serial...).
+        """
+        with self._mu:
+            self._append({"id": record_id, "op": "intent", "payload": payload})
+            self._pending += 1
+            if self._pending >= self.sync_every:
+                self._sync()
+
+    def complete(self, record_id: int, result: str) -> None:
+        """
+        Logs the outcome of a part. Only "GO F" counts as marked.
+
+        The entry becomes durable with the next fsync.
+
+        :param record_id: The part's record id.
+        :param result: The final GO status or error message.
+        """
+        with self._mu:
+            self._append({"id": record_id, "op": "outcome", "result": result})
+
+    def sync(self) -> None:
+        """Forces pending entries to disk."""
+        with self._mu:
+            self._sync()
+
+    def close(self) -> None:
+        """Syncs pending entries and closes the journal files."""
+        with self._mu:
+            if self._log.closed:
+                return
+            self._sync()
+            self._log.close()
+            os.close(self._index_fd)
+
+    def run(
+        self, actions: GraveuseAction, record_id: int, variables: Dict[int, str]
+    ) -> str:
+        """
+        Journals and executes the VS then GO sequence of one part.
+
+        :param actions: The command interface of the machine.
+        :param record_id: The part's record id.
+        :param variables: Variable values keyed by index (0 to 9).
+        :return: The final GO status or the first error message.
+        """
+        self.begin(record_id, {str(k): v for k, v in variables.items()})
+        for index, text in sorted(variables.items()):
+            resp = actions.vs(index, text)
+            if not resp.startswith("VS"):
+                self.complete(record_id, resp)
+                return resp
+        # If GO raises, the part stays in doubt: it may have been marked.
+        resp = actions.go()
+        self.complete(record_id, resp)
+        return resp
@@ -0,0 +1,156 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from gravotech.client import Gravotech
+from gravotech.jobs.job import MarkingJob, run_job
+from gravotech.utils.commands import pf_command
+from gravotech.utils.errors import MASTER_REQUIRED, check_err, error_code
+from gravotech.utils.responses import parse_file_list
+from gravotech.utils.templates import ValueCursor
+
+
+@dataclass
+class StagedJob:
+    """
+    A job prepared for execution.
+
+    :ivar job: The job, with its variable values resolved to texts.
+    :ivar error: Error message if the preparation failed; the job is not run.
+    :ivar uploaded: Whether the file was uploaded during the preparation.
+    :ivar duration: Time spent preparing the job, in seconds.
+    """
+
+    job: MarkingJob
+    error: Optional[str] = None
+    uploaded: bool = False
+    duration: float = 0.0
+
+
+@dataclass
+class PipelineStats:
+    """Counters of a :class:`JobPipeline`."""
+
+    jobs: int = 0
+    uploads: int = 0
+    master_uploads: int = 0
+    stage_wait: float = 0.0
+    files: Set[str] = field(default_factory=set)
+
+
+class JobPipeline:
+    """
+    Runs jobs on one machine, preparing each job while the previous one marks.
+
+    Preparing a job means checking that its file is present (``LS``),
+    uploading it if it is missing and data is provided (``PF``), and
+    resolving value cursors to the texts to send. It runs in a background
+    thread over the monitoring session when the client has one, so that when
+    ``GO F`` arrives only ``LD``, ``VS`` and ``GO`` remain to be sent on the
+    master session. Uploads refused on the slave session ("Command reserved
+    to the master") are sent again on the master session once it is free.
+
+    Without a monitoring session, preparation still overlaps marking but its
+    commands wait for the master session.
+
+    :param client: The connected client of the machine.
+    :param timeout: Optional time budget of each preparation command.
+    """
+
+    def __init__(self, client: Gravotech, timeout: Optional[float] = None):
+        self.client = client
+        self.timeout = timeout
+        self.stats = PipelineStats()
+
+    def run(self, jobs: Iterable[MarkingJob]) -> Iterator[Tuple[MarkingJob, str]]:
+        """
+        Runs jobs in order, staging the next one during each cycle.
+
+        :param jobs: The jobs to run.
+        :return: An iterator of (job, final GO status or error message) pairs.
+        """
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(1, thread_name_prefix="gravotech-stage") as stager:
+            pending: Optional[Future] = self._submit(stager, jobs)
+            while pending is not None:
+                waited = time.perf_counter()
+                staged: StagedJob = pending.result()
+                self.stats.stage_wait += time.perf_counter() - waited
+                pending = self._submit(stager, jobs)
+                yield staged.job, self._execute(staged)
+
+    def stage(self, job: MarkingJob) -> StagedJob:
+        """
+        Prepares a job: file presence check, upload and variable values.
+
+        :param job: The job to prepare.
+        :return: The prepared job.
+        """
+        started = time.perf_counter()
+        staged = StagedJob(replace(job, variables=self._resolve(job.variables)))
+        try:
+            if job.data is not None and not self._has_file(job.filename):
+                staged.error = self._upload(job.filename, job.data)
+                staged.uploaded = staged.error is None
+        except Exception as e:
+            logging.error("Staging of %s failed: %s", job.filename, e)
+            staged.error = f"{type(e).__name__}: {e}"
+        staged.duration = time.perf_counter() - started
+        return staged
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _submit(self, stager: ThreadPoolExecutor, jobs: Iterator[MarkingJob]):
+        job = next(jobs, None)
+        return None if job is None else stager.submit(self.stage, job)
+
+    def _execute(self, staged: StagedJob) -> str:
+        self.stats.jobs += 1
+        if staged.error is not None:
+            return staged.error
+        return run_job(self.client.Actions, staged.job)
+
+    @staticmethod
+    def _resolve(variables: Dict[int, object]) -> Dict[int, str]:
+        return {
+            index: next(value) if isinstance(value, ValueCursor) else value
+            for index, value in variables.items()
+        }
+
+    def _has_file(self, filename: str) -> bool:
+        if filename in self.stats.files:
+            return True
+        resp = self.client.Actions.ls(filename, timeout=self.timeout)
+        self.stats.files.update(parse_file_list(resp))
+        return filename in self.stats.files
+
+    def _upload(self, filename: str, data: bytes) -> Optional[str]:
+        """Uploads a file, over the slave session first; returns the error if any."""
+        resp = None
+        router = self.client.Router
+        if router is not None:
+            # Checked and sent like GraveuseAction.pf, over the slave session.
+            validator = self.client.Actions.validator
+            if validator is not None:
+                validator.pf(filename, data)
+            cmd = pf_command(filename, data)
+            resp = router.monitor.write(cmd, timeout=self.timeout)
+            if validator is not None:
+                validator.observe(resp)
+            if error_code(resp) == MASTER_REQUIRED:
+                logging.info(
+                    "Slave upload of %s refused: %s", filename, check_err(resp)
+                )
+                resp = None
+        if resp is None:
+            self.stats.master_uploads += 1
+            resp = self.client.Actions.pf(filename, data, timeout=self.timeout)
+        if not resp.startswith("PF"):
+            return check_err(resp)
+        self.stats.uploads += 1
+        self.stats.files.add(filename)
+        return None
@@ -0,0 +1,234 @@
+import fnmatch
+import random
+import shlex
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from gravotech.utils.responses import MachineState
+
+# LD modes and the markmode reported by ST for each of them.
+MARKMODES = {"N": 0, "A": 1, "S": 2}
+
+
+class SimulatedMachine:
+    """
+    Machine-wide state of a simulated TL07 engraver, shared by its sessions.
+
+    :param marking_time: Duration of a simulated marking cycle in seconds, defaults to 0.05.
+    :param capacity: Storage capacity in bytes for uploaded files, defaults to 1 MiB.
+    :param overload_rate: Probability of answering a command with "ER 3 1", defaults to 0.
+    :param seed: Optional seed of the overload random generator.
+    """
+
+    def __init__(
+        self,
+        marking_time: float = 0.05,
+        capacity: int = 1 << 20,
+        overload_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.marking_time = marking_time
+        self.capacity = capacity
+        self.overload_rate = overload_rate
+        self.state = MachineState.ALIVE
+        self.markmode = 0
+        self.files: Dict[str, bytes] = {}
+        self.variables: List[str] = [""] * 10
+        self.loaded: Optional[Tuple[str, int, str]] = None
+        # Session holding the master role; taking it demotes the previous one.
+        self.master: Optional["TL07Handler"] = None
+        self.cycles = 0
+        self.mu = threading.RLock()
+        self._random = random.Random(seed)
+
+    def used(self) -> int:
+        """Bytes used by stored files."""
+        return sum(len(data) for data in self.files.values())
+
+    def overloaded(self) -> bool:
+        return self.overload_rate > 0 and self._random.random() < self.overload_rate
+
+
+class TL07Handler:
+    """
+    Protocol logic of one TL07 session on a :class:`SimulatedMachine`.
+
+    :meth:`feed` answers a command immediately. Lines emitted later, such as
+    the end of a marking cycle, are returned by :meth:`poll` once due;
+    :meth:`next_due` tells when the next one is expected.
+
+    :param machine: The shared machine state.
+    :param require_master: Reject control commands from slave sessions with
+                           "ER 4 1", defaults to False.
+    """
+
+    # Commands reserved to the master session when require_master is set.
+    CONTROL_COMMANDS = {"AD", "AM", "GO", "LD", "PF", "RM", "VS"}
+
+    def __init__(self, machine: SimulatedMachine, require_master: bool = False):
+        self.machine = machine
+        self.require_master = require_master
+        self._pending: List[Tuple[float, str]] = []
+
+    @property
+    def master(self) -> bool:
+        """Whether this session holds the machine's master role."""
+        return self.machine.master is self
+
+    # ========================================================================
+    # ASYNCHRONOUS LINES
+    # ========================================================================
+
+    def next_due(self) -> Optional[float]:
+        """Monotonic time of the next pending line, or None."""
+        return self._pending[0][0] if self._pending else None
+
+    def poll(self, now: Optional[float] = None) -> List[str]:
+        """
+        Returns the pending lines that are due.
+
+        :param now: Current monotonic time, defaults to now.
+        """
+        now = time.monotonic() if now is None else now
+        lines = []
+        while self._pending and self._pending[0][0] <= now:
+            _, line = self._pending.pop(0)
+            if line == "GO F":
+                self._finish_cycle()
+            lines.append(line)
+        return lines
+
+    def close(self) -> None:
+        """
+        Ends the session. A cycle in progress completes, since marking does not
+        depend on the session that started it.
+        """
+        if any(line == "GO F" for _, line in self._pending):
+            self._finish_cycle()
+        self._pending = []
+        with self.machine.mu:
+            if self.master:
+                self.machine.master = None
+
+    def _finish_cycle(self) -> None:
+        machine = self.machine
+        with machine.mu:
+            machine.cycles += 1
+            if machine.state == MachineState.MARKING:
+                machine.state = MachineState.READY
+
+    # ========================================================================
+    # COMMANDS
+    # ========================================================================
+
+    def feed(self, cmd: str) -> List[str]:
+        """
+        Executes one command.
+
+        :param cmd: The command without its terminating <CR>.
+        :return: The response lines.
+        """
+        try:
+            args = shlex.split(cmd.strip())
+        except ValueError:
+            return ["ER 1 4"]
+        if not args:
+            return []
+        keyword = args[0].upper()
+        handler = getattr(self, f"_cmd_{keyword.lower()}", None)
+        if handler is None:
+            return ["ER 1 1"]
+        if self.machine.overloaded():
+            return ["ER 3 1"]
+        if self.require_master and not self.master and keyword in self.CONTROL_COMMANDS:
+            return ["ER 4 1"]
+        with self.machine.mu:
+            return handler(args[1:])
+
+    def _cmd_ad(self, args: List[str]) -> List[str]:
+        if self.machine.state != MachineState.FAULT:
+            return ["ER 3 5"]
+        self.machine.state = MachineState.ALIVE
+        self.machine.loaded = None
+        return ["AD 1"]
+
+    def _cmd_am(self, args: List[str]) -> List[str]:
+        lines = ["AM 1"]
+        if self.machine.state == MachineState.MARKING:
+            self._pending = [(t, l) for t, l in self._pending if l != "GO F"]
+            self._pending.insert(0, (time.monotonic(), "GO S"))
+        self.machine.state = MachineState.FAULT
+        return lines
+
+    def _cmd_go(self, args: List[str]) -> List[str]:
+        machine = self.machine
+        if machine.state != MachineState.READY or machine.loaded is None:
+            return [f"ER 2 {int(machine.state)}"]
+        machine.state = MachineState.MARKING
+        self._pending.append((time.monotonic() + machine.marking_time, "GO F"))
+        return ["GO M"]
+
+    def _cmd_gp(self, args: List[str]) -> List[str]:
+        return [f'GP "MASTER":"{int(self.master)}"']
+
+    def _cmd_ld(self, args: List[str]) -> List[str]:
+        if len(args) < 3:
+            return ["ER 1 2"]
+        filename, count, mode = args[0], args[1], args[2].upper()
+        if not count.isdigit() or int(count) > 4294967295 or mode not in MARKMODES:
+            return ["ER 1 7"]
+        if filename not in self.machine.files:
+            return ["ER 1 5"]
+        if self.machine.state not in (MachineState.ALIVE, MachineState.READY):
+            return [f"ER 2 {int(self.machine.state)}"]
+        self.machine.loaded = (filename, int(count), mode)
+        self.machine.markmode = MARKMODES[mode]
+        self.machine.state = MachineState.READY
+        return ["LD 1"]
+
+    def _cmd_ls(self, args: List[str]) -> List[str]:
+        mask = args[0] if args else "*"
+        names = sorted(n for n in self.machine.files if fnmatch.fnmatchcase(n, mask))
+        return [str(len(names))] + names
+
+    def _cmd_pf(self, args: List[str]) -> List[str]:
+        if len(args) < 2:
+            return ["ER 1 2"]
+        filename, data = args[0], " ".join(args[1:]).encode("ascii", "replace")
+        machine = self.machine
+        used = machine.used() - len(machine.files.get(filename, b""))
+        if used + len(data) > machine.capacity:
+            return ["ER 3 4"]
+        machine.files[filename] = data
+        return ["PF 1"]
+
+    def _cmd_rm(self, args: List[str]) -> List[str]:
+        if not args:
+            return ["ER 1 2"]
+        for name in [n for n in self.machine.files if fnmatch.fnmatchcase(n, args[0])]:
+            del self.machine.files[name]
+        return ["RM 1"]
+
+    def _cmd_sp(self, args: List[str]) -> List[str]:
+        if not args or args[0] not in ("MASTER:0", "MASTER:1"):
+            return ["ER 1 4"]
+        if args[0].endswith("1"):
+            self.machine.master = self
+        elif self.master:
+            self.machine.master = None
+        return ["SP 1"]
+
+    def _cmd_st(self, args: List[str]) -> List[str]:
+        return [f"ST {int(self.machine.state)} 0 {self.machine.markmode}"]
+
+    def _cmd_vg(self, args: List[str]) -> List[str]:
+        if len(args) != 1 or not args[0].isdigit() or int(args[0]) > 9:
+            return ["ER 1 7"]
+        return [self.machine.variables[int(args[0])]]
+
+    def _cmd_vs(self, args: List[str]) -> List[str]:
+        if len(args) != 2 or not args[0].isdigit() or int(args[0]) > 9:
+            return ["ER 1 7"]
+        self.machine.variables[int(args[0])] = args[1]
+        return [f"VS 1 {args[0]}"]
@@ -0,0 +1,107 @@
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from gravotech.simulator.handler import SimulatedMachine, TL07Handler
+from gravotech.streamers.transports import Transport
+
+
+class LoopbackConnection:
+    """
+    Socket-like connection handing commands directly to a :class:`TL07Handler`.
+
+    Commands are executed in the calling thread when they are sent, so an
+    exchange costs no system call and no thread switch.
+    """
+
+    def __init__(self, handler: TL07Handler):
+        self.handler = handler
+        self._incoming = b""
+        self._outgoing = bytearray()
+        self._timeout: Optional[float] = None
+        self._closed = False
+        self._cv = threading.Condition()
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self._timeout = timeout
+
+    def gettimeout(self) -> Optional[float]:
+        return self._timeout
+
+    def close(self) -> None:
+        with self._cv:
+            if not self._closed:
+                self._closed = True
+                self.handler.close()
+                self._cv.notify_all()
+
+    def sendall(self, data: bytes) -> None:
+        with self._cv:
+            if self._closed:
+                raise BrokenPipeError("Loopback connection closed")
+            *commands, self._incoming = (self._incoming + bytes(data)).split(b"\r")
+            for cmd in commands:
+                self._push(self.handler.feed(cmd.decode("ascii", "replace")))
+            self._cv.notify_all()
+
+    def recv(self, size: int) -> bytes:
+        with self._cv:
+            if not self._outgoing and not self.wait_readable(self._timeout):
+                raise socket.timeout("timed out")
+            data = bytes(self._outgoing[:size])
+            del self._outgoing[:size]
+            return data
+
+    def wait_readable(self, timeout: Optional[float]) -> bool:
+        """
+        Waits until a response line is available or the connection is closed.
+
+        :param timeout: Maximum time to wait in seconds, None for no limit.
+        :return: True if a read would not block, False on timeout.
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._cv:
+            while True:
+                self._push(self.handler.poll())
+                if self._outgoing or self._closed:
+                    return True
+                now = time.monotonic()
+                if expires is not None and now >= expires:
+                    return False
+                waits = [
+                    t - now for t in (self.handler.next_due(), expires) if t is not None
+                ]
+                self._cv.wait(max(0.0, min(waits)) if waits else None)
+
+    def _push(self, lines: List[str]) -> None:
+        for line in lines:
+            self._outgoing += line.encode("ascii", "replace") + b"\r\n"
+
+
+class LoopbackTransport(Transport):
+    """
+    In-process transport to a simulated machine, with no network involved.
+
+    Each connection gets its own :class:`TL07Handler` session on the shared
+    machine. Useful to measure the client overhead alone and to test
+    applications without sockets::
+
+        transport = LoopbackTransport()
+        client = Gravotech("loopback", 0, transport=transport)
+
+    :param machine: The simulated machine, defaults to a new one.
+    :param require_master: Passed to each session's :class:`TL07Handler`.
+    """
+
+    def __init__(
+        self, machine: Optional[SimulatedMachine] = None, require_master: bool = False
+    ):
+        self.machine = machine or SimulatedMachine()
+        self.require_master = require_master
+
+    def open(self, timeout: Optional[float]) -> LoopbackConnection:
+        return LoopbackConnection(TL07Handler(self.machine, self.require_master))
+
+    def wait_readable(self, conn: LoopbackConnection, timeout: float) -> bool:
+        return conn.wait_readable(timeout)
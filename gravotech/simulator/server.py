@@ -0,0 +1,169 @@
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional, Set, Tuple
+
+from gravotech.simulator.handler import SimulatedMachine, TL07Handler
+
+
+class SimulatedEngraver:
+    """
+    Local TCP endpoint speaking TL07 on top of a :class:`SimulatedMachine`.
+
+    Each accepted connection is served by its own thread and
+    :class:`TL07Handler`, so a master and a monitoring session can be opened
+    as on a real machine. Example::
+
+        with SimulatedEngraver() as engraver:
+            client = Gravotech(*engraver.address)
+
+    :param machine: The simulated machine, defaults to a new one.
+    :param host: Listening address, defaults to "127.0.0.1".
+    :param port: Listening port, defaults to 0 (any free port).
+    :param require_master: Passed to each session's :class:`TL07Handler`.
+    :param path: Listen on this Unix-domain socket path instead of TCP.
+    """
+
+    def __init__(
+        self,
+        machine: Optional[SimulatedMachine] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        require_master: bool = False,
+        path: Optional[str] = None,
+    ):
+        self.machine = machine or SimulatedMachine()
+        self.require_master = require_master
+        self.path = path
+        self.commands = 0
+        self.connections = 0
+        if path is None:
+            self._server = socket.create_server((host, port))
+        else:
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(path)
+            self._server.listen()
+        self._server.settimeout(0.1)
+        self._clients: List[socket.socket] = []
+        self._dropped: Set[socket.socket] = set()
+        self._threads: List[threading.Thread] = []
+        self._mu = threading.Lock()
+        self._closed = threading.Condition(self._mu)
+        self._running = False
+        self._acceptor: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Listening (ip, port), or the socket path with port 0 for Unix sockets."""
+        name = self._server.getsockname()
+        return (name, 0) if isinstance(name, str) else name[:2]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> None:
+        """Starts accepting connections."""
+        self._running = True
+        self._acceptor = threading.Thread(
+            target=self._accept, name="gravotech-simulator", daemon=True
+        )
+        self._acceptor.start()
+
+    def stop(self) -> None:
+        """Closes every session and the listening socket."""
+        self._running = False
+        if self._acceptor is not None:
+            self._acceptor.join()
+        for thread in self._threads:
+            thread.join()
+        self._server.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def drop_connections(self) -> int:
+        """
+        Resets every open session, as a network failure would.
+
+        Connections are aborted with a TCP RST, so clients see a
+        :class:`ConnectionResetError` on their next exchange.
+
+        :return: The number of dropped sessions.
+        """
+        with self._closed:
+            dropped = set(self._clients)
+            self._dropped.update(dropped)
+            self._closed.wait_for(lambda: not dropped & set(self._clients), 1.0)
+            return len(dropped)
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _accept(self) -> None:
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if conn.family != getattr(socket, "AF_UNIX", None):
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._mu:
+                self._clients.append(conn)
+                self.connections += 1
+                self._threads = [t for t in self._threads if t.is_alive()]
+                thread = threading.Thread(
+                    target=self._serve,
+                    args=(conn,),
+                    name="gravotech-simulator-session",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+            thread.start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        handler = TL07Handler(self.machine, self.require_master)
+        buffer = b""
+        try:
+            while self._running:
+                if conn in self._dropped:
+                    conn.setsockopt(
+                        socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                    )
+                    break
+                due = handler.next_due()
+                wait = (
+                    0.1 if due is None else max(0.0, min(0.1, due - time.monotonic()))
+                )
+                readable, _, _ = select.select([conn], [], [], wait)
+                lines = handler.poll()
+                if readable:
+                    data = conn.recv(4096)
+                    if not data:
+                        break
+                    buffer += data
+                    *commands, buffer = buffer.split(b"\r")
+                    for cmd in commands:
+                        self.commands += 1
+                        lines += handler.feed(cmd.decode("ascii", "replace"))
+                if lines:
+                    conn.sendall("".join(line + "\r\n" for line in lines).encode())
+        except (OSError, ValueError) as e:
+            logging.debug("Simulated session ended: %s", e)
+        finally:
+            handler.close()
+            conn.close()
+            with self._mu:
+                if conn in self._clients:
+                    self._clients.remove(conn)
+                self._dropped.discard(conn)
+                self._closed.notify_all()
@@ -0,0 +1,330 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from gravotech.actions.actions import LDMode
+from gravotech.client import Gravotech
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.server import SimulatedEngraver
+from gravotech.streamers.base import Streamer
+from gravotech.utils.templates import ValueTemplate
+
+
+def rss_bytes() -> int:
+    """Resident set size of the process, or its peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    except ImportError:
+        return 0
+
+
+def open_fds() -> int:
+    """Number of open file descriptors, or 0 if it cannot be counted."""
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return 0
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _median(values: List[float]) -> float:
+    return _percentile(values, 0.5)
+
+
+@dataclass
+class SoakSample:
+    """Resource usage and command latencies over one sampling window."""
+
+    elapsed: float
+    rss: int
+    traced: int
+    threads: int
+    fds: int
+    commands: int
+    errors: int
+    reconnects: int
+    p50: float
+    p99: float
+
+
+@dataclass
+class SoakReport:
+    """Result of a soak run: the samples and the detected drifts."""
+
+    samples: List[SoakSample] = field(default_factory=list)
+    failures: List[str] = field(default_factory=list)
+    top_growth: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+
+class SoakHarness:
+    """
+    Drives a client against a :class:`SimulatedEngraver` and watches for drift.
+
+    Three workers run until ``duration`` expires: a poller (ST and VG on the
+    monitoring session), a campaign (LD, VS from a :class:`ValueTemplate`,
+    GO) and an uploader (PF, LS, RM). Every ``disconnect_interval`` seconds the
+    engraver resets its connections so that the streamers go through
+    :meth:`IPStreamer.retry`.
+
+    Every ``sample_interval`` seconds the RSS, the memory traced by
+    :mod:`tracemalloc`, the thread and file descriptor counts and the latency
+    percentiles of the window are sampled. The run fails when the median of the
+    last quarter of samples drifts from the median of the first quarter by
+    more than the given tolerances.
+
+    :param duration: Run time in seconds.
+    :param sample_interval: Sampling period in seconds, defaults to 1.0.
+    :param disconnect_interval: Period of injected disconnections in seconds,
+                                defaults to 10.0, None to disable them.
+    :param marking_time: Simulated marking duration in seconds, defaults to 0.01.
+    :param max_rss_growth: Tolerated RSS growth in bytes, defaults to 32 MiB.
+    :param max_traced_growth: Tolerated traced memory growth in bytes, defaults to 4 MiB.
+    :param max_thread_growth: Tolerated thread count growth, defaults to 2.
+    :param max_fd_growth: Tolerated file descriptor growth, defaults to 4.
+    :param max_latency_ratio: Tolerated p99 latency ratio, defaults to 3.0.
+    :param latency_floor: p99 increase in seconds always tolerated, defaults to 0.005.
+    """
+
+    def __init__(
+        self,
+        duration: float,
+        sample_interval: float = 1.0,
+        disconnect_interval: Optional[float] = 10.0,
+        marking_time: float = 0.01,
+        max_rss_growth: int = 32 << 20,
+        max_traced_growth: int = 4 << 20,
+        max_thread_growth: int = 2,
+        max_fd_growth: int = 4,
+        max_latency_ratio: float = 3.0,
+        latency_floor: float = 0.005,
+    ):
+        self.duration = duration
+        self.sample_interval = sample_interval
+        self.disconnect_interval = disconnect_interval
+        self.marking_time = marking_time
+        self.max_rss_growth = max_rss_growth
+        self.max_traced_growth = max_traced_growth
+        self.max_thread_growth = max_thread_growth
+        self.max_fd_growth = max_fd_growth
+        self.max_latency_ratio = max_latency_ratio
+        self.latency_floor = latency_floor
+        self._latencies: List[float] = []
+        self._commands = 0
+        self._errors = 0
+        self._reconnects = 0
+        self._mu = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self) -> SoakReport:
+        """
+        Runs the soak test.
+
+        :return: The samples, the detected drifts and, on failure, the source
+                 lines with the largest traced memory growth.
+        """
+        report = SoakReport()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        machine = SimulatedMachine(marking_time=self.marking_time)
+        machine.files["soak.t2l"] = b"00"
+        try:
+            with SimulatedEngraver(machine) as engraver:
+                with Gravotech(*engraver.address, monitor_connection=True) as client:
+                    for streamer in (client.Streamer, client.Monitor):
+                        streamer.reconnect_hooks.append(self._count_reconnect)
+                    self._run(client, engraver, report)
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return report
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _run(self, client: Gravotech, engraver: SimulatedEngraver, report: SoakReport):
+        workers = [
+            threading.Thread(target=self._loop, args=args, daemon=True)
+            for args in (
+                (client.Monitor, lambda: [client.Actions.st(), client.Actions.vg(0)]),
+                (client.Streamer, self._campaign(client)),
+                (client.Streamer, self._uploads(client)),
+            )
+        ]
+        self._stop.clear()
+        for worker in workers:
+            worker.start()
+        started = time.monotonic()
+        next_drop = started + (self.disconnect_interval or float("inf"))
+        baseline = None
+        try:
+            while time.monotonic() - started < self.duration:
+                time.sleep(self.sample_interval)
+                now = time.monotonic()
+                if now >= next_drop:
+                    engraver.drop_connections()
+                    next_drop = now + self.disconnect_interval
+                report.samples.append(self._sample(now - started))
+                if baseline is None and len(report.samples) >= 2:
+                    baseline = tracemalloc.take_snapshot()
+        finally:
+            self._stop.set()
+            for worker in workers:
+                worker.join()
+        report.failures = self._drifts(report.samples)
+        if report.failures and baseline is not None:
+            stats = tracemalloc.take_snapshot().compare_to(baseline, "lineno")
+            report.top_growth = [str(stat) for stat in stats[:10]]
+
+    def _campaign(self, client: Gravotech) -> Callable[[], List[str]]:
+        values = ValueTemplate("SOAK-{serial:08d}{luhn}").cursor()
+
+        def step() -> List[str]:
+            return [
+                client.Actions.ld("soak.t2l", 1, LDMode.NORMAL),
+                client.Actions.vs(0, values),
+                client.Actions.go(),
+            ]
+
+        return step
+
+    def _uploads(self, client: Gravotech) -> Callable[[], List[str]]:
+        def step() -> List[str]:
+            return [
+                client.Actions.pf("upload.t2l", os.urandom(256).hex().encode()),
+                client.Actions.ls("*.t2l"),
+                client.Actions.rm("upload.t2l"),
+            ]
+
+        return step
+
+    def _loop(self, streamer: Streamer, step: Callable[[], List[str]]) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                # Disconnections not recovered by write(), e.g. during GO.
+                logging.debug("Soak step failed: %s", e)
+                with self._mu:
+                    self._errors += 1
+                try:
+                    streamer.retry(delay=0.05)
+                except RuntimeError:
+                    time.sleep(0.05)
+                continue
+            with self._mu:
+                self._commands += 1
+                self._latencies.append(time.perf_counter() - started)
+
+    def _count_reconnect(self) -> None:
+        with self._mu:
+            self._reconnects += 1
+
+    def _sample(self, elapsed: float) -> SoakSample:
+        with self._mu:
+            latencies, self._latencies = self._latencies, []
+            commands, errors, reconnects = (
+                self._commands,
+                self._errors,
+                self._reconnects,
+            )
+        return SoakSample(
+            elapsed=elapsed,
+            rss=rss_bytes(),
+            traced=tracemalloc.get_traced_memory()[0],
+            threads=threading.active_count(),
+            fds=open_fds(),
+            commands=commands,
+            errors=errors,
+            reconnects=reconnects,
+            p50=_percentile(latencies, 0.5),
+            p99=_percentile(latencies, 0.99),
+        )
+
+    def _drifts(self, samples: List[SoakSample]) -> List[str]:
+        # The first sample includes the warm-up and is left out.
+        samples = samples[1:]
+        if len(samples) < 2:
+            return []
+        quarter = max(1, len(samples) // 4)
+        head, tail = samples[:quarter], samples[-quarter:]
+        failures = []
+
+        def growth(name: str, limit: float, unit: str = "") -> None:
+            before = _median([getattr(s, name) for s in head])
+            after = _median([getattr(s, name) for s in tail])
+            if after - before > limit:
+                failures.append(f"{name} grew from {before}{unit} to {after}{unit}")
+
+        growth("rss", self.max_rss_growth, " B")
+        growth("traced", self.max_traced_growth, " B")
+        growth("threads", self.max_thread_growth)
+        growth("fds", self.max_fd_growth)
+        before = _median([s.p99 for s in head])
+        after = _median([s.p99 for s in tail])
+        if (
+            after > before * self.max_latency_ratio
+            and after - before > self.latency_floor
+        ):
+            failures.append(f"p99 latency grew from {before:.4f}s to {after:.4f}s")
+        if tail[-1].commands == head[0].commands:
+            failures.append("no command completed during the run")
+        return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: ``python -m gravotech.simulator.soak``."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--sample-interval", type=float, default=5.0)
+    parser.add_argument("--disconnect-interval", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    report = SoakHarness(
+        args.duration,
+        sample_interval=args.sample_interval,
+        disconnect_interval=args.disconnect_interval,
+    ).run()
+    for s in report.samples:
+        print(
+            f"{s.elapsed:8.1f}s rss={s.rss >> 10}KiB traced={s.traced >> 10}KiB "
+            f"threads={s.threads} fds={s.fds} commands={s.commands} "
+            f"errors={s.errors} reconnects={s.reconnects} "
+            f"p50={s.p50 * 1000:.2f}ms p99={s.p99 * 1000:.2f}ms"
+        )
+    for failure in report.failures:
+        print(f"DRIFT: {failure}")
+    for line in report.top_growth:
+        print(f"  {line}")
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+# Timing columns recorded for each cycle, in seconds.
+PHASES = ("ld", "vs", "go_latency", "marking")
+
+# Encoding of the final GO status in the status column.
+STATUS_CODES: Dict[str, int] = {"GO F": 0, "GO P": 1, "GO S": 2}
+STATUS_ERROR = 3
+
+
+def _percentiles(values: Sequence[float], qs: Sequence[float]) -> List[float]:
+    """Linear-interpolated percentiles, matching numpy's default method."""
+    if np is not None:
+        return [float(v) for v in np.percentile(np.asarray(values), qs)]
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    result = []
+    for q in qs:
+        pos = last * q / 100.0
+        low = int(pos)
+        high = min(low + 1, last)
+        result.append(ordered[low] + (ordered[high] - ordered[low]) * (pos - low))
+    return result
+
+
+class CycleStatsStore:
+    """
+    Columnar store of marking cycle timings.
+
+    Each cycle is appended as one row of typed :mod:`array` columns (timestamp,
+    machine, file, LD/VS/GO M/marking durations, final status), with machine
+    and file names interned to integer ids. Rows can be flushed to a SQLite
+    database and reloaded later. Aggregate queries run on whole columns, with
+    numpy when it is installed.
+
+    :param path: Optional SQLite database used by :meth:`flush` and :meth:`load`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.timestamp = array("d")
+        self.machine = array("I")
+        self.file = array("I")
+        self.status = array("B")
+        self.phases: Dict[str, array] = {phase: array("d") for phase in PHASES}
+        self.machines: List[str] = []
+        self.files: List[str] = []
+        self._machine_ids: Dict[str, int] = {}
+        self._file_ids: Dict[str, int] = {}
+        self._flushed = 0
+        self._mu = threading.Lock()
+        # Serializes flushes, so that rows are only marked once committed.
+        self._flush_mu = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @staticmethod
+    def _intern(name: str, names: List[str], ids: Dict[str, int]) -> int:
+        index = ids.get(name)
+        if index is None:
+            index = ids[name] = len(names)
+            names.append(name)
+        return index
+
+    def record(
+        self,
+        machine: str,
+        filename: str,
+        ld: float = 0.0,
+        vs: float = 0.0,
+        go_latency: float = 0.0,
+        marking: float = 0.0,
+        status: str = "GO F",
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Appends one marking cycle.
+
+        :param machine: Machine identifier (e.g., "192.168.0.211:55555").
+        :param filename: The marked file.
+        :param ld: Duration of the LD command in seconds.
+        :param vs: Total duration of the VS commands in seconds.
+        :param go_latency: Time between sending GO and receiving "GO M".
+        :param marking: Time between "GO M" and the final GO status.
+        :param status: The final GO status or error message.
+        :param timestamp: Epoch time of the cycle end, defaults to now.
+        """
+        with self._mu:
+            self.timestamp.append(time.time() if timestamp is None else timestamp)
+            self.machine.append(self._intern(machine, self.machines, self._machine_ids))
+            self.file.append(self._intern(filename, self.files, self._file_ids))
+            self.status.append(STATUS_CODES.get(status, STATUS_ERROR))
+            for phase, value in zip(PHASES, (ld, vs, go_latency, marking)):
+                self.phases[phase].append(value)
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+
+    def _snapshot(self, *columns: array) -> list:
+        """
+        Copies columns under the lock, as numpy arrays when numpy is installed.
+
+        Queries never keep a view on the live columns: an exported buffer
+        would make :meth:`record` fail to append.
+        """
+        with self._mu:
+            if np is not None:
+                return [np.array(column) for column in columns]
+            return [column.tolist() for column in columns]
+
+    def _select(
+        self, phase: str, machine: Optional[str], filename: Optional[str]
+    ) -> Sequence[float]:
+        """Returns a copy of a column restricted to the given machine and/or file."""
+        machine_id = self._machine_ids.get(machine, -1) if machine else None
+        file_id = self._file_ids.get(filename, -1) if filename else None
+        column, machines, files = self._snapshot(
+            self.phases[phase], self.machine, self.file
+        )
+        if machine_id is None and file_id is None:
+            return column
+        if np is not None:
+            mask = np.ones(len(column), dtype=bool)
+            if machine_id is not None:
+                mask &= machines == machine_id
+            if file_id is not None:
+                mask &= files == file_id
+            return column[mask]
+        return [
+            value
+            for value, m, f in zip(column, machines, files)
+            if (machine_id is None or m == machine_id)
+            and (file_id is None or f == file_id)
+        ]
+
+    def count(
+        self, machine: Optional[str] = None, filename: Optional[str] = None
+    ) -> int:
+        """
+        Counts the recorded cycles.
+
+        :param machine: Optional machine filter.
+        :param filename: Optional file filter.
+        """
+        return len(self._select("marking", machine, filename))
+
+    def percentiles(
+        self,
+        phase: str = "marking",
+        qs: Sequence[float] = (50, 90, 99),
+        machine: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> Dict[float, float]:
+        """
+        Computes percentiles of a phase duration.
+
+        :param phase: One of "ld", "vs", "go_latency" or "marking".
+        :param qs: Percentiles to compute, between 0 and 100.
+        :param machine: Optional machine filter.
+        :param filename: Optional file filter.
+        :return: Duration in seconds for each requested percentile, empty if no
+                 cycle matches.
+        """
+        values = self._select(phase, machine, filename)
+        if len(values) == 0:
+            return {}
+        return dict(zip(qs, _percentiles(values, qs)))
+
+    def throughput_per_hour(self, machine: Optional[str] = None) -> Dict[int, int]:
+        """
+        Counts successful cycles ("GO F") per hour.
+
+        :param machine: Optional machine filter.
+        :return: Number of parts keyed by hour start (epoch seconds).
+        """
+        machine_id = self._machine_ids.get(machine, -1) if machine else None
+        timestamps, statuses, machines = self._snapshot(
+            self.timestamp, self.status, self.machine
+        )
+        if np is not None:
+            hours = timestamps // 3600
+            mask = statuses == 0
+            if machine_id is not None:
+                mask &= machines == machine_id
+            keys, counts = np.unique(hours[mask], return_counts=True)
+            return {int(k) * 3600: int(c) for k, c in zip(keys, counts)}
+        result: Dict[int, int] = {}
+        for ts, m, status in zip(timestamps, machines, statuses):
+            if status == 0 and (machine_id is None or m == machine_id):
+                hour = int(ts // 3600) * 3600
+                result[hour] = result.get(hour, 0) + 1
+        return result
+
+    def slowest_files(
+        self, n: int = 10, phase: str = "marking"
+    ) -> List[Tuple[str, float]]:
+        """
+        Ranks files by their mean duration for a phase.
+
+        :param n: Number of files to return.
+        :param phase: The phase to rank by, defaults to "marking".
+        :return: (filename, mean duration) pairs, slowest first.
+        """
+        ids, values = self._snapshot(self.file, self.phases[phase])
+        files = list(self.files)
+        if not files:
+            return []
+        if np is not None:
+            sums = np.bincount(ids, weights=values, minlength=len(files))
+            counts = np.bincount(ids, minlength=len(files))
+            means = sums / np.maximum(counts, 1)
+            order = np.argsort(-means)[:n]
+            return [(files[i], float(means[i])) for i in order if counts[i]]
+        sums = [0.0] * len(files)
+        counts = [0] * len(files)
+        for file_id, value in zip(ids, values):
+            sums[file_id] += value
+            counts[file_id] += 1
+        means = [
+            (files[i], sums[i] / counts[i]) for i in range(len(files)) if counts[i]
+        ]
+        return sorted(means, key=lambda item: item[1], reverse=True)[:n]
+
+    # ========================================================================
+    # PERSISTENCE
+    # ========================================================================
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.path is None:
+            raise RuntimeError("No database path configured")
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cycles (timestamp REAL, machine TEXT, "
+            "filename TEXT, ld REAL, vs REAL, go_latency REAL, marking REAL, "
+            "status INTEGER)"
+        )
+        return conn
+
+    def flush(self) -> int:
+        """
+        Writes the cycles recorded since the last flush to the database.
+
+        Rows are only marked as written once committed: after a failure, the
+        next flush writes them again.
+
+        :return: The number of rows written.
+        :raises RuntimeError: If the store has no database path.
+        """
+        with self._flush_mu:
+            with self._mu:
+                start, end = self._flushed, len(self.timestamp)
+                rows = [
+                    (
+                        self.timestamp[i],
+                        self.machines[self.machine[i]],
+                        self.files[self.file[i]],
+                        *(self.phases[phase][i] for phase in PHASES),
+                        self.status[i],
+                    )
+                    for i in range(start, end)
+                ]
+            if not rows:
+                return 0
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO cycles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+            finally:
+                conn.close()
+            with self._mu:
+                self._flushed = end
+            return len(rows)
+
+    @classmethod
+    def load(cls, path: str) -> "CycleStatsStore":
+        """
+        Builds a store from the cycles saved in a database.
+
+        :param path: The SQLite database written by :meth:`flush`.
+        :return: A store containing every saved cycle.
+        """
+        store = cls(path)
+        conn = store._connect()
+        try:
+            rows = conn.execute(
+                "SELECT timestamp, machine, filename, ld, vs, go_latency, "
+                "marking, status FROM cycles ORDER BY rowid"
+            )
+            for ts, machine, filename, ld, vs, go_latency, marking, status in rows:
+                store.timestamp.append(ts)
+                store.machine.append(
+                    store._intern(machine, store.machines, store._machine_ids)
+                )
+                store.file.append(store._intern(filename, store.files, store._file_ids))
+                store.status.append(status)
+                for phase, value in zip(PHASES, (ld, vs, go_latency, marking)):
+                    store.phases[phase].append(value)
+        finally:
+            conn.close()
+        store._flushed = len(store)
+        return store
@@ -0,0 +1,39 @@
+from typing import Callable, ContextManager, List, Optional, Protocol
+
+
+class Streamer(Protocol):
+    """
+    Interface of a machine session, as used by :class:`GraveuseAction`.
+
+    Implemented by :class:`IPStreamer` over any :class:`Transport` and by the
+    proxies stacked in front of it (:class:`StreamerProxy` subclasses).
+    """
+
+    ip: str
+    port: int
+    timeout: float
+    reconnect_hooks: List[Callable[[], None]]
+
+    def connect(self): ...
+
+    def close(self): ...
+
+    def retry(self, max_attempts: int = 3, delay: float = 1.0) -> bool: ...
+
+    def lock(self, timeout: Optional[float] = None) -> Callable[[], None]: ...
+
+    def transaction(self, timeout: Optional[float] = None) -> ContextManager: ...
+
+    def begin_monitoring(self) -> Callable[[], None]: ...
+
+    def wait_readable(self, timeout: float) -> bool: ...
+
+    def unsafe_write(self, cmd: str) -> None: ...
+
+    def unsafe_read(self, timeout: Optional[float] = None) -> str: ...
+
+    def read(self, timeout: Optional[float] = None) -> str: ...
+
+    def write(self, cmd: str, timeout: Optional[float] = None) -> str: ...
+
+    def write_raw(self, payload: bytes, timeout: Optional[float] = None) -> str: ...
@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from gravotech.streamers.proxy import StreamerProxy
+from gravotech.utils.commands import command_keyword, payload_keyword
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import OVERLOAD_ERRORS, error_code
+
+# Commands that can be sent again without changing the outcome.
+IDEMPOTENT_COMMANDS = {"ST", "GP", "VG", "LS", "VS", "SP"}
+
+# Commands that are never delayed by the rate limit.
+UNTHROTTLED_COMMANDS = {"AM", "AD"}
+
+
+class FlowController(StreamerProxy):
+    """
+    Adaptive rate limiter placed between GraveuseAction and IPStreamer.
+
+    Outgoing commands are paced to :attr:`rate_limit` commands per second. The
+    limit follows an AIMD rule: each successful response raises it by
+    ``increase``, each overload or internal TX/RX error (codes 3.1 to 3.3)
+    multiplies it by ``decrease``. Idempotent commands answered with such an
+    error are sent again after an exponential backoff; other commands return
+    the error response to the caller.
+
+    :param streamer: The wrapped streamer.
+    :param initial_rate: Starting limit in commands per second, defaults to 20.0.
+    :param min_rate: Lowest allowed limit, defaults to 1.0.
+    :param max_rate: Highest allowed limit, defaults to 200.0.
+    :param increase: Additive increase applied on success, defaults to 0.5.
+    :param decrease: Multiplicative factor applied on overload, defaults to 0.5.
+    :param max_retries: Maximum resends of an idempotent command, defaults to 3.
+    :param backoff: Initial backoff delay in seconds, defaults to 0.1.
+    :param max_backoff: Upper bound of the backoff delay, defaults to 2.0.
+    """
+
+    def __init__(
+        self,
+        streamer,
+        initial_rate: float = 20.0,
+        min_rate: float = 1.0,
+        max_rate: float = 200.0,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        max_retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+    ):
+        super().__init__(streamer)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.overloads = 0
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._next_send = 0.0
+        self._flow_mu = threading.Lock()
+
+    @property
+    def rate_limit(self) -> float:
+        """Current limit in commands per second."""
+        return self._rate
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _pace(self, keyword: str) -> None:
+        """Waits for the next send slot allowed by the current rate limit."""
+        if keyword in UNTHROTTLED_COMMANDS:
+            return
+        with self._flow_mu:
+            now = time.monotonic()
+            slot = max(now, self._next_send)
+            self._next_send = slot + 1.0 / self._rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _paced(
+        self,
+        keyword: str,
+        send: Callable[[Optional[float]], str],
+        timeout: Optional[float],
+    ) -> str:
+        """Sends a command once its slot is due, resending it after overloads."""
+        deadline = Deadline.of(timeout)
+        retryable = keyword in IDEMPOTENT_COMMANDS
+        attempt = 0
+        while True:
+            self._pace(keyword)
+            remaining = None if deadline is None else deadline.check("pacing")
+            resp = send(remaining)
+            if error_code(resp) not in OVERLOAD_ERRORS:
+                self._on_success()
+                return resp
+            self._on_overload()
+            if not retryable or attempt >= self.max_retries:
+                return resp
+            delay = min(self.max_backoff, self.backoff * (2**attempt))
+            if deadline is not None and delay >= deadline.remaining():
+                return resp
+            attempt += 1
+            logging.warning(
+                "Machine overloaded (%s), retry %d/%d in %.2fs",
+                resp,
+                attempt,
+                self.max_retries,
+                delay,
+            )
+            time.sleep(delay)
+
+    def _on_success(self) -> None:
+        with self._flow_mu:
+            self._rate = min(self.max_rate, self._rate + self.increase)
+
+    def _on_overload(self) -> None:
+        with self._flow_mu:
+            self.overloads += 1
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            # Pause the whole pipeline for one slot of the new, slower rate.
+            self._next_send = time.monotonic() + 1.0 / self._rate
+
+    # ========================================================================
+    # UNSAFE METHODS
+    # ========================================================================
+
+    def unsafe_write(self, cmd: str) -> None:
+        self._pace(command_keyword(cmd))
+        self.streamer.unsafe_write(cmd)
+
+    # ========================================================================
+    # THREAD-SAFE METHODS
+    # ========================================================================
+
+    def write(self, cmd: str, timeout: Optional[float] = None) -> str:
+        """
+        Sends a command at the allowed rate and returns the response.
+
+        :param cmd: The command string to send.
+        :param timeout: Optional end-to-end time budget, including pacing and
+                        backoff. No retry is attempted if it would not fit.
+        :return: The machine's response, possibly an error if retries are
+                 exhausted or the command is not idempotent.
+        :raises CommandTimeoutError: If the budget is exhausted.
+        """
+        return self._paced(
+            command_keyword(cmd),
+            lambda remaining: self.streamer.write(cmd, timeout=remaining),
+            timeout,
+        )
+
+    def write_raw(self, payload: bytes, timeout: Optional[float] = None) -> str:
+        """
+        Sends a pre-encoded command at the allowed rate, like :meth:`write`.
+
+        :param payload: The encoded command, terminated by <CR>.
+        :param timeout: Optional end-to-end time budget.
+        :return: The machine's response.
+        :raises CommandTimeoutError: If the budget is exhausted.
+        """
+        return self._paced(
+            payload_keyword(payload),
+            lambda remaining: self.streamer.write_raw(payload, timeout=remaining),
+            timeout,
+        )
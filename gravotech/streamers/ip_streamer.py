@@ -1,9 +1,26 @@
 import socket
-import threading
 import time
-from typing import Optional, Callable
+from contextlib import contextmanager
+from typing import Optional, Callable, Iterator, List, Union
 import logging
 
+from gravotech.utils.commands import command_keyword, payload_keyword
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import CommandTimeoutError, error_code
+from gravotech.utils.events import CommandEvent, EventSink
+from gravotech.streamers.transports import Connection, TCPTransport, Transport
+from gravotech.utils.locks import FairRLock
+
+
+def _label(cmd: Union[str, bytes]) -> str:
+    """Command as shown in logs and events; uploads only show their size."""
+    if not isinstance(cmd, str):
+        return f"{payload_keyword(cmd)} <{len(cmd)} bytes>"
+    keyword = command_keyword(cmd)
+    if keyword == "PF":
+        return f"{keyword} <{len(cmd)} bytes>"
+    return cmd.strip()
+
 
 class IPStreamer:
     """
@@ -19,39 +36,59 @@ class IPStreamer:
     :vartype port: int
     :ivar timeout: Socket timeout in seconds for network operations.
     :vartype timeout: float
+    :ivar reconnect_hooks: Callables invoked after each successful reconnection.
+    :vartype reconnect_hooks: List[Callable[[], None]]
+    :ivar event_sink: Optional audit trail receiving one event per :meth:`write`
+                      or :meth:`write_raw`, and per line read by :meth:`unsafe_read`.
+    :vartype event_sink: Optional[EventSink]
+    :ivar transport: Factory of the connections, TCP to ip:port by default.
+    :vartype transport: Transport
     """
 
-    def __init__(self, ip: str, port: int, timeout: float = 5.0):
+    def __init__(
+        self,
+        ip: str,
+        port: int,
+        timeout: float = 5.0,
+        transport: Optional[Transport] = None,
+    ):
         """
         Initialize the IPStreamer and establish a connection.
 
         :param ip: Target machine IP address.
         :param port: Target machine TCP port.
         :param timeout: Network timeout in seconds, defaults to 5.0.
+        :param transport: Optional transport replacing TCP, e.g. a Unix-domain
+                          socket; ip and port then only name the machine in
+                          logs and events.
         :raises RuntimeError: If the initial connection fails.
         """
         self.ip = ip
         self.port = port
         self.timeout = timeout
+        self.transport = transport or TCPTransport(ip, port)
         self.max_attempts = 5
-        self.sock: Optional[socket.socket] = None
-        self.mu = threading.RLock()
-
-    def connect(self):
+        self.sock: Optional[Connection] = None
+        self.mu = FairRLock()
+        self.reconnect_hooks: List[Callable[[], None]] = []
+        self.event_sink: Optional[EventSink] = None
+        # Label and send time of the last command sent by unsafe_write.
+        self._unsafe_cmd = ("", 0.0)
+
+    def connect(self, connect_timeout: float = 10.0):
         """
-        Establishes a TCP connection to the marking machine.
+        Establishes a connection to the marking machine through the transport.
 
-        Configures the socket with an initial connection timeout of 10 seconds
-        before switching to the operational .
+        Configures the socket with an initial connection timeout (10 seconds by
+        default) before switching to the operational timeout.
 
+        :param connect_timeout: Timeout of the TCP handshake in seconds, defaults to 10.0.
         :raises RuntimeError: If the connection to the specified IP/Port fails.
         """
         try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.settimeout(10)
-            self.sock.connect((self.ip, self.port))
+            self.sock = self.transport.open(connect_timeout)
             self.sock.settimeout(self.timeout)
-            logging.info(f"Established connection to {self.ip}:{self.port}")
+            logging.info("Established connection to %s:%s", self.ip, self.port)
         except Exception as e:
             self.close()
             raise RuntimeError(f"Connection to {self.ip}:{self.port} failed") from e
@@ -70,26 +107,44 @@ class IPStreamer:
                     f"Closing connection to {self.ip}:{self.port} failed"
                 )
             self.sock = None
-        logging.info(f"Closing connection to {self.ip}:{self.port}")
-
-    def retry(self, max_attempts: int = 3, delay: float = 1.0) -> bool:
+        logging.info("Closing connection to %s:%s", self.ip, self.port)
+
+    def retry(
+        self,
+        max_attempts: int = 3,
+        delay: float = 1.0,
+        deadline: Optional[Deadline] = None,
+    ) -> bool:
         """
         Attempts to reconnect to the machine using exponential backoff.
 
         :param max_attempts: Maximum number of reconnection attempts, defaults to 3.
         :param delay: Initial delay between attempts in seconds, defaults to 1.0.
+        :param deadline: Optional time budget bounding connections and backoff.
         :return: True if reconnection is successful.
         :raises RuntimeError: If reconnection fails after all attempts.
+        :raises CommandTimeoutError: If the deadline expires first.
         """
         self.close()
         for attempt in range(1, max_attempts + 1):
             try:
-                self.connect()
+                limit = 10.0 if deadline is None else deadline.check("reconnection")
+                self.connect(min(10.0, limit))
+                for hook in self.reconnect_hooks:
+                    hook()
                 return True
+            except CommandTimeoutError:
+                raise
             except Exception as e:
                 if attempt < max_attempts:
-                    logging.error(f"Retrying attempt {attempt}/{max_attempts}: {e}")
+                    logging.error(
+                        "Retrying attempt %d/%d: %s", attempt, max_attempts, e
+                    )
                     wait_time = delay * (2 ** (attempt - 1))
+                    if deadline is not None and wait_time >= deadline.remaining():
+                        raise CommandTimeoutError(
+                            "Time budget exhausted before reconnection"
+                        ) from e
                     time.sleep(wait_time)
                 else:
                     raise RuntimeError(
@@ -97,81 +152,181 @@ class IPStreamer:
                     ) from e
         return False
 
-    def lock(self) -> Callable[[], None]:
+    def lock(self, timeout: Optional[float] = None) -> Callable[[], None]:
         """
         Acquires the communication lock and returns a release function.
 
         Used for manually grouping multiple "unsafe" operations into a single
         atomic transaction.
 
+        :param timeout: Optional maximum wait for the lock in seconds.
         :return: A callable that releases the Reentrant Lock (mu).
         :rtype: Callable[[], None]
+        :raises LockTimeoutError: If the lock is not acquired in time.
         """
-        self.mu.acquire()
+        self.mu.acquire_or_raise(timeout, f"Lock of {self.ip}:{self.port}")
         return lambda: self.mu.release()
 
+    @contextmanager
+    def transaction(self, timeout: Optional[float] = None) -> Iterator["IPStreamer"]:
+        """
+        Groups several "unsafe" operations under the communication lock.
+
+        The lock is granted in arrival order. Example::
+
+            with streamer.transaction(timeout=2.0):
+                streamer.unsafe_write("ST")
+                status = streamer.unsafe_read()
+
+        :param timeout: Optional maximum wait for the lock in seconds.
+        :return: A context manager yielding the streamer.
+        :raises LockTimeoutError: If the lock is not acquired in time, with the
+                                  current holder in the message.
+        """
+        unlock = self.lock(timeout)
+        try:
+            yield self
+        finally:
+            unlock()
+
+    def begin_monitoring(self) -> Callable[[], None]:
+        """
+        Marks the locked session as monitoring a cycle, where only asynchronous
+        lines are expected. Proxies use it to interleave commands; the
+        streamer itself has nothing to do.
+
+        :return: A callable ending the monitoring.
+        """
+        return lambda: None
+
+    def lock_stats(self) -> dict:
+        """
+        Returns diagnostics of the communication lock.
+
+        :return: Current holder, hold time, waiters and wait-time counters.
+        """
+        return self.mu.stats()
+
+    def wait_readable(self, timeout: float) -> bool:
+        """
+        Waits until incoming data is available on the socket.
+
+        :param timeout: Maximum time to wait in seconds.
+        :return: True if a read would not block, False on timeout.
+        :raises RuntimeError: If not connected.
+        """
+        if self.sock is None:
+            raise RuntimeError("Not connected")
+        return self.transport.wait_readable(self.sock, timeout)
+
     # ========================================================================
     # INTERNAL METHODS
     # ========================================================================
 
-    def _read_line(self) -> str:
+    def _read_line(self, deadline: Optional[Deadline] = None) -> str:
         """
         Reads a single line from the socket.
 
         Lines are expected to be terminated by <CR><LF> (or just <LF>).
         The <CR> is stripped and the resulting bytes are decoded as ASCII.
 
+        With a deadline, the whole line must arrive before it expires, so a slow
+        trickle of bytes cannot extend the read indefinitely.
+
+        :param deadline: Optional time budget for the full line.
         :return: The decoded string without trailing terminators.
         :raises RuntimeError: If not connected or the host closes the connection.
+        :raises CommandTimeoutError: If the deadline expires.
         """
         if self.sock is None:
             raise RuntimeError("Not connected")
+        if deadline is not None:
+            previous = self.sock.gettimeout()
         buffer = b""
-        while True:
-            char = self.sock.recv(1)
-            if not char:
-                raise RuntimeError("Connection closed by remote host")
-            if char == b"\n":
-                break
-            if char != b"\r":
-                buffer += char
+        try:
+            while True:
+                if deadline is not None:
+                    self.sock.settimeout(deadline.check("response read"))
+                try:
+                    char = self.sock.recv(1)
+                except socket.timeout:
+                    if deadline is None:
+                        raise
+                    raise CommandTimeoutError(
+                        f"Time budget of {deadline.timeout}s exhausted during response read"
+                    ) from None
+                if not char:
+                    raise RuntimeError("Connection closed by remote host")
+                if char == b"\n":
+                    break
+                if char != b"\r":
+                    buffer += char
+        finally:
+            if deadline is not None and self.sock is not None:
+                self.sock.settimeout(previous)
         return buffer.decode("ascii")
 
-    def _write_cmd(self, cmd: str) -> None:
+    def _write_cmd(self, cmd: str, deadline: Optional[Deadline] = None) -> None:
         """
         Sends a command string to the socket.
 
         Ensures the command ends with a Carriage Return <CR> (code 13).
 
         :param cmd: The text command to send.
+        :param deadline: Optional time budget for the send.
         :raises RuntimeError: If not connected or a network error occurs.
+        :raises CommandTimeoutError: If the deadline expires.
         """
         if not cmd.endswith("\r"):
             cmd += "\r"
+        self._send(cmd.encode("ascii"), deadline)
+
+    def _send(self, payload: bytes, deadline: Optional[Deadline] = None) -> None:
+        """
+        Sends encoded bytes to the socket.
+
+        :param payload: The bytes to send, any bytes-like object.
+        :param deadline: Optional time budget for the send.
+        :raises RuntimeError: If not connected or a network error occurs.
+        :raises CommandTimeoutError: If the deadline expires.
+        """
         if self.sock is None:
             raise RuntimeError("Not connected")
+        if deadline is not None:
+            previous = self.sock.gettimeout()
+            self.sock.settimeout(deadline.check("send"))
         try:
-            self.sock.sendall(cmd.encode("ascii"))
-        except (socket.timeout, ConnectionResetError, BrokenPipeError) as e:
+            self.sock.sendall(payload)
+        except socket.timeout as e:
+            if deadline is not None:
+                raise CommandTimeoutError(
+                    f"Time budget of {deadline.timeout}s exhausted during send"
+                ) from e
             raise RuntimeError("Network error during write") from e
+        except (ConnectionResetError, BrokenPipeError) as e:
+            raise RuntimeError("Network error during write") from e
+        finally:
+            if deadline is not None and self.sock is not None:
+                self.sock.settimeout(previous)
 
-    def _read_ls_response(self) -> str:
+    def _read_ls_response(self, deadline: Optional[Deadline] = None) -> str:
         """
         Parses a multi-line response specific to the LS command.
 
         The LS response starts with the number of files found, followed by each
         filename on a new line.
 
+        :param deadline: Optional time budget for the full listing.
         :return: Newline-separated list of filenames.
         """
-        nb_files_str = self._read_line()
+        nb_files_str = self._read_line(deadline)
         try:
             nb_files = int(nb_files_str)
         except ValueError:
             return nb_files_str
         lines = [nb_files_str]
         for _ in range(nb_files):
-            filename = self._read_line()
+            filename = self._read_line(deadline)
             lines.append(filename)
         return "\n".join(lines)
 
@@ -183,22 +338,32 @@ class IPStreamer:
         """
         Sends a command without acquiring the lock.
 
+        The lines read by :meth:`unsafe_read` are recorded as responses to the
+        last command sent this way, with the latency since it was sent.
+
         :param cmd: The command string.
         """
+        self._unsafe_cmd = (_label(cmd), time.perf_counter())
         self._write_cmd(cmd)
 
     def unsafe_read(self, timeout: Optional[float] = None) -> str:
         """
         Reads a line without acquiring the lock, with an optional temporary timeout.
 
-        :param timeout: Optional temporary socket timeout.
+        :param timeout: Optional temporary socket timeout, also bounding the
+                        time taken by the full line.
         :return: The decoded string.
+        :raises CommandTimeoutError: If the line is not complete in time.
         """
+        label, sent = self._unsafe_cmd
+        return self._audited(label, lambda: self._unsafe_read_line(timeout), sent)
+
+    def _unsafe_read_line(self, timeout: Optional[float]) -> str:
         if timeout is not None:
             old_timeout = self.sock.gettimeout()
             self.sock.settimeout(timeout)
         try:
-            return self._read_line()
+            return self._read_line(Deadline.of(timeout))
         finally:
             if timeout is not None:
                 self.sock.settimeout(old_timeout)
@@ -207,16 +372,41 @@ class IPStreamer:
     # THREAD-SAFE METHODS
     # ========================================================================
 
-    def read(self) -> str:
+    def read(self, timeout: Optional[float] = None) -> str:
         """
         Thread-safe read operation.
 
+        :param timeout: Optional time budget covering the lock wait and the read.
         :return: The decoded string.
+        :raises CommandTimeoutError: If the budget is exhausted.
+        """
+        deadline = Deadline.of(timeout)
+        unlock = self.lock(timeout)
+        try:
+            return self._read_line(deadline)
+        finally:
+            unlock()
+
+    def write_raw(self, payload: bytes, timeout: Optional[float] = None) -> str:
+        """
+        Thread-safe write of a pre-encoded command, with automatic retry.
+
+        Sends the bytes as they are, without copying or encoding them, which
+        lets a large command (e.g., one PF upload to several machines) be
+        encoded once and shared as a :class:`memoryview`. The response must be
+        a single line.
+
+        :param payload: The encoded command, terminated by <CR>.
+        :param timeout: Optional time budget covering the lock wait, the send,
+                        the response and any reconnection.
+        :return: The machine's response.
+        :raises CommandTimeoutError: If the budget is exhausted.
         """
-        with self.mu:
-            return self._read_line()
+        return self._audited(
+            _label(payload), lambda: self._write_locked(payload, timeout)
+        )
 
-    def write(self, cmd: str) -> str:
+    def write(self, cmd: str, timeout: Optional[float] = None) -> str:
         """
         Thread-safe write and read operation with automatic retry on failure.
 
@@ -224,24 +414,95 @@ class IPStreamer:
         response.
 
         :param cmd: The command string to send.
+        :param timeout: Optional time budget covering the lock wait, the send,
+                        the full response and any reconnection.
+        :return: The machine's response.
+        :raises CommandTimeoutError: If the budget is exhausted.
+        """
+        return self._audited(_label(cmd), lambda: self._write_locked(cmd, timeout))
+
+    def _audited(
+        self, label: str, exchange: Callable[[], str], sent: Optional[float] = None
+    ) -> str:
+        """
+        Runs an exchange, logging and recording it if enabled.
+
+        :param label: The command as shown in logs and events.
+        :param exchange: Returns the machine's response.
+        :param sent: :func:`time.perf_counter` time the command was sent,
+                     defaults to now.
+        :return: The machine's response.
+        """
+        sink = self.event_sink
+        if sink is None and not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return exchange()
+        started = time.perf_counter() if sent is None else sent
+        resp = None
+        failure = None
+        try:
+            resp = exchange()
+            return resp
+        except Exception as e:
+            failure = type(e).__name__
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            logging.debug("%s -> %r (%.1f ms)", label, resp, latency * 1000)
+            if sink is not None:
+                code = error_code(resp) if resp is not None else None
+                sink.emit(
+                    CommandEvent(
+                        time.time(),
+                        f"{self.ip}:{self.port}",
+                        label,
+                        resp,
+                        latency,
+                        failure or (".".join(code) if code else None),
+                    )
+                )
+
+    def _write_locked(self, cmd: Union[str, bytes], timeout: Optional[float]) -> str:
+        """
+        Sends a command and reads its response under the communication lock.
+
+        :param cmd: The command string or encoded command to send.
+        :param timeout: Optional end-to-end time budget.
         :return: The machine's response.
         """
-        with self.mu:
+        deadline = Deadline.of(timeout)
+        unlock = self.lock(timeout)
+        try:
             try:
-                return self._write_and_read(cmd)
+                return self._write_and_read(cmd, deadline)
+            except CommandTimeoutError:
+                # A subclass of socket.timeout on Python 3.10+: never retried.
+                raise
             except (socket.timeout, ConnectionResetError, BrokenPipeError) as e:
-                logging.error(f"Network error: {e}, attempting retry...")
-                self.retry()
-                return self._write_and_read(cmd)
+                logging.error("Network error: %s, attempting retry...", e)
+            except RuntimeError as e:
+                # _write_cmd wraps a send on a connection reset by the machine.
+                if not isinstance(e.__cause__, (ConnectionResetError, BrokenPipeError)):
+                    raise
+                logging.error("Network error: %s, attempting retry...", e.__cause__)
+            self.retry(deadline=deadline)
+            return self._write_and_read(cmd, deadline)
+        finally:
+            unlock()
 
-    def _write_and_read(self, cmd: str) -> str:
+    def _write_and_read(
+        self, cmd: Union[str, bytes], deadline: Optional[Deadline] = None
+    ) -> str:
         """
         Internal implementation of a write followed by a read.
 
-        :param cmd: The command string.
+        :param cmd: The command string, or an encoded command answered by one line.
+        :param deadline: Optional time budget for the exchange.
         :return: The machine's response.
         """
-        self._write_cmd(cmd)
+        if not isinstance(cmd, str):
+            self._send(cmd, deadline)
+            return self._read_line(deadline)
+        self._write_cmd(cmd, deadline)
         if cmd.strip().upper().startswith("LS"):
-            return self._read_ls_response()
-        return self._read_line()
+            return self._read_ls_response(deadline)
+        return self._read_line(deadline)
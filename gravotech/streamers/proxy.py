@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class StreamerProxy:
+    """
+    Base class for components that sit in front of an IPStreamer.
+
+    A proxy exposes the same interface as :class:`IPStreamer` so it can be handed
+    to :class:`GraveuseAction` in place of the streamer. Every call is forwarded to
+    the wrapped streamer unless a subclass overrides it, and unknown attributes
+    (``ip``, ``port``, ``timeout``...) are looked up on the wrapped streamer.
+
+    Optional ``timeout`` arguments are end-to-end budgets, passed on as is.
+
+    :ivar streamer: The wrapped streamer (an IPStreamer or another proxy).
+    """
+
+    def __init__(self, streamer):
+        self.streamer = streamer
+
+    def __getattr__(self, name: str):
+        if name == "streamer":
+            raise AttributeError(name)
+        return getattr(self.streamer, name)
+
+    def connect(self):
+        return self.streamer.connect()
+
+    def close(self):
+        return self.streamer.close()
+
+    def retry(self, max_attempts: int = 3, delay: float = 1.0) -> bool:
+        return self.streamer.retry(max_attempts, delay)
+
+    def lock(self, timeout: Optional[float] = None) -> Callable[[], None]:
+        return self.streamer.lock(timeout=timeout)
+
+    @contextmanager
+    def transaction(self, timeout: Optional[float] = None) -> Iterator["StreamerProxy"]:
+        unlock = self.lock(timeout)
+        try:
+            yield self
+        finally:
+            unlock()
+
+    def begin_monitoring(self) -> Callable[[], None]:
+        return self.streamer.begin_monitoring()
+
+    def wait_readable(self, timeout: float) -> bool:
+        return self.streamer.wait_readable(timeout)
+
+    def unsafe_write(self, cmd: str) -> None:
+        self.streamer.unsafe_write(cmd)
+
+    def unsafe_read(self, timeout: Optional[float] = None) -> str:
+        return self.streamer.unsafe_read(timeout)
+
+    def read(self, timeout: Optional[float] = None) -> str:
+        return self.streamer.read(timeout=timeout)
+
+    def write(self, cmd: str, timeout: Optional[float] = None) -> str:
+        return self.streamer.write(cmd, timeout=timeout)
+
+    def write_raw(self, payload: bytes, timeout: Optional[float] = None) -> str:
+        return self.streamer.write_raw(payload, timeout=timeout)
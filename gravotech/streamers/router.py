@@ -0,0 +1,50 @@
+from typing import Optional
+
+from gravotech.streamers.proxy import StreamerProxy
+from gravotech.utils.commands import command_keyword, payload_keyword
+
+# Read-only commands served by the monitoring session. GP is not listed: it
+# reports the role of the session it is sent on, so it must stay on the master.
+MONITOR_COMMANDS = {"ST", "VG", "LS"}
+
+
+class CommandRouter(StreamerProxy):
+    """
+    Splits traffic between a master control session and a slave monitoring session.
+
+    Read-only commands (``ST``, ``VG``, ``LS``) are sent over the monitoring
+    streamer, so they are answered while the control streamer is busy, e.g.
+    blocked in a ``GO`` cycle. Every other command, and locked sessions, use the
+    control streamer.
+
+    :param streamer: The control (master) streamer or proxy chain.
+    :param monitor: The monitoring (slave) streamer or proxy chain.
+    """
+
+    def __init__(self, streamer, monitor):
+        super().__init__(streamer)
+        self.monitor = monitor
+
+    def write(self, cmd: str, timeout: Optional[float] = None) -> str:
+        """
+        Sends a command over the session matching its kind.
+
+        :param cmd: The command string to send.
+        :param timeout: Optional end-to-end time budget.
+        :return: The machine's response.
+        """
+        if command_keyword(cmd) not in MONITOR_COMMANDS:
+            return super().write(cmd, timeout)
+        return self.monitor.write(cmd, timeout=timeout)
+
+    def write_raw(self, payload: bytes, timeout: Optional[float] = None) -> str:
+        """
+        Sends a pre-encoded command over the session matching its kind.
+
+        :param payload: The encoded command, terminated by <CR>.
+        :param timeout: Optional end-to-end time budget.
+        :return: The machine's response.
+        """
+        if payload_keyword(payload) not in MONITOR_COMMANDS:
+            return super().write_raw(payload, timeout)
+        return self.monitor.write_raw(payload, timeout=timeout)
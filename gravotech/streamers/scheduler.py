@@ -0,0 +1,326 @@
+import heapq
+import itertools
+import socket
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Callable, Deque, List, Optional
+
+from gravotech.streamers.proxy import StreamerProxy
+from gravotech.utils.commands import command_keyword, payload_keyword
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import CommandTimeoutError
+from gravotech.utils.locks import FairRLock
+
+
+class Priority(IntEnum):
+    """Scheduling lane of a TL07 command. Lower values are served first."""
+
+    STOP = 0
+    ACKNOWLEDGE = 1
+    NORMAL = 2
+    BULK = 3
+
+
+# Commands routed to a non-default lane. Everything else runs as NORMAL.
+COMMAND_PRIORITIES = {
+    "AM": Priority.STOP,
+    "AD": Priority.ACKNOWLEDGE,
+    "PF": Priority.BULK,
+    "LS": Priority.BULK,
+    "RM": Priority.BULK,
+}
+
+
+def command_priority(cmd: str) -> Priority:
+    """
+    Returns the scheduling lane of a raw TL07 command.
+
+    :param cmd: The command string (e.g., "AM\\r" or 'PF "logo.t2l" ...').
+    :return: The priority associated with the command keyword.
+    """
+    return COMMAND_PRIORITIES.get(command_keyword(cmd), Priority.NORMAL)
+
+
+class _UrgentRequest:
+    """An emergency command waiting to be interleaved into a locked session."""
+
+    def __init__(self, priority: Priority, seq: int, cmd: str):
+        self.priority = priority
+        self.seq = seq
+        self.cmd = cmd
+        self.response: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+
+    def __lt__(self, other: "_UrgentRequest") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommandScheduler(StreamerProxy):
+    """
+    Prioritized command scheduler placed in front of an IPStreamer.
+
+    Commands are dispatched through priority lanes (see :class:`Priority`):
+    ``AM`` first, then ``AD``, then regular traffic, and finally bulk transfers
+    (``PF``, ``LS``, ``RM``). When several threads wait for the connection, the
+    best lane is always served next.
+
+    Emergency commands (``AM``/``AD``) do not wait for a session that is
+    monitoring a cycle (see :meth:`begin_monitoring`), where no reply is
+    outstanding: they are queued and the thread holding the session sends them
+    between two reads. Lines starting with ``GO`` received meanwhile are kept
+    for the monitor; the response is the first line starting with the command
+    keyword or ``ER``. Other locked sessions, such as transactions, are never
+    interrupted: emergency commands are served right after them.
+
+    :param streamer: The wrapped streamer.
+    :param poll_interval: Period in seconds at which a locked session checks for
+                          pending emergency commands, defaults to 0.05.
+    """
+
+    def __init__(self, streamer, poll_interval: float = 0.05):
+        super().__init__(streamer)
+        self.poll_interval = poll_interval
+        # Lanes are the priorities of a fair lock.
+        self._gate = FairRLock()
+        self._cv = threading.Condition()
+        self._seq = itertools.count()
+        self._urgent: List[_UrgentRequest] = []
+        self._stashed: Deque[str] = deque()
+        self._session: Optional[int] = None
+        self._session_depth = 0
+        self._monitoring = False
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _submit_urgent(
+        self, cmd: str, priority: Priority, deadline: Optional[Deadline]
+    ) -> Optional[str]:
+        """
+        Hands an emergency command over to the thread holding the session.
+
+        :return: The machine's response, or None if no session is active and
+                 the command must be sent through the regular lanes.
+        :raises CommandTimeoutError: If the deadline expires before the command
+                                     is sent.
+        """
+        with self._cv:
+            if self._session is None or self._session == threading.get_ident():
+                return None
+            request = _UrgentRequest(priority, next(self._seq), cmd)
+            heapq.heappush(self._urgent, request)
+            while not request.done:
+                if self._session is None:
+                    self._urgent.remove(request)
+                    heapq.heapify(self._urgent)
+                    return None
+                if deadline is None:
+                    self._cv.wait()
+                    continue
+                if deadline.expired() and request in self._urgent:
+                    self._urgent.remove(request)
+                    heapq.heapify(self._urgent)
+                    deadline.check("emergency queue wait")
+                self._cv.wait(deadline.remaining() or self.poll_interval)
+        if request.error is not None:
+            raise request.error
+        return request.response
+
+    def _queued(
+        self,
+        label: str,
+        priority: Priority,
+        deadline: Optional[Deadline],
+        send: Callable[[Optional[float]], str],
+    ) -> str:
+        """Waits for the lane of a command, then sends it with the remaining budget."""
+        remaining = None if deadline is None else deadline.check("queue wait")
+        if not self._gate.acquire(timeout=remaining, priority=priority):
+            raise CommandTimeoutError(
+                f"Command {label!r} not sent within {deadline.timeout}s"
+            )
+        try:
+            return send(None if deadline is None else deadline.check("queue wait"))
+        finally:
+            self._gate.release()
+
+    def _service_urgent(self) -> None:
+        """Sends pending emergency commands from the session-holding thread."""
+        while True:
+            with self._cv:
+                if not self._urgent:
+                    return
+                request = heapq.heappop(self._urgent)
+            keyword = command_keyword(request.cmd)
+            try:
+                self.streamer.unsafe_write(request.cmd)
+                while True:
+                    line = self.streamer.unsafe_read()
+                    if command_keyword(line) in (keyword, "ER"):
+                        request.response = line
+                        break
+                    self._stashed.append(line)
+            except Exception as e:
+                request.error = e
+            with self._cv:
+                request.done = True
+                self._cv.notify_all()
+
+    # ========================================================================
+    # UNSAFE METHODS
+    # ========================================================================
+
+    def unsafe_read(self, timeout: Optional[float] = None) -> str:
+        """
+        Reads a line while servicing pending emergency commands.
+
+        Without an explicit timeout, the streamer's own timeout bounds how long
+        the connection may stay silent.
+
+        :param timeout: Optional maximum wait in seconds.
+        :return: The decoded string.
+        :raises socket.timeout: If no line arrives in time.
+        """
+        limit = timeout if timeout is not None else getattr(self, "timeout", None)
+        deadline = None if limit is None else time.monotonic() + limit
+        while True:
+            if self._monitoring:
+                self._service_urgent()
+            if self._stashed:
+                return self._stashed.popleft()
+            wait = self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout("timed out")
+                wait = min(wait, remaining)
+            if self.streamer.wait_readable(wait):
+                remaining = None
+                if timeout is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise socket.timeout("timed out")
+                return self.streamer.unsafe_read(timeout=remaining)
+
+    # ========================================================================
+    # THREAD-SAFE METHODS
+    # ========================================================================
+
+    def lock(self, timeout: Optional[float] = None) -> Callable[[], None]:
+        """
+        Opens a locked session at NORMAL priority.
+
+        While the session is held, emergency commands from other threads are
+        interleaved by :meth:`unsafe_read`.
+
+        :param timeout: Optional maximum wait for the session in seconds.
+        :return: A callable that closes the session.
+        :raises CommandTimeoutError: If the session is not opened in time.
+        """
+        deadline = Deadline.of(timeout)
+        if not self._gate.acquire(timeout=timeout, priority=Priority.NORMAL):
+            raise CommandTimeoutError(f"Session not opened within {timeout}s")
+        try:
+            unlock = super().lock(
+                None if deadline is None else deadline.check("lock wait")
+            )
+        except BaseException:
+            self._gate.release()
+            raise
+        with self._cv:
+            self._session = threading.get_ident()
+            self._session_depth += 1
+
+        def release() -> None:
+            with self._cv:
+                self._session_depth -= 1
+                if self._session_depth == 0:
+                    self._session = None
+                    self._monitoring = False
+                    self._stashed.clear()
+                    self._cv.notify_all()
+            unlock()
+            self._gate.release()
+
+        return release
+
+    def begin_monitoring(self) -> Callable[[], None]:
+        """
+        Marks the locked session as monitoring a cycle until the returned
+        function is called.
+
+        While monitoring, no reply is outstanding: only asynchronous ``GO``
+        lines are expected, so :meth:`unsafe_read` sends the emergency commands
+        of other threads in between.
+
+        :return: A callable ending the monitoring.
+        """
+        with self._cv:
+            self._monitoring = True
+
+        def end() -> None:
+            with self._cv:
+                self._monitoring = False
+
+        return end
+
+    def write(
+        self,
+        cmd: str,
+        timeout: Optional[float] = None,
+        priority: Optional[Priority] = None,
+    ) -> str:
+        """
+        Sends a command through its priority lane and returns the response.
+
+        :param cmd: The command string to send.
+        :param timeout: Optional end-to-end time budget, including queueing.
+        :param priority: Lane override, defaults to :func:`command_priority`.
+        :return: The machine's response.
+        :raises CommandTimeoutError: If the budget is exhausted.
+        """
+        if priority is None:
+            priority = command_priority(cmd)
+        deadline = Deadline.of(timeout)
+        if priority <= Priority.ACKNOWLEDGE:
+            resp = self._submit_urgent(cmd, priority, deadline)
+            if resp is not None:
+                return resp
+        return self._queued(
+            cmd.strip(),
+            priority,
+            deadline,
+            lambda remaining: self.streamer.write(cmd, timeout=remaining),
+        )
+
+    def write_raw(
+        self,
+        payload: bytes,
+        timeout: Optional[float] = None,
+        priority: Optional[Priority] = None,
+    ) -> str:
+        """
+        Sends a pre-encoded command through its priority lane.
+
+        Unlike :meth:`write`, emergency commands sent this way wait for the
+        session like any other command.
+
+        :param payload: The encoded command, terminated by <CR>.
+        :param timeout: Optional end-to-end time budget, including queueing.
+        :param priority: Lane override, defaults to the lane of its keyword.
+        :return: The machine's response.
+        :raises CommandTimeoutError: If the budget is exhausted.
+        """
+        keyword = payload_keyword(payload)
+        if priority is None:
+            priority = command_priority(keyword)
+        return self._queued(
+            f"{keyword} <{len(payload)} bytes>",
+            priority,
+            Deadline.of(timeout),
+            lambda remaining: self.streamer.write_raw(payload, timeout=remaining),
+        )
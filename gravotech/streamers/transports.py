@@ -0,0 +1,96 @@
+import abc
+import select
+import socket
+from typing import Optional, Protocol
+
+
+class Connection(Protocol):
+    """
+    Subset of the :class:`socket.socket` API used by :class:`IPStreamer`.
+    """
+
+    def sendall(self, data: bytes) -> None: ...
+
+    def recv(self, size: int) -> bytes: ...
+
+    def settimeout(self, timeout: Optional[float]) -> None: ...
+
+    def gettimeout(self) -> Optional[float]: ...
+
+    def close(self) -> None: ...
+
+
+class Transport(abc.ABC):
+    """
+    Factory of the byte-stream connections used by :class:`IPStreamer`.
+
+    Connections provide the :class:`Connection` subset of the socket API.
+    :meth:`open` is called on every connection and reconnection.
+    """
+
+    @abc.abstractmethod
+    def open(self, timeout: Optional[float]) -> Connection:
+        """
+        Opens a new connection.
+
+        :param timeout: Timeout of the connection setup in seconds.
+        :return: A connected, socket-like object.
+        :raises OSError: If the connection fails.
+        """
+
+    def wait_readable(self, conn: Connection, timeout: float) -> bool:
+        """
+        Waits until data is available on a connection.
+
+        :param conn: A connection returned by :meth:`open`.
+        :param timeout: Maximum time to wait in seconds.
+        :return: True if a read would not block, False on timeout.
+        """
+        readable, _, _ = select.select([conn], [], [], timeout)
+        return bool(readable)
+
+
+class TCPTransport(Transport):
+    """
+    TCP connection to a machine, the default transport.
+
+    :param host: Machine IP address or host name.
+    :param port: Machine TCP port.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    def open(self, timeout: Optional[float]) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect((self.host, self.port))
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+
+class UnixTransport(Transport):
+    """
+    Unix-domain socket connection, e.g. to a gateway running on the same host.
+
+    :param path: Filesystem path of the socket.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def open(self, timeout: Optional[float]) -> socket.socket:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix-domain sockets are not supported on this platform")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(self.path)
+        except Exception:
+            sock.close()
+            raise
+        return sock
@@ -0,0 +1,43 @@
+def command_keyword(cmd: str) -> str:
+    """
+    Extracts the TL07 command keyword from a raw command string.
+
+    :param cmd: The command string (e.g., 'LD "file.t2l" 1 N\\r').
+    :return: The upper-cased keyword (e.g., "LD"), or an empty string.
+    """
+    return cmd.strip().split(" ", 1)[0].upper()
+
+
+def payload_keyword(payload: bytes) -> str:
+    """
+    Extracts the TL07 command keyword from an encoded command.
+
+    :param payload: The encoded command (e.g., b'PF "file.t2l" 0A0B\\r').
+    :return: The upper-cased keyword (e.g., "PF"), or an empty string.
+    """
+    return command_keyword(bytes(payload[:4]).decode("ascii", "replace"))
+
+
+def pf_payload(filename: str, data: bytes) -> bytes:
+    """
+    Encodes the PF command uploading a file, as sent by :meth:`GraveuseAction.pf`.
+
+    The content is sent as is, after the quoted filename.
+
+    :param filename: Target filename on the machine.
+    :param data: The file content, as ASCII hexadecimal digits.
+    :return: The encoded command, terminated by <CR>.
+    """
+    return b'PF "%s" %s\r' % (filename.encode("ascii"), data)
+
+
+def pf_command(filename: str, data: bytes) -> str:
+    """
+    Builds the PF command uploading a file, as sent by :meth:`GraveuseAction.pf`.
+
+    :param filename: Target filename on the machine.
+    :param data: The file content, as ASCII hexadecimal digits.
+    :return: The command string, terminated by <CR>.
+    :raises UnicodeDecodeError: If the content is not ASCII.
+    """
+    return pf_payload(filename, data).decode("ascii")
@@ -0,0 +1,42 @@
+import time
+from typing import Optional
+
+from gravotech.utils.errors import CommandTimeoutError
+
+
+class Deadline:
+    """
+    End-to-end time budget shared by every step of a command.
+
+    :param timeout: Budget in seconds from now.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires = time.monotonic() + timeout
+
+    @classmethod
+    def of(cls, timeout: Optional[float]) -> Optional["Deadline"]:
+        """Returns a deadline for the given budget, or None if unbounded."""
+        return None if timeout is None else cls(timeout)
+
+    def remaining(self) -> float:
+        """Seconds left before expiry, never negative."""
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def check(self, step: str) -> float:
+        """
+        Returns the remaining time, or raises if the budget is exhausted.
+
+        :param step: Description of the step being started, used in the error.
+        :raises CommandTimeoutError: If the deadline has passed.
+        """
+        remaining = self.expires - time.monotonic()
+        if remaining <= 0:
+            raise CommandTimeoutError(
+                f"Time budget of {self.timeout}s exhausted during {step}"
+            )
+        return remaining
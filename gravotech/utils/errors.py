@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 # Dictionary mapping error type codes to their human-readable category names.
 # Based on the Gravotech summary table of error codes
@@ -49,6 +49,32 @@ ERROR_DETAILS: Dict[str, Dict[str, str]] = {
 }
 
 
+# (type, detail) codes meaning the machine cannot keep up with the command rate:
+# overloaded, internal TX error and internal RX error.
+OVERLOAD_ERRORS = {("3", "1"), ("3", "2"), ("3", "3")}
+
+# (type, detail) code of a control command sent by a session that is not master.
+MASTER_REQUIRED = ("4", "1")
+
+
+def error_code(resp: str) -> Optional[Tuple[str, str]]:
+    """
+    Extracts the type and detail codes of an error response.
+
+    :param resp: The raw response string from the machine (e.g., "ER 3 1").
+    :type resp: str
+    :return: The (type, detail) pair, or None if the response is not a
+             well-formed error.
+    :rtype: Optional[Tuple[str, str]]
+    """
+    if not resp.startswith("ER"):
+        return None
+    parts = resp.split()
+    if len(parts) < 3:
+        return None
+    return parts[1], parts[2]
+
+
 def check_err(resp: str) -> str:
     """
     Parses and decodes a raw error response from the Gravotech machine.
@@ -96,3 +122,74 @@ def check_err(resp: str) -> str:
     # Format: Type Description: Detail Description (code: type.detail)
     error_message = f"{type_err_str}: {msg} (code: {type_err}.{detail_err})"
     return error_message
+
+
+class CommandTimeoutError(TimeoutError):
+    """
+    Raised when a command does not complete within its time budget.
+
+    The budget covers waiting for the communication lock, sending the command,
+    reading the full response and any reconnection attempt.
+    """
+
+
+class LockTimeoutError(CommandTimeoutError):
+    """
+    Raised when the communication lock cannot be acquired in time.
+
+    The message names the thread holding the lock and for how long, so that
+    contention and deadlocks can be diagnosed.
+    """
+
+
+class TL07Error(ValueError):
+    """
+    A TL07 error, detected by the machine or before sending a command.
+
+    The message is the one returned by :func:`check_err` for the same code.
+
+    :param error_type: The error type code (e.g., "1").
+    :param detail: The error detail code (e.g., "7").
+    :ivar code: The (type, detail) pair.
+    """
+
+    def __init__(self, error_type: str, detail: str):
+        self.code = (error_type, detail)
+        super().__init__(check_err(f"ER {error_type} {detail}"))
+
+
+class TL07SyntaxError(TL07Error):
+    """Error of type 1: malformed command or parameter."""
+
+
+class TL07ContextError(TL07Error):
+    """Error of type 2: the machine is not in a state accepting the command."""
+
+
+class TL07ProcessingError(TL07Error):
+    """Error of type 3: the machine could not execute the command."""
+
+
+class TL07AuthorizationError(TL07Error):
+    """Error of type 4: the command is reserved to the master session."""
+
+
+# Exception class of each error type.
+ERROR_CLASSES: Dict[str, type] = {
+    "1": TL07SyntaxError,
+    "2": TL07ContextError,
+    "3": TL07ProcessingError,
+    "4": TL07AuthorizationError,
+}
+
+
+def tl07_error(error_type: str, detail: str) -> TL07Error:
+    """
+    Builds the typed exception of an error code.
+
+    :param error_type: The error type code.
+    :param detail: The error detail code.
+    :return: An instance of the matching :class:`TL07Error` subclass.
+    :raises ValueError: If the code is unknown.
+    """
+    return ERROR_CLASSES.get(error_type, TL07Error)(error_type, detail)
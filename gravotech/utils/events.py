@@ -0,0 +1,135 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+# Backends supported by EventSink.
+BACKENDS = ("jsonl", "sqlite")
+
+
+class CommandEvent(NamedTuple):
+    """One command exchange with a machine."""
+
+    timestamp: float
+    machine: str
+    command: str
+    response: Optional[str]
+    latency: float
+    error: Optional[str]
+
+
+class EventSink:
+    """
+    Asynchronous, batched audit trail of command events.
+
+    :meth:`emit` only pushes the event on a :class:`queue.SimpleQueue`, so the
+    cost on the command path is a few microseconds. A background thread drains
+    the queue and appends events in batches to a JSON Lines file or a SQLite
+    table, whenever ``batch_size`` events are pending or ``flush_interval``
+    seconds have passed.
+
+    :param path: Destination file.
+    :param backend: "jsonl" or "sqlite", defaults to "jsonl".
+    :param batch_size: Maximum number of events per write, defaults to 512.
+    :param flush_interval: Maximum delay in seconds before pending events are
+                           written, defaults to 1.0.
+    :raises ValueError: If the backend is unknown.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        backend: str = "jsonl",
+        batch_size: int = 512,
+        flush_interval: float = 1.0,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown event backend: {backend}")
+        self.path = path
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.SimpleQueue[Optional[CommandEvent]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="gravotech-event-sink", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def emit(self, event: CommandEvent) -> None:
+        """
+        Queues an event for writing.
+
+        :param event: The event to record.
+        """
+        self._queue.put(event)
+
+    def close(self) -> None:
+        """Writes every queued event and stops the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # ========================================================================
+    # INTERNAL METHODS
+    # ========================================================================
+
+    def _run(self) -> None:
+        conn = None
+        if self.backend == "sqlite":
+            conn = sqlite3.connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events (timestamp REAL, machine TEXT, "
+                "command TEXT, response TEXT, latency REAL, error TEXT)"
+            )
+        try:
+            running = True
+            while running:
+                batch: List[CommandEvent] = []
+                flush_at = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        event = self._queue.get(
+                            timeout=max(0.0, flush_at - time.monotonic())
+                        )
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        running = False
+                        break
+                    batch.append(event)
+                if batch:
+                    self._write(batch, conn)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write(self, batch: List[CommandEvent], conn: Optional[sqlite3.Connection]):
+        try:
+            if conn is not None:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)", batch
+                    )
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(
+                    "".join(
+                        json.dumps(event._asdict(), separators=(",", ":")) + "\n"
+                        for event in batch
+                    )
+                )
+        except Exception as e:
+            self.dropped += len(batch)
+            logging.error(
+                "Unable to write %d events to %s: %s", len(batch), self.path, e
+            )
@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from gravotech.utils.errors import LockTimeoutError
+
+
+class FairRLock:
+    """
+    Reentrant lock granting ownership in arrival order.
+
+    Unlike :class:`threading.RLock`, a thread that releases the lock cannot take
+    it back before the threads already waiting for it, so a busy polling loop
+    cannot starve another thread. Waiters may pass a priority: lower values are
+    served first, and equal priorities in arrival order. The lock also keeps
+    diagnostics: the current holder, and the number of acquisitions and wait
+    times.
+
+    It implements the ``acquire``/``release`` and context manager protocol of
+    :class:`threading.RLock`.
+    """
+
+    def __init__(self):
+        self._cv = threading.Condition(threading.Lock())
+        # Waiting tickets: (priority, arrival number), smallest served first.
+        self._queue: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._owner: Optional[int] = None
+        self._owner_name: Optional[str] = None
+        self._held_since = 0.0
+        self._depth = 0
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def acquire(
+        self, blocking: bool = True, timeout: float = -1, priority: int = 0
+    ) -> bool:
+        """
+        Acquires the lock, waiting behind earlier requesters of the same or a
+        better priority.
+
+        :param blocking: Wait for the lock if it is held, defaults to True.
+        :param timeout: Maximum wait in seconds, -1 for no limit.
+        :param priority: Rank of the request, lower first, defaults to 0.
+        :return: True if the lock was acquired.
+        """
+        me = threading.get_ident()
+        with self._cv:
+            if self._owner == me:
+                self._depth += 1
+                return True
+            if self._owner is None and not self._queue:
+                self._grant(me, 0.0)
+                return True
+            if not blocking:
+                return False
+            started = time.monotonic()
+            expires = None if timeout is None or timeout < 0 else started + timeout
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            while self._owner is not None or self._queue[0] != ticket:
+                remaining = None if expires is None else expires - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._cv.notify_all()
+                    return False
+                self._cv.wait(remaining)
+            heapq.heappop(self._queue)
+            self._grant(me, time.monotonic() - started)
+            return True
+
+    def release(self) -> None:
+        """
+        Releases one level of ownership.
+
+        :raises RuntimeError: If the calling thread does not hold the lock.
+        """
+        with self._cv:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("cannot release un-acquired lock")
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._owner_name = None
+                self._cv.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _grant(self, me: int, waited: float) -> None:
+        self._owner = me
+        self._owner_name = threading.current_thread().name
+        self._held_since = time.monotonic()
+        self._depth = 1
+        self.acquisitions += 1
+        self.last_wait = waited
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def acquire_or_raise(self, timeout: Optional[float], what: str) -> None:
+        """
+        Acquires the lock or raises a diagnostic error after ``timeout`` seconds.
+
+        :param timeout: Maximum wait in seconds, None for no limit.
+        :param what: Description of the protected resource, used in the error.
+        :raises LockTimeoutError: If the lock is not acquired in time.
+        """
+        if self.acquire(timeout=-1 if timeout is None else timeout):
+            return
+        stats = self.stats()
+        raise LockTimeoutError(
+            f"{what} not acquired within {timeout}s: held by {stats['holder']} "
+            f"for {stats['held_for']:.3f}s, {stats['waiters']} other waiter(s)"
+        )
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns lock diagnostics.
+
+        :return: The holder thread name, how long it has held the lock, the
+                 number of waiters, and acquisition/wait-time counters.
+        """
+        with self._cv:
+            held_for = time.monotonic() - self._held_since if self._owner else 0.0
+            return {
+                "holder": self._owner_name,
+                "held_for": held_for,
+                "waiters": len(self._queue),
+                "acquisitions": self.acquisitions,
+                "last_wait": self.last_wait,
+                "max_wait": self.max_wait,
+                "mean_wait": self.total_wait / max(self.acquisitions, 1),
+            }
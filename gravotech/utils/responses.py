@@ -0,0 +1,57 @@
+from enum import IntEnum
+from typing import List, NamedTuple, Optional
+
+
+class MachineState(IntEnum):
+    """Machine state reported by the ST command."""
+
+    INITIALIZATION = 1
+    ALIVE = 2
+    READY = 4
+    MARKING = 8
+    PAUSE = 16
+    FAULT = 32
+
+
+class MachineStatus(NamedTuple):
+    """Decoded ST response."""
+
+    state: int
+    rearm: int
+    markmode: int
+
+
+def parse_status(resp: str) -> Optional[MachineStatus]:
+    """
+    Decodes an ST response.
+
+    :param resp: The raw response string (e.g., "ST 4 0 1").
+    :type resp: str
+    :return: The decoded status, or None if the response is not a valid ST line.
+    :rtype: Optional[MachineStatus]
+    """
+    parts = resp.split()
+    if len(parts) != 4 or parts[0] != "ST":
+        return None
+    try:
+        return MachineStatus(int(parts[1]), int(parts[2]), int(parts[3]))
+    except ValueError:
+        return None
+
+
+def parse_file_list(resp: str) -> List[str]:
+    """
+    Decodes an LS response into a list of filenames.
+
+    :param resp: The raw response, the number of files followed by one
+                 filename per line.
+    :type resp: str
+    :return: The filenames, or an empty list if the response is not a listing.
+    :rtype: List[str]
+    """
+    lines = resp.split("\n")
+    try:
+        nb_files = int(lines[0])
+    except ValueError:
+        return []
+    return [line.strip() for line in lines[1 : nb_files + 1]]
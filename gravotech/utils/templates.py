@@ -0,0 +1,169 @@
+import datetime
+import string
+import threading
+from typing import Callable, Iterator, List, Optional
+
+# Fields computed for each value. Any other field is a constant given at compile time.
+SERIAL_FIELD = "serial"
+LUHN_FIELD = "luhn"
+DATE_FIELD = "date"
+
+
+def luhn_digit(text: str) -> str:
+    """
+    Computes the Luhn check digit of the digits contained in a text.
+
+    :param text: The text to protect; non-digit characters are ignored.
+    :return: The check digit to append.
+    """
+    total = 0
+    for i, char in enumerate(reversed([c for c in text if c.isdigit()])):
+        digit = int(char)
+        if i % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return str((10 - total % 10) % 10)
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+class ValueTemplate:
+    """
+    Compiled template generating variable values for a marking campaign.
+
+    The template uses :meth:`str.format` syntax with the following fields:
+
+    - ``{serial}`` (required), the part serial, with an optional format spec
+      such as ``{serial:06d}``. The value at offset ``n`` uses serial
+      ``start + n * step``, so values are unique and any offset can be
+      generated directly.
+    - ``{luhn}``, the Luhn check digit of the digits rendered before it.
+    - ``{date}``, the campaign date, with an optional strftime spec such as
+      ``{date:%y%j}``.
+    - any other ``{name}``, a constant passed as keyword argument.
+
+    Constants and the date are resolved once at compile time.
+
+    :param template: The template text (e.g., "{lot}-{serial:06d}{luhn}").
+    :param start: Serial of offset 0, defaults to 0.
+    :param step: Serial increment between two offsets, defaults to 1.
+    :param date: Date used by ``{date}``, defaults to today.
+    :param fields: Values of the constant fields.
+    :raises ValueError: If the template has no serial field, the step is 0, or
+                        a constant field is missing.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        start: int = 0,
+        step: int = 1,
+        date: Optional[datetime.date] = None,
+        **fields,
+    ):
+        if step == 0:
+            raise ValueError("step must not be 0, values would not be unique")
+        self.template = template
+        self.start = start
+        self.step = step
+        date = date or datetime.date.today()
+        # Format strings of the parts separated by {luhn} fields.
+        chunks: List[str] = [""]
+        has_serial = False
+        for literal, name, spec, conversion in string.Formatter().parse(template):
+            chunks[-1] += _escape(literal)
+            if name is None:
+                continue
+            if name == SERIAL_FIELD:
+                has_serial = True
+                chunks[-1] += "{0" + (f":{spec}" if spec else "") + "}"
+            elif name == LUHN_FIELD:
+                chunks.append("")
+            elif name == DATE_FIELD:
+                chunks[-1] += _escape(date.strftime(spec or "%Y%m%d"))
+            elif name in fields:
+                value = fields[name]
+                if conversion:
+                    value = {"r": repr, "s": str, "a": ascii}[conversion](value)
+                chunks[-1] += _escape(format(value, spec))
+            else:
+                raise ValueError(f"missing value for template field {name!r}")
+        if not has_serial:
+            raise ValueError("template must contain {serial} to generate unique values")
+        self._formats: List[Callable[[int], str]] = [c.format for c in chunks]
+
+    def value(self, offset: int) -> str:
+        """
+        Returns the value at a given offset.
+
+        :param offset: Position in the campaign, starting at 0.
+        :return: The generated text.
+        """
+        serial = self.start + offset * self.step
+        formats = self._formats
+        text = formats[0](serial)
+        for fmt in formats[1:]:
+            text += luhn_digit(text) + fmt(serial)
+        return text
+
+    def generate(self, offset: int, count: int) -> List[str]:
+        """
+        Returns a chunk of consecutive values.
+
+        :param offset: Offset of the first value.
+        :param count: Number of values.
+        :return: The generated texts.
+        """
+        serials = range(
+            self.start + offset * self.step,
+            self.start + (offset + count) * self.step,
+            self.step,
+        )
+        if len(self._formats) == 1:
+            fmt = self._formats[0]
+            return [fmt(serial) for serial in serials]
+        return [self.value(offset + i) for i in range(count)]
+
+    def cursor(self, offset: int = 0, chunk_size: int = 256) -> "ValueCursor":
+        """
+        Returns a resumable iterator over the values.
+
+        :param offset: Offset of the first value, e.g. the journal's next record.
+        :param chunk_size: Number of values generated at a time.
+        """
+        return ValueCursor(self, offset, chunk_size)
+
+
+class ValueCursor:
+    """
+    Thread-safe iterator over the values of a :class:`ValueTemplate`.
+
+    Values are generated in chunks. :attr:`offset` is the offset of the next
+    value to be returned, which can be persisted to resume the campaign later.
+    A cursor can be passed directly as the text of :meth:`GraveuseAction.vs`.
+    """
+
+    def __init__(self, template: ValueTemplate, offset: int = 0, chunk_size: int = 256):
+        self.template = template
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self._chunk: List[str] = []
+        self._chunk_offset = offset
+        self._mu = threading.Lock()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        with self._mu:
+            index = self.offset - self._chunk_offset
+            if not 0 <= index < len(self._chunk):
+                self._chunk = self.template.generate(self.offset, self.chunk_size)
+                self._chunk_offset = self.offset
+                index = 0
+            self.offset += 1
+            return self._chunk[index]
@@ -1,6 +1,11 @@
+import socket
+import time
 from unittest.mock import Mock
 
+import pytest
+
 from gravotech.actions.actions import GraveuseAction, LDMode
+from gravotech.utils.errors import CommandTimeoutError
 
 
 def test_graveuse_action_ad():
@@ -9,7 +14,7 @@ def test_graveuse_action_ad():
     action = GraveuseAction(mock_streamer)
     resp = action.ad()
     assert resp == "AD 1"
-    mock_streamer.write.assert_called_once_with("AD\r")
+    mock_streamer.write.assert_called_once_with("AD\r", timeout=None)
 
 
 def test_graveuse_action_am():
@@ -18,7 +23,7 @@ def test_graveuse_action_am():
     action = GraveuseAction(mock_streamer)
     resp = action.am()
     assert resp == "AM 1"
-    mock_streamer.write.assert_called_once_with("AM\r")
+    mock_streamer.write.assert_called_once_with("AM\r", timeout=None)
 
 
 def test_graveuse_action_go():
@@ -42,7 +47,7 @@ def test_graveuse_action_gp():
     action = GraveuseAction(mock_streamer)
     resp = action.gp()
     assert resp == 'GP "MASTER":"1"'
-    mock_streamer.write.assert_called_once_with('GP "MASTER"\r')
+    mock_streamer.write.assert_called_once_with('GP "MASTER"\r', timeout=None)
 
 
 def test_graveuse_action_ld():
@@ -51,7 +56,7 @@ def test_graveuse_action_ld():
     action = GraveuseAction(mock_streamer)
     resp = action.ld("test.t2l", 1, LDMode.NORMAL)
     assert resp == "2\ntest.t2l\ntest2.t2l\r"
-    mock_streamer.write.assert_called_once_with('LD "test.t2l" 1 N\r')
+    mock_streamer.write.assert_called_once_with('LD "test.t2l" 1 N\r', timeout=None)
 
 
 def test_graveuse_action_ls():
@@ -60,7 +65,7 @@ def test_graveuse_action_ls():
     action = GraveuseAction(mock_streamer)
     resp = action.ls("*.t2l")
     assert resp == "AD 1"
-    mock_streamer.write.assert_called_once_with("LS *.t2l\r")
+    mock_streamer.write.assert_called_once_with("LS *.t2l\r", timeout=None)
 
 
 def test_graveuse_action_pf():
@@ -70,7 +75,9 @@ def test_graveuse_action_pf():
     data = b"DEADBEEF"
     resp = action.pf("test.t2l", data)
     assert resp == "PF 1"
-    mock_streamer.write.assert_called_once_with(f'PF "test.t2l" {data}\r')
+    mock_streamer.write.assert_called_once_with(
+        'PF "test.t2l" DEADBEEF\r', timeout=None
+    )
 
 
 def test_graveuse_action_rm():
@@ -79,7 +86,7 @@ def test_graveuse_action_rm():
     action = GraveuseAction(mock_streamer)
     resp = action.rm("*.t2l")
     assert resp == "RM 1"
-    mock_streamer.write.assert_called_once_with("RM *.t2l\r")
+    mock_streamer.write.assert_called_once_with("RM *.t2l\r", timeout=None)
 
 
 def test_graveuse_action_sp():
@@ -88,7 +95,7 @@ def test_graveuse_action_sp():
     action = GraveuseAction(mock_streamer)
     resp = action.sp(True)
     assert resp == "AD 1"
-    mock_streamer.write.assert_called_once_with('SP "MASTER":"1"\r')
+    mock_streamer.write.assert_called_once_with('SP "MASTER":"1"\r', timeout=None)
 
 
 def test_graveuse_action_st():
@@ -97,7 +104,7 @@ def test_graveuse_action_st():
     action = GraveuseAction(mock_streamer)
     resp = action.st()
     assert resp == "ST 4 0 0"
-    mock_streamer.write.assert_called_once_with("ST\r")
+    mock_streamer.write.assert_called_once_with("ST\r", timeout=None)
 
 
 def test_graveuse_action_vg():
@@ -106,7 +113,7 @@ def test_graveuse_action_vg():
     action = GraveuseAction(mock_streamer)
     resp = action.vg(3)
     assert resp == "example\r\n"
-    mock_streamer.write.assert_called_once_with("VG 3\r")
+    mock_streamer.write.assert_called_once_with("VG 3\r", timeout=None)
 
 
 def test_graveuse_action_vs():
@@ -115,4 +122,34 @@ def test_graveuse_action_vs():
     action = GraveuseAction(mock_streamer)
     resp = action.vs(3, "example_vs")
     assert resp == "VS 1"
-    mock_streamer.write.assert_called_once_with('VS 3 "example_vs"\r')
+    mock_streamer.write.assert_called_once_with('VS 3 "example_vs"\r', timeout=None)
+
+
+def test_graveuse_action_passes_timeout():
+    mock_streamer = Mock()
+    mock_streamer.write.return_value = "ST 4 0 0"
+    action = GraveuseAction(mock_streamer)
+    action.st(timeout=0.5)
+    mock_streamer.write.assert_called_once_with("ST\r", timeout=0.5)
+
+
+def test_graveuse_action_go_timeout():
+    mock_streamer = Mock()
+    mock_streamer.unsafe_read.side_effect = ["GO M", socket.timeout()]
+    action = GraveuseAction(mock_streamer)
+    with pytest.raises(CommandTimeoutError):
+        action.go(timeout=1.0)
+    mock_streamer.lock.assert_called_once_with(timeout=1.0)
+    mock_streamer.lock.return_value.assert_called_once()
+
+
+def test_set_variables_shares_one_budget():
+    mock_streamer = Mock()
+    mock_streamer.write.side_effect = lambda cmd, timeout: time.sleep(0.03) or "VS 1"
+    action = GraveuseAction(mock_streamer)
+
+    with pytest.raises(CommandTimeoutError):
+        action.set_variables({0: "A", 1: "B", 2: "C"}, timeout=0.05)
+
+    assert mock_streamer.write.call_count == 2
+    assert mock_streamer.write.call_args[1]["timeout"] < 0.05
@@ -0,0 +1,64 @@
+from unittest.mock import Mock
+
+from gravotech import Gravotech
+from gravotech.actions.actions import GraveuseAction
+from gravotech.fleet.broadcast import broadcast_pf
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+
+
+def test_broadcast_matches_pf_wire_form():
+    streamer = Mock()
+    streamer.write.return_value = "PF 1"
+    GraveuseAction(streamer).pf("logo.t2l", b"0A0B")
+    client = Mock()
+    client.Actions.validator = None
+    client.Actions.streamer.write_raw.return_value = "PF 1"
+
+    results = broadcast_pf({"a": client}, "logo.t2l", b"0A0B")
+
+    (payload,) = client.Actions.streamer.write_raw.call_args[0]
+    assert bytes(payload) == streamer.write.call_args[0][0].encode("ascii")
+    assert bytes(payload) == b'PF "logo.t2l" 0A0B\r'
+    assert results["a"].ok
+
+
+def test_broadcast_reports_each_machine():
+    full = SimulatedMachine(capacity=3)
+    clients = {
+        "ok-1": Gravotech("ok-1", 0, transport=LoopbackTransport()),
+        "ok-2": Gravotech("ok-2", 0, transport=LoopbackTransport()),
+        "full": Gravotech("full", 0, transport=LoopbackTransport(full)),
+        "offline": Gravotech("offline", 0, transport=LoopbackTransport()),
+    }
+    for name, client in clients.items():
+        if name != "offline":
+            client.connect()
+
+    results = broadcast_pf(clients, "logo.t2l", b"0A0B", max_concurrency=2)
+
+    assert results["ok-1"].ok and results["ok-2"].ok
+    assert not results["full"].ok
+    assert results["full"].response.endswith("(code: 3.4)")
+    assert results["offline"].response == "RuntimeError: Not connected"
+    assert clients["ok-1"].Actions.ls() == "1\nlogo.t2l"
+
+
+def test_broadcast_goes_through_the_command_stack():
+    machine = SimulatedMachine()
+    client = Gravotech(
+        "sim",
+        0,
+        transport=LoopbackTransport(machine),
+        validation=True,
+        priority_scheduling=True,
+        flow_control=True,
+    )
+    client.connect()
+
+    results = broadcast_pf({"a": client}, "logo.t2l", b"")
+
+    assert not results["a"].ok
+    assert machine.files == {}
+    assert broadcast_pf({"a": client}, "logo.t2l", b"0A0B")["a"].ok
+    assert machine.files == {"logo.t2l": b"0A0B"}
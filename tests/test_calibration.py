@@ -0,0 +1,78 @@
+import threading
+
+from gravotech import Gravotech, LDMode
+from gravotech.jobs.calibration import CalibrationRunner
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.stats.store import CycleStatsStore
+from gravotech.utils.responses import MachineState
+
+
+def make_client(machine, **kwargs):
+    client = Gravotech("sim", 0, transport=LoopbackTransport(machine), **kwargs)
+    client.connect()
+    return client
+
+
+def test_calibrates_each_file_on_each_machine():
+    fast, slow = SimulatedMachine(marking_time=0.01), SimulatedMachine(0.05)
+    for machine in (fast, slow):
+        machine.files["b.t2l"] = b"B"
+    clients = {"fast": make_client(fast, shadow_state=True), "slow": make_client(slow)}
+    clients["fast"].Actions.ld("b.t2l", 1, LDMode.NORMAL)
+    runner = CalibrationRunner(clients, {"a.t2l": b"A", "b.t2l": b"B"}, runs=2)
+
+    report = runner.run()
+
+    assert report.runs == {"fast": 4, "slow": 4}
+    assert report.errors == {} and report.pending == 0
+    assert "a.t2l" in fast.files and slow.loaded[2] == "S"
+    assert clients["fast"].Actions.shadow.loaded is None
+    model = runner.cost_model()
+    assert model["slow"]["a.t2l"] > model["fast"]["a.t2l"] >= 0.01
+    assert runner.store.count("fast", "b.t2l") == 2
+
+
+def test_busy_machines_and_errors():
+    ready, faulted = SimulatedMachine(marking_time=0.0), SimulatedMachine()
+    faulted.state = MachineState.FAULT
+    clients = {"ready": make_client(ready), "faulted": make_client(faulted)}
+    runner = CalibrationRunner(clients, ["missing.t2l"], poll_interval=0.01)
+
+    report = runner.run(duration=0.1)
+
+    assert report.runs == {"ready": 0, "faulted": 0}
+    assert list(report.errors) == [("ready", "missing.t2l")]
+    assert report.pending == 2
+    assert faulted.cycles == 0
+
+
+def test_resume_from_persisted_store(tmp_path):
+    path = str(tmp_path / "calibration.db")
+    machine = SimulatedMachine(marking_time=0.0)
+    clients = {"line-1": make_client(machine)}
+
+    CalibrationRunner(clients, {"a.t2l": b"A"}, CycleStatsStore(path)).run()
+    runner = CalibrationRunner(clients, {"a.t2l": b"A"}, CycleStatsStore.load(path))
+    report = runner.run()
+
+    assert report.runs == {"line-1": 0}
+    assert machine.cycles == 1
+    assert set(runner.cost_model()["line-1"]) == {"a.t2l"}
+
+
+def test_waits_for_idle_signal():
+    machine = SimulatedMachine(marking_time=0.0)
+    machine.files["a.t2l"] = b"A"
+    idle = threading.Event()
+    runner = CalibrationRunner(
+        {"line-1": make_client(machine)},
+        ["a.t2l"],
+        poll_interval=0.01,
+        idle=lambda name: idle.is_set(),
+    )
+
+    assert runner.run(duration=0.05).runs == {"line-1": 0}
+    assert machine.cycles == 0
+    idle.set()
+    assert runner.run(duration=1.0).runs == {"line-1": 1}
@@ -19,8 +19,8 @@ def test_gravotech_init(mock_action_cls, mock_streamer_cls):
 
     g = Gravotech("127.0.0.1", 3000, timeout=3.0)
 
-    mock_streamer_cls.assert_called_once_with("127.0.0.1", 3000, 3.0)
-    mock_action_cls.assert_called_once_with(mock_streamer)
+    mock_streamer_cls.assert_called_once_with("127.0.0.1", 3000, 3.0, transport=None)
+    mock_action_cls.assert_called_once_with(mock_streamer, shadow=None, validator=None)
 
     assert g.Streamer is mock_streamer
     assert g.Actions is mock_action
@@ -79,3 +79,28 @@ def test_gravotech_context_manager_exception(mock_action_cls, mock_streamer_cls)
             raise RuntimeError("boom")
 
     mock_streamer.close.assert_called_once()
+
+
+# ============================================================================
+# MONITOR CONNECTION
+# ============================================================================
+
+
+@patch("gravotech.client.IPStreamer")
+def test_gravotech_monitor_connection(mock_streamer_cls):
+    master = Mock()
+    monitor = Mock()
+    monitor.write.return_value = "SP 1"
+    mock_streamer_cls.side_effect = [master, monitor]
+
+    with Gravotech("127.0.0.1", 3000, monitor_connection=True) as g:
+        monitor.write.assert_called_once_with('SP "MASTER":"0"\r')
+        monitor.write.return_value = "ST 8 0 0"
+        master.write.return_value = "AM 1"
+
+        assert g.Actions.st() == "ST 8 0 0"
+        assert g.Actions.am() == "AM 1"
+        master.write.assert_called_once_with("AM\r", timeout=None)
+
+    master.close.assert_called_once()
+    monitor.close.assert_called_once()
@@ -0,0 +1,110 @@
+import time
+from unittest.mock import Mock
+
+from gravotech.jobs.dispatcher import FleetDispatcher
+from gravotech.jobs.job import MarkingJob, run_job
+from gravotech.utils.responses import parse_file_list, parse_status
+
+
+def make_client(status="ST 4 0 0", files="1\nlogo.t2l"):
+    client = Mock()
+    client.Actions.st.return_value = status
+    client.Actions.ls.return_value = files
+    client.Actions.ld.return_value = "LD 1"
+    client.Actions.set_variables.return_value = {0: "VS 1"}
+    client.Actions.pf.return_value = "PF 1"
+    client.Actions.go.return_value = "GO F"
+    return client
+
+
+def test_parse_responses():
+    assert parse_status("ST 4 0 1").state == 4
+    assert parse_status("ER 1 1") is None
+    assert parse_file_list("2\nA.t2l\nB.t2l") == ["A.t2l", "B.t2l"]
+    assert parse_file_list("ER 1 1") == []
+
+
+def test_run_job_stops_on_error():
+    actions = Mock()
+    actions.ld.return_value = "LD 1"
+    actions.set_variables.return_value = {
+        0: "VS 1",
+        1: "Syntax error: Wrong parameter (code: 1.4)",
+    }
+    job = MarkingJob("logo.t2l", {0: "A", 1: "B"})
+
+    assert run_job(actions, job).startswith("Syntax error")
+    actions.go.assert_not_called()
+
+
+def test_dispatch_skips_faulted_machine():
+    faulted = make_client(status="ST 32 0 0")
+    ready = make_client()
+
+    with FleetDispatcher({"a": faulted, "b": ready}) as dispatcher:
+        future = dispatcher.submit(MarkingJob("logo.t2l", {0: "SN1"}))
+        assert future.result(timeout=2) == "GO F"
+
+    faulted.Actions.go.assert_not_called()
+    ready.Actions.set_variables.assert_called_once_with({0: "SN1"})
+
+
+def test_dispatch_prefers_machine_with_file():
+    without_file = make_client(files="0")
+    with_file = make_client()
+
+    with FleetDispatcher({"a": without_file, "b": with_file}) as dispatcher:
+        future = dispatcher.submit(MarkingJob("logo.t2l", data=b"00"))
+        assert future.result(timeout=2) == "GO F"
+
+    with_file.Actions.go.assert_called_once()
+    without_file.Actions.pf.assert_not_called()
+
+
+def test_dispatch_uploads_missing_file():
+    client = make_client(files="0")
+
+    with FleetDispatcher({"a": client}) as dispatcher:
+        future = dispatcher.submit(MarkingJob("logo.t2l", data=b"00"))
+        assert future.result(timeout=2) == "GO F"
+
+    client.Actions.pf.assert_called_once_with("logo.t2l", b"00")
+    assert dispatcher.cycle_times()["a"] is not None
+
+
+def test_calibrated_cycle_times_guide_dispatch():
+    slow, fast = make_client(), make_client()
+    dispatcher = FleetDispatcher({"slow": slow, "fast": fast})
+    dispatcher.load_cycle_times({"slow": {"logo.t2l": 20.0}, "fast": {"logo.t2l": 2.0}})
+
+    with dispatcher:
+        future = dispatcher.submit(MarkingJob("logo.t2l"))
+        assert future.result(timeout=2) == "GO F"
+
+    fast.Actions.go.assert_called_once()
+    slow.Actions.go.assert_not_called()
+
+
+def test_upload_after_failed_file_list():
+    client = make_client()
+    client.Actions.ls.side_effect = [RuntimeError("connection lost"), "0"]
+    dispatcher = FleetDispatcher({"a": client})
+
+    future = dispatcher.submit(MarkingJob("logo.t2l", data=b"00"))
+    with dispatcher:
+        assert future.result(timeout=2) == "GO F"
+
+    client.Actions.pf.assert_called_once_with("logo.t2l", b"00")
+    assert dispatcher._machines[0].files == {"logo.t2l"}
+
+
+def test_jobs_are_not_stolen_by_machine_without_file():
+    with_file, without_file = make_client(), make_client(files="0")
+    with_file.Actions.go.side_effect = lambda: time.sleep(0.01) or "GO F"
+    dispatcher = FleetDispatcher({"a": with_file, "b": without_file})
+
+    futures = [dispatcher.submit(MarkingJob("logo.t2l")) for _ in range(4)]
+    with dispatcher:
+        assert [future.result(timeout=2) for future in futures] == ["GO F"] * 4
+
+    without_file.Actions.ld.assert_not_called()
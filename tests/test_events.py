@@ -0,0 +1,73 @@
+import json
+import sqlite3
+from unittest.mock import Mock
+
+import pytest
+
+from gravotech import Gravotech, LDMode
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.streamers.ip_streamer import IPStreamer
+from gravotech.utils.events import CommandEvent, EventSink
+
+
+def make_event(command="ST", response="ST 4 0 0"):
+    return CommandEvent(1.0, "127.0.0.1:3000", command, response, 0.001, None)
+
+
+def test_jsonl_sink_writes_batches(tmp_path):
+    path = tmp_path / "events.jsonl"
+    with EventSink(str(path), batch_size=2, flush_interval=0.05) as sink:
+        for _ in range(3):
+            sink.emit(make_event())
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0])["response"] == "ST 4 0 0"
+
+
+def test_sqlite_sink(tmp_path):
+    path = str(tmp_path / "events.db")
+    with EventSink(path, backend="sqlite") as sink:
+        sink.emit(make_event())
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT command FROM events").fetchall() == [("ST",)]
+    conn.close()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        EventSink("events.csv", backend="csv")
+
+
+def test_streamer_emits_events():
+    streamer = IPStreamer("127.0.0.1", 3000)
+    streamer.event_sink = Mock()
+    streamer._write_and_read = Mock(return_value="ER 3 1")
+
+    streamer.write("ST\r")
+
+    event = streamer.event_sink.emit.call_args[0][0]
+    assert event.command == "ST"
+    assert event.response == "ER 3 1"
+    assert event.error == "3.1"
+
+
+def test_go_cycle_and_uploads_are_recorded():
+    machine = SimulatedMachine(marking_time=0.0)
+    sink = Mock()
+    client = Gravotech("sim", 0, transport=LoopbackTransport(machine), event_sink=sink)
+    client.connect()
+
+    client.Actions.pf("logo.t2l", b"0A0B")
+    client.Actions.ld("logo.t2l", 1, LDMode.NORMAL)
+    assert client.Actions.go() == "GO F"
+
+    events = [(e.command, e.response) for (e,), _ in sink.emit.call_args_list]
+    assert events[-4:] == [
+        ("PF <19 bytes>", "PF 1"),
+        ('LD "logo.t2l" 1 N', "LD 1"),
+        ("GO", "GO M"),
+        ("GO", "GO F"),
+    ]
@@ -0,0 +1,73 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from gravotech import Gravotech
+
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.streamers.flow_control import FlowController
+from gravotech.utils.errors import error_code
+
+
+def test_error_code():
+    assert error_code("ER 3 1") == ("3", "1")
+    assert error_code("ST 4 0 0") is None
+    assert error_code("ER 12") is None
+
+
+@patch("gravotech.streamers.flow_control.time.sleep")
+def test_success_increases_rate(mock_sleep):
+    streamer = Mock()
+    streamer.write.return_value = "ST 4 0 0"
+    flow = FlowController(streamer, initial_rate=10.0, increase=1.0)
+
+    assert flow.write("ST\r") == "ST 4 0 0"
+    assert flow.rate_limit == 11.0
+
+
+@patch("gravotech.streamers.flow_control.time.sleep")
+def test_overload_retries_idempotent_command(mock_sleep):
+    streamer = Mock()
+    streamer.write.side_effect = ["ER 3 1", "ER 3 2", "VG 1 abc"]
+    flow = FlowController(streamer, initial_rate=40.0, increase=0.0)
+
+    assert flow.write("VG 1\r") == "VG 1 abc"
+    assert streamer.write.call_count == 3
+    assert flow.rate_limit == 10.0
+    assert flow.overloads == 2
+
+
+@patch("gravotech.streamers.flow_control.time.sleep")
+def test_overload_not_retried_for_ld(mock_sleep):
+    streamer = Mock()
+    streamer.write.return_value = "ER 3 1"
+    flow = FlowController(streamer, initial_rate=4.0, min_rate=3.0)
+
+    assert flow.write('LD "a.t2l" 1 N\r') == "ER 3 1"
+    streamer.write.assert_called_once()
+    assert flow.rate_limit == 3.0
+
+
+def test_backoff_does_not_delay_emergency_stop():
+    machine = SimulatedMachine()
+    client = Gravotech(
+        "sim",
+        0,
+        transport=LoopbackTransport(machine),
+        flow_control=True,
+        priority_scheduling=True,
+    )
+    client.connect()
+    machine.overload_rate = 1.0
+    poller = threading.Thread(target=client.Actions.st)
+    poller.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    client.Actions.am()
+    latency = time.monotonic() - started
+    poller.join()
+
+    assert client.FlowControl.overloads >= 2
+    assert latency < 0.1
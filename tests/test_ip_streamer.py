@@ -1,9 +1,13 @@
 import socket
+import threading
+import time
 from unittest.mock import Mock, patch, call
 
 import pytest
 
 from gravotech.streamers.ip_streamer import IPStreamer
+from gravotech.utils.deadline import Deadline
+from gravotech.utils.errors import CommandTimeoutError
 
 # ============================================================================
 # CONNECT / CLOSE
@@ -219,6 +223,17 @@ def test_write_retry_success(mock_retry):
     mock_retry.assert_called_once()
 
 
+@patch.object(IPStreamer, "retry")
+def test_write_retry_after_reset_send(mock_retry):
+    streamer = IPStreamer("127.0.0.1", 3000)
+    streamer.sock = Mock()
+    streamer.sock.sendall.side_effect = [ConnectionResetError(), None]
+    streamer._read_line = Mock(return_value="ST 4 0 0")
+
+    assert streamer.write("ST") == "ST 4 0 0"
+    mock_retry.assert_called_once()
+
+
 def test_write_no_retry_needed():
     streamer = IPStreamer("127.0.0.1", 3000)
     streamer._write_and_read = Mock(return_value="OK")
@@ -280,3 +295,57 @@ def test_retry_failure(mock_close, mock_connect):
 
     with pytest.raises(RuntimeError):
         streamer.retry(max_attempts=2, delay=0)
+
+
+# ============================================================================
+# DEADLINES
+# ============================================================================
+
+
+def test_write_deadline_bounds_slow_trickle():
+    streamer = IPStreamer("127.0.0.1", 3000)
+    streamer.sock = Mock()
+    streamer.sock.gettimeout.return_value = 5.0
+
+    def trickle(_):
+        time.sleep(0.02)
+        return b"x"
+
+    streamer.sock.recv.side_effect = trickle
+
+    with pytest.raises(CommandTimeoutError):
+        streamer.write("ST", timeout=0.1)
+
+    streamer.sock.settimeout.assert_called_with(5.0)
+
+
+def test_write_deadline_bounds_lock_wait():
+    streamer = IPStreamer("127.0.0.1", 3000)
+    streamer._write_and_read = Mock(return_value="ST 4 0 0")
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with streamer.mu:
+            held.set()
+            release.wait(1)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait(1)
+    try:
+        with pytest.raises(CommandTimeoutError):
+            streamer.write("ST", timeout=0.05)
+    finally:
+        release.set()
+        thread.join()
+    streamer._write_and_read.assert_not_called()
+
+
+def test_read_line_socket_timeout_with_deadline():
+    streamer = IPStreamer("127.0.0.1", 3000)
+    streamer.sock = Mock()
+    streamer.sock.recv.side_effect = socket.timeout()
+
+    with pytest.raises(CommandTimeoutError):
+        streamer._read_line(Deadline(1.0))
@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+from gravotech.jobs.journal import JobJournal
+
+
+def make_actions(go="GO F"):
+    actions = Mock()
+    actions.vs.return_value = "VS 1"
+    actions.go.return_value = go
+    return actions
+
+
+def test_resume_after_completed_parts(tmp_path):
+    path = str(tmp_path / "campaign.log")
+    with JobJournal(path) as journal:
+        for record_id in range(3):
+            assert (
+                journal.run(make_actions(), record_id, {0: f"SN{record_id}"}) == "GO F"
+            )
+
+    journal = JobJournal(path)
+    assert journal.next_id == 3
+    assert journal.in_doubt is None
+    journal.close()
+
+
+def test_failed_part_is_not_marked(tmp_path):
+    path = str(tmp_path / "campaign.log")
+    with JobJournal(path) as journal:
+        journal.run(make_actions(), 0, {0: "SN0"})
+        journal.run(make_actions(go="GO S"), 1, {0: "SN1"})
+
+    with JobJournal(path) as journal:
+        assert journal.next_id == 1
+
+
+def test_crash_during_go_leaves_part_in_doubt(tmp_path):
+    path = str(tmp_path / "campaign.log")
+    journal = JobJournal(path)
+    journal.run(make_actions(), 0, {0: "SN0"})
+    journal.begin(1, {"0": "SN1"})
+    # Simulate a crash: no outcome, no close, torn trailing entry.
+    journal._log.write(b'{"id":1,"op":"outc')
+    journal._log.flush()
+
+    recovered = JobJournal(path)
+    assert recovered.next_id == 1
+    assert recovered.in_doubt == 1
+    recovered.complete(1, "GO F")
+    recovered.close()
+
+    with JobJournal(path) as journal:
+        assert journal.next_id == 2
+        assert journal.in_doubt is None
+
+
+def test_failure_followed_by_success_is_not_skipped(tmp_path):
+    path = str(tmp_path / "campaign.log")
+    with JobJournal(path) as journal:
+        journal.run(make_actions(), 0, {0: "SN0"})
+        journal.run(make_actions(go="GO S"), 1, {0: "SN1"})
+        journal.run(make_actions(), 2, {0: "SN2"})
+
+    with JobJournal(path) as journal:
+        assert (journal.next_id, journal.frontier) == (1, 3)
+        assert journal.unmarked == [1]
+        journal.run(make_actions(), 1, {0: "SN1"})
+
+    with JobJournal(path) as journal:
+        assert journal.next_id == 3
+        assert journal.unmarked == []
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from gravotech import Gravotech, LDMode
+from gravotech.fleet.lease import MasterLease
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.utils.errors import LockTimeoutError
+
+
+@pytest.fixture
+def machine():
+    machine = SimulatedMachine(marking_time=0.0)
+    machine.files["a.t2l"] = b"data"
+    return machine
+
+
+def make_lease(machine, path, **kwargs):
+    client = Gravotech("sim", 0, transport=LoopbackTransport(machine, True))
+    client.connect()
+    return MasterLease(client.Actions, str(path), **kwargs)
+
+
+def test_switch_only_when_another_lease_took_the_role(machine, tmp_path):
+    path = tmp_path / "machine.lease"
+    first, second = make_lease(machine, path), make_lease(machine, path)
+
+    for _ in range(3):
+        with first.hold() as actions:
+            assert actions.vs(0, "A") == "VS 1 0"
+    assert (first.acquisitions, first.switches) == (3, 1)
+
+    with second.hold() as actions:
+        assert actions.vs(0, "B") == "VS 1 0"
+    with first.hold() as actions:
+        assert actions.vs(0, "C") == "VS 1 0"
+
+    assert (first.switches, second.switches) == (2, 1)
+    assert not first.held and not second.held
+
+
+def test_wait_for_other_holder(machine, tmp_path):
+    path = tmp_path / "machine.lease"
+    first, second = make_lease(machine, path), make_lease(machine, path)
+
+    with first.hold():
+        with pytest.raises(LockTimeoutError):
+            with second.hold(timeout=0.05):
+                pass
+
+    with second.hold(timeout=1.0) as actions:
+        assert actions.ld("a.t2l", 1, LDMode.NORMAL) == "LD 1"
+
+
+def test_waiting_threads_share_the_lease(machine, tmp_path):
+    lease = make_lease(machine, tmp_path / "machine.lease")
+    entered = threading.Event()
+    release = threading.Event()
+
+    def first():
+        with lease.hold():
+            entered.set()
+            release.wait()
+
+    def waiter(index):
+        with lease.hold() as actions:
+            actions.vs(index, "X")
+
+    threads = [threading.Thread(target=first)]
+    threads[0].start()
+    entered.wait()
+    for index in range(3):
+        threads.append(threading.Thread(target=waiter, args=(index,)))
+        threads[-1].start()
+    while lease._mu.stats()["waiters"] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert lease.acquisitions == 1
+    assert machine.variables[:3] == ["X"] * 3
+    assert not lease.held
+
+
+def test_reconnection_takes_the_role_again(machine, tmp_path):
+    lease = make_lease(machine, tmp_path / "machine.lease")
+    with lease.hold():
+        pass
+    lease.actions.streamer.retry(delay=0)
+
+    with lease.hold() as actions:
+        assert actions.vs(0, "A") == "VS 1 0"
+    assert lease.switches == 2
+
+
+def test_nested_hold_keeps_the_lease(machine, tmp_path):
+    path = tmp_path / "machine.lease"
+    first, second = make_lease(machine, path), make_lease(machine, path)
+
+    with first.hold() as actions:
+        with first.hold():
+            actions.vs(0, "A")
+        assert first.held
+        with pytest.raises(LockTimeoutError):
+            with second.hold(timeout=0.05):
+                pass
+        assert actions.vs(1, "B") == "VS 1 1"
+
+    assert not first.held
+    assert first.acquisitions == 1
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from gravotech.streamers.ip_streamer import IPStreamer
+from gravotech.utils.errors import LockTimeoutError
+from gravotech.utils.locks import FairRLock
+
+
+def test_reentrant():
+    lock = FairRLock()
+    with lock:
+        with lock:
+            assert lock.stats()["holder"] == threading.current_thread().name
+    assert lock.stats()["holder"] is None
+
+
+def test_release_without_acquire():
+    with pytest.raises(RuntimeError):
+        FairRLock().release()
+
+
+def test_waiters_served_in_arrival_order():
+    lock = FairRLock()
+    lock.acquire()
+    order = []
+
+    def worker(n):
+        with lock:
+            order.append(n)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+        time.sleep(0.02)
+    lock.release()
+    for t in threads:
+        t.join(1)
+
+    assert order == [0, 1, 2, 3]
+    assert lock.stats()["acquisitions"] == 5
+    assert lock.stats()["max_wait"] > 0
+
+
+def test_releasing_thread_cannot_cut_the_queue():
+    lock = FairRLock()
+    lock.acquire()
+
+    def waiter_body():
+        with lock:
+            time.sleep(0.1)
+
+    waiter = threading.Thread(target=waiter_body)
+    waiter.start()
+    while lock.stats()["waiters"] == 0:
+        time.sleep(0.001)
+    lock.release()
+
+    assert lock.acquire(blocking=False) is False
+    waiter.join(1)
+
+
+def test_transaction_timeout_names_holder():
+    streamer = IPStreamer("127.0.0.1", 3000)
+    held = threading.Event()
+    done = threading.Event()
+
+    def holder():
+        with streamer.transaction():
+            held.set()
+            done.wait(1)
+
+    thread = threading.Thread(target=holder, name="poller")
+    thread.start()
+    held.wait(1)
+    try:
+        with pytest.raises(LockTimeoutError, match="poller"):
+            with streamer.transaction(timeout=0.05):
+                pass
+    finally:
+        done.set()
+        thread.join()
+
+    with streamer.transaction(timeout=0.05) as tx:
+        assert tx is streamer
+    assert streamer.lock_stats()["holder"] is None
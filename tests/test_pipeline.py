@@ -0,0 +1,82 @@
+from gravotech import Gravotech
+from gravotech.jobs.job import MarkingJob
+from gravotech.jobs.pipeline import JobPipeline
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.streamers.flow_control import FlowController
+from gravotech.utils.templates import ValueTemplate
+
+
+def make_client(require_master=False, marking_time=0.01):
+    machine = SimulatedMachine(marking_time=marking_time)
+    machine.files["logo.t2l"] = b"00"
+    transport = LoopbackTransport(machine, require_master=require_master)
+    client = Gravotech("sim", 0, transport=transport, monitor_connection=True)
+    client.connect()
+    client.Actions.sp(True)
+    return client, machine
+
+
+def test_pipeline_uploads_on_slave_session_during_marking():
+    client, machine = make_client(marking_time=0.2)
+    serials = ValueTemplate("SN{serial:04d}").cursor()
+    jobs = [
+        MarkingJob("logo.t2l", {0: serials}),
+        MarkingJob("new.t2l", {0: serials}, data=b"0A0B"),
+    ]
+    pipeline = JobPipeline(client)
+
+    results = list(pipeline.run(jobs))
+
+    assert [resp for _, resp in results] == ["GO F", "GO F"]
+    assert [job.variables[0] for job, _ in results] == ["SN0000", "SN0001"]
+    assert pipeline.stats.uploads == 1
+    assert pipeline.stats.master_uploads == 0
+    # The upload was done while the first job was marking.
+    assert pipeline.stats.stage_wait < 0.1
+    assert machine.variables[0] == "SN0001"
+
+
+def test_pipeline_falls_back_to_master_upload():
+    client, machine = make_client(require_master=True)
+    pipeline = JobPipeline(client)
+
+    results = list(pipeline.run([MarkingJob("new.t2l", data=b"0A0B")]))
+
+    assert results[0][1] == "GO F"
+    assert pipeline.stats.master_uploads == 1
+    assert "new.t2l" in machine.files
+
+
+def test_pipeline_reports_staging_error():
+    client, machine = make_client()
+    machine.capacity = 2
+    pipeline = JobPipeline(client)
+
+    ((job, resp),) = pipeline.run([MarkingJob("big.t2l", data=b"0A0B0C")])
+
+    assert resp.endswith("(code: 3.4)")
+    assert machine.cycles == 0
+    assert pipeline.stats.master_uploads == 0
+
+
+def test_slave_upload_goes_through_the_command_stack():
+    machine = SimulatedMachine(marking_time=0.0)
+    client = Gravotech(
+        "sim",
+        0,
+        transport=LoopbackTransport(machine),
+        monitor_connection=True,
+        priority_scheduling=True,
+        flow_control=True,
+        validation=True,
+    )
+    client.connect()
+    pipeline = JobPipeline(client)
+
+    staged = pipeline.stage(MarkingJob("empty.t2l", data=b""))
+
+    assert staged.error.startswith("TL07SyntaxError")
+    assert "empty.t2l" not in machine.files
+    assert pipeline.stage(MarkingJob("new.t2l", data=b"0A0B")).uploaded
+    assert isinstance(client.Router.monitor, FlowController)
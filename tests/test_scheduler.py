@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+from unittest.mock import Mock
+
+from gravotech import Gravotech
+from gravotech.actions.actions import GraveuseAction
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.streamers.scheduler import CommandScheduler, Priority, command_priority
+from gravotech.utils.locks import FairRLock
+
+
+class FakeStreamer:
+    """Minimal streamer answering AM with 'AM 1' then 'GO S'."""
+
+    def __init__(self):
+        self.timeout = 5.0
+        self.mu = threading.RLock()
+        self.lines = deque()
+        self.sent = []
+
+    def lock(self, timeout=None):
+        self.mu.acquire()
+        return self.mu.release
+
+    def wait_readable(self, timeout):
+        if not self.lines:
+            time.sleep(timeout)
+        return bool(self.lines)
+
+    def unsafe_write(self, cmd):
+        self.sent.append(cmd)
+        if cmd.startswith("GO"):
+            self.lines.append("GO M")
+        elif cmd.startswith("AM"):
+            self.lines.extend(["GO S", "AM 1"])
+
+    def unsafe_read(self, timeout=None):
+        return self.lines.popleft()
+
+    def write(self, cmd, timeout=None):
+        with self.mu:
+            self.unsafe_write(cmd)
+            return self.unsafe_read()
+
+
+# ============================================================================
+# PRIORITIES
+# ============================================================================
+
+
+def test_command_priority():
+    assert command_priority("AM\r") == Priority.STOP
+    assert command_priority("AD") == Priority.ACKNOWLEDGE
+    assert command_priority('PF "a.t2l" 00') == Priority.BULK
+    assert command_priority("ls *.t2l") == Priority.BULK
+    assert command_priority("ST\r") == Priority.NORMAL
+
+
+def test_gate_serves_best_priority_first():
+    gate = FairRLock()
+    gate.acquire(priority=Priority.NORMAL)
+    order = []
+
+    def worker(priority):
+        gate.acquire(priority=priority)
+        order.append(priority)
+        gate.release()
+
+    threads = [
+        threading.Thread(target=worker, args=(p,))
+        for p in (Priority.BULK, Priority.NORMAL, Priority.STOP)
+    ]
+    for t in threads:
+        t.start()
+        time.sleep(0.05)
+    gate.release()
+    for t in threads:
+        t.join(1)
+
+    assert order == [Priority.STOP, Priority.NORMAL, Priority.BULK]
+
+
+# ============================================================================
+# WRITE
+# ============================================================================
+
+
+def test_write_without_session_goes_through_streamer():
+    streamer = Mock()
+    streamer.write.return_value = "ST 4 0 0"
+    scheduler = CommandScheduler(streamer)
+
+    assert scheduler.write("ST\r") == "ST 4 0 0"
+    streamer.write.assert_called_once_with("ST\r", timeout=None)
+
+
+def test_am_interleaves_with_go_monitor():
+    streamer = FakeStreamer()
+    scheduler = CommandScheduler(streamer, poll_interval=0.01)
+    action = GraveuseAction(scheduler)
+    result = {}
+
+    go_thread = threading.Thread(target=lambda: result.update(go=action.go()))
+    go_thread.start()
+    time.sleep(0.05)
+
+    assert action.am() == "AM 1"
+    go_thread.join(1)
+
+    assert result["go"] == "GO S"
+    assert streamer.sent == ["GO", "AM\r"]
+
+
+def test_am_does_not_take_transaction_reply():
+    client = Gravotech(
+        "sim", 0, transport=LoopbackTransport(), priority_scheduling=True
+    )
+    client.connect()
+    streamer = client.Actions.streamer
+    result = {}
+
+    with streamer.transaction():
+        streamer.unsafe_write("ST")
+        am_thread = threading.Thread(
+            target=lambda: result.update(am=client.Actions.am())
+        )
+        am_thread.start()
+        time.sleep(0.05)
+        result["st"] = streamer.unsafe_read()
+    am_thread.join(1)
+
+    assert result["st"].startswith("ST ")
+    assert result["am"] == "AM 1"
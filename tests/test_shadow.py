@@ -0,0 +1,103 @@
+from unittest.mock import Mock, call
+
+from gravotech import Gravotech
+from gravotech.actions.actions import GraveuseAction, LDMode
+from gravotech.actions.shadow import ShadowState
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.stats.store import CycleStatsStore
+
+
+def make_action():
+    streamer = Mock()
+    streamer.reconnect_hooks = []
+    return GraveuseAction(streamer, shadow=ShadowState()), streamer
+
+
+def test_sp_skipped_when_already_master():
+    action, streamer = make_action()
+    streamer.write.return_value = "SP 1"
+
+    assert action.sp(True) == "SP 1"
+    assert action.sp(True) == "SP 1"
+    streamer.write.assert_called_once_with('SP "MASTER":"1"\r', timeout=None)
+
+
+def test_ld_skipped_when_same_file_loaded():
+    action, streamer = make_action()
+    streamer.write.return_value = "LD 1"
+
+    action.ld("logo.t2l", 1, LDMode.NORMAL)
+    action.ld("logo.t2l", 1, LDMode.NORMAL)
+    action.ld("logo.t2l", 2, LDMode.NORMAL)
+
+    assert streamer.write.call_count == 2
+
+
+def test_ld_resent_after_fault():
+    action, streamer = make_action()
+    streamer.write.return_value = "LD 1"
+    streamer.unsafe_read.side_effect = ["GO M", "GO S"]
+
+    action.ld("logo.t2l", 1, LDMode.NORMAL)
+    action.go()
+    action.ld("logo.t2l", 1, LDMode.NORMAL)
+
+    assert streamer.write.call_count == 2
+
+
+def test_set_variables_sends_only_deltas():
+    action, streamer = make_action()
+    streamer.write.return_value = "VS 1"
+
+    action.set_variables({0: "LOT1", 1: "SN1"})
+    responses = action.set_variables({0: "LOT1", 1: "SN2"})
+
+    assert responses == {1: "VS 1"}
+    assert streamer.write.call_args_list[-1] == call('VS 1 "SN2"\r', timeout=None)
+    assert streamer.write.call_count == 3
+
+
+def test_reconnect_invalidates_shadow():
+    action, streamer = make_action()
+    streamer.write.return_value = "VS 1"
+    action.set_variables({0: "LOT1"})
+
+    for hook in streamer.reconnect_hooks:
+        hook()
+    action.set_variables({0: "LOT1"})
+
+    assert streamer.write.call_count == 2
+
+
+def test_skipped_ld_records_no_ld_time():
+    streamer = Mock()
+    streamer.reconnect_hooks = []
+    streamer.write.return_value = "LD 1"
+    streamer.unsafe_read.side_effect = ["GO M", "GO F"] * 2
+    store = CycleStatsStore()
+    action = GraveuseAction(streamer, stats=store, machine="m1", shadow=ShadowState())
+
+    for _ in range(2):
+        action.ld("logo.t2l", 1, LDMode.NORMAL)
+        action.go()
+
+    assert store.phases["ld"][0] > 0.0
+    assert store.phases["ld"][1] == 0.0
+
+
+def test_sp_resent_after_another_session_took_the_role():
+    machine = SimulatedMachine()
+    first = Gravotech(
+        "sim", 0, transport=LoopbackTransport(machine, True), shadow_state=True
+    )
+    second = Gravotech("sim", 0, transport=LoopbackTransport(machine, True))
+    first.connect()
+    second.connect()
+
+    assert first.Actions.sp(True) == "SP 1"
+    assert second.Actions.sp(True) == "SP 1"
+    assert first.Actions.vs(0, "A").endswith("(code: 4.1)")
+
+    assert first.Actions.sp(True) == "SP 1"
+    assert first.Actions.vs(0, "A") == "VS 1 0"
@@ -0,0 +1,49 @@
+import pytest
+
+from gravotech import Gravotech, LDMode
+from gravotech.simulator.handler import SimulatedMachine, TL07Handler
+from gravotech.simulator.server import SimulatedEngraver
+
+
+@pytest.fixture
+def engraver():
+    machine = SimulatedMachine(marking_time=0.01)
+    machine.files["logo.t2l"] = b"00"
+    with SimulatedEngraver(machine) as engraver:
+        yield engraver
+
+
+def test_handler_marking_cycle():
+    machine = SimulatedMachine(marking_time=0.0)
+    machine.files["logo.t2l"] = b"00"
+    handler = TL07Handler(machine)
+
+    assert handler.feed("GO") == ["ER 2 2"]
+    assert handler.feed('LD "logo.t2l" 1 N') == ["LD 1"]
+    assert handler.feed("GO") == ["GO M"]
+    assert handler.feed("ST") == ["ST 8 0 0"]
+    assert handler.poll(handler.next_due()) == ["GO F"]
+    assert handler.feed("ST") == ["ST 4 0 0"]
+    assert handler.feed("XX") == ["ER 1 1"]
+
+
+def test_client_against_simulator(engraver):
+    with Gravotech(*engraver.address) as client:
+        assert client.Actions.pf("new.t2l", b"0011") == "PF 1"
+        assert client.Actions.ls("*.t2l") == "2\nlogo.t2l\nnew.t2l"
+        assert client.Actions.ld("missing.t2l", 1, LDMode.NORMAL).endswith(
+            "(code: 1.5)"
+        )
+        assert client.Actions.ld("logo.t2l", 1, LDMode.NORMAL) == "LD 1"
+        assert client.Actions.vs(0, "SN1") == "VS 1 0"
+        assert client.Actions.go() == "GO F"
+        assert client.Actions.vg(0) == "SN1"
+        assert engraver.machine.cycles == 1
+
+
+def test_dropped_connection_is_retried(engraver):
+    with Gravotech(*engraver.address) as client:
+        assert client.Actions.st() == "ST 2 0 0"
+        assert engraver.drop_connections() == 1
+        assert client.Actions.st() == "ST 2 0 0"
+        assert engraver.connections == 2
@@ -0,0 +1,18 @@
+import os
+
+from gravotech.simulator.soak import SoakHarness
+
+# Seconds of traffic; set to hours on a soak machine (see `make soak`).
+SOAK_SECONDS = float(os.environ.get("GRAVOTECH_SOAK_SECONDS", "3"))
+
+
+def test_soak_has_no_drift():
+    harness = SoakHarness(
+        SOAK_SECONDS,
+        sample_interval=max(0.25, SOAK_SECONDS / 60),
+        disconnect_interval=max(1.0, SOAK_SECONDS / 20),
+    )
+    report = harness.run()
+
+    assert report.ok, "\n".join(report.failures + report.top_growth)
+    assert report.samples[-1].reconnects > 0
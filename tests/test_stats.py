@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from gravotech.actions.actions import GraveuseAction, LDMode
+from gravotech.stats.store import CycleStatsStore
+
+
+@pytest.fixture
+def store():
+    store = CycleStatsStore()
+    for i in range(10):
+        store.record("m1", "fast.t2l", marking=1.0 + i, timestamp=3600.0 + i)
+    store.record("m2", "slow.t2l", marking=50.0, timestamp=7200.0)
+    store.record("m2", "slow.t2l", marking=60.0, status="GO S", timestamp=7300.0)
+    return store
+
+
+def test_percentiles(store):
+    result = store.percentiles("marking", qs=(0, 50, 100), machine="m1")
+    assert result == {0: 1.0, 50: 5.5, 100: 10.0}
+    assert store.percentiles(filename="unknown.t2l") == {}
+
+
+def test_throughput_per_hour_counts_successes(store):
+    assert store.throughput_per_hour() == {3600: 10, 7200: 1}
+    assert store.throughput_per_hour(machine="m2") == {7200: 1}
+
+
+def test_slowest_files(store):
+    assert store.slowest_files(1) == [("slow.t2l", 55.0)]
+
+
+def test_flush_and_load(store, tmp_path):
+    store.path = str(tmp_path / "cycles.db")
+    assert store.flush() == 12
+    assert store.flush() == 0
+
+    loaded = CycleStatsStore.load(store.path)
+    assert len(loaded) == 12
+    assert loaded.slowest_files(1) == [("slow.t2l", 55.0)]
+
+
+def test_action_records_cycle_phases():
+    mock_streamer = Mock()
+    mock_streamer.write.side_effect = ["LD 1", "VS 1"]
+    mock_streamer.unsafe_read.side_effect = ["GO M", "GO F"]
+    store = CycleStatsStore()
+    action = GraveuseAction(mock_streamer, stats=store, machine="m1")
+
+    action.ld("logo.t2l", 1, LDMode.NORMAL)
+    action.vs(0, "SN1")
+    assert action.go() == "GO F"
+
+    assert len(store) == 1
+    assert store.files == ["logo.t2l"]
+    assert store.machines == ["m1"]
+
+
+def test_queries_do_not_block_concurrent_records():
+    store = CycleStatsStore()
+    store.record("m1", "a.t2l", marking=1.0)
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        try:
+            for i in range(20000):
+                store.record("m1", f"{i % 5}.t2l", marking=float(i))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while not done.is_set():
+        store.percentiles(machine="m1")
+        store.throughput_per_hour()
+        store.slowest_files()
+    thread.join()
+
+    assert errors == []
+    assert len(store) == 20001
+
+
+def test_failed_flush_is_retried(store, tmp_path, monkeypatch):
+    store.path = str(tmp_path / "cycles.db")
+    # A database without the cycles table makes the insert fail.
+    monkeypatch.setattr(store, "_connect", lambda: sqlite3.connect(":memory:"))
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    monkeypatch.undo()
+
+    assert store.flush() == 12
+    assert len(CycleStatsStore.load(store.path)) == 12
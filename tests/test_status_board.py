@@ -0,0 +1,73 @@
+import multiprocessing
+from unittest.mock import Mock
+
+import pytest
+
+from gravotech.actions.shadow import ShadowState
+from gravotech.fleet.status_board import StatusBoard, StatusPoller
+from gravotech.utils.responses import MachineStatus
+
+
+@pytest.fixture
+def board():
+    with StatusBoard(["line-1", "line-2"]) as board:
+        yield board
+
+
+def test_publish_and_attach(board):
+    board.publish("line-1", MachineStatus(4, 0, 1), ("logo.t2l", 5, "N"), {0: "SN1"})
+    board.publish("line-1", error="Syntax error: Cannot open file (code: 1.5)")
+
+    reader = StatusBoard.attach(board.name)
+    try:
+        snapshot = reader.read("line-1")
+        assert reader.machines == ["line-1", "line-2"]
+    finally:
+        reader.close()
+
+    assert snapshot.status == MachineStatus(4, 0, 1)
+    assert snapshot.loaded == ("logo.t2l", 5, "N")
+    assert snapshot.variables == {0: "SN1"}
+    assert snapshot.last_error.endswith("(code: 1.5)")
+    assert snapshot.sequence == 6
+    assert board.read("line-2").status is None
+
+
+def publish_counts(name, count):
+    board = StatusBoard.attach(name)
+    for n in range(count):
+        board.publish("line-1", variables={i: str(n) for i in range(10)})
+    board.close()
+
+
+def test_reads_are_consistent_across_processes(board):
+    writer = multiprocessing.get_context("spawn").Process(
+        target=publish_counts, args=(board.name, 20000)
+    )
+    writer.start()
+    try:
+        while writer.is_alive():
+            values = set(board.read("line-1").variables.values())
+            assert len(values) <= 1
+    finally:
+        writer.join()
+
+    assert board.read("line-1").variables[9] == "19999"
+
+
+def test_poller_publishes_shadow_state(board):
+    client = Mock()
+    client.Actions.st.return_value = "ST 8 0 0"
+    client.Actions.shadow = ShadowState()
+    client.Actions.shadow.loaded = ("logo.t2l", 1, "N")
+    client.Actions.shadow.variables = {2: "LOT-7"}
+    failing = Mock()
+    failing.Actions.st.side_effect = RuntimeError("Not connected")
+
+    StatusPoller(board, {"line-1": client, "line-2": failing}).poll_once()
+
+    snapshot = board.read("line-1")
+    assert snapshot.status.state == 8
+    assert snapshot.loaded == ("logo.t2l", 1, "N")
+    assert snapshot.variables == {2: "LOT-7"}
+    assert board.read("line-2").last_error == "RuntimeError: Not connected"
@@ -0,0 +1,47 @@
+from gravotech import Gravotech, LDMode
+from gravotech.fleet.storage import StorageManager
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+
+
+def make_manager(capacity, **kwargs):
+    machine = SimulatedMachine(capacity=capacity)
+    client = Gravotech("sim", 0, transport=LoopbackTransport(machine))
+    client.connect()
+    return StorageManager(client.Actions, **kwargs), machine
+
+
+def test_memory_full_evicts_least_recently_used():
+    manager, machine = make_manager(capacity=30)
+    assert manager.pf("a.t2l", b"01234567") == "PF 1"
+    assert manager.pf("b.t2l", b"01234567") == "PF 1"
+    assert manager.pf("c.t2l", b"01234567") == "PF 1"
+    manager.ld("a.t2l", 1, LDMode.NORMAL)
+
+    assert manager.pf("d.t2l", b"01234567") == "PF 1"
+
+    assert sorted(machine.files) == ["a.t2l", "c.t2l", "d.t2l"]
+    assert manager.files() == ["c.t2l", "a.t2l", "d.t2l"]
+    assert manager.evictions == 1
+
+
+def test_capacity_evicts_before_upload():
+    manager, machine = make_manager(capacity=1000)
+    machine.files["old.t2l"] = b"00"
+    manager.capacity = 44
+    manager.sync()
+    manager.pf("a.t2l", b"0" * 20)
+
+    manager.pf("b.t2l", b"0" * 20)
+
+    # Only files of known size are evicted ahead of time.
+    assert sorted(machine.files) == ["b.t2l", "old.t2l"]
+
+
+def test_nothing_to_evict():
+    manager, machine = make_manager(capacity=20, protected=["keep.t2l"])
+    machine.files["keep.t2l"] = b"0123456789"
+    manager.sync()
+
+    assert manager.pf("big.t2l", b"0123456789ABCDEF").endswith("(code: 3.4)")
+    assert "keep.t2l" in machine.files
@@ -0,0 +1,58 @@
+import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from gravotech.actions.actions import GraveuseAction
+from gravotech.utils.templates import ValueTemplate, luhn_digit
+
+
+def test_luhn_digit():
+    assert luhn_digit("7992739871") == "3"
+    assert luhn_digit("LOT-000") == "0"
+
+
+def test_template_value():
+    template = ValueTemplate(
+        "{lot}-{date:%y}{serial:06d}{luhn}",
+        start=100,
+        lot="A12",
+        date=datetime.date(2026, 1, 5),
+    )
+    value = template.value(2)
+    assert value == "A12-26000102" + luhn_digit("A12-26000102")
+
+
+def test_generate_matches_value_at_any_offset():
+    template = ValueTemplate("SN{serial:04d}", start=10, step=5)
+    assert template.generate(3, 3) == ["SN0025", "SN0030", "SN0035"]
+    assert template.generate(3, 3) == [template.value(i) for i in range(3, 6)]
+
+
+def test_template_requires_serial():
+    with pytest.raises(ValueError):
+        ValueTemplate("{lot}", lot="A")
+    with pytest.raises(ValueError):
+        ValueTemplate("{lot}{serial}")
+
+
+def test_cursor_resumes_from_offset():
+    template = ValueTemplate("{serial}{luhn}")
+    cursor = template.cursor(chunk_size=4)
+    first = [next(cursor) for _ in range(6)]
+
+    resumed = template.cursor(cursor.offset)
+    assert next(resumed) == template.value(6)
+    assert len(set(first)) == 6
+
+
+def test_vs_accepts_cursor():
+    mock_streamer = Mock()
+    mock_streamer.write.return_value = "VS 1"
+    action = GraveuseAction(mock_streamer)
+    cursor = ValueTemplate("SN{serial:03d}", start=7).cursor()
+
+    action.vs(0, cursor)
+    action.vs(0, cursor)
+
+    mock_streamer.write.assert_called_with('VS 0 "SN008"\r', timeout=None)
@@ -0,0 +1,50 @@
+import os
+import time
+
+from gravotech import Gravotech, LDMode
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.simulator.server import SimulatedEngraver
+from gravotech.streamers.ip_streamer import IPStreamer
+from gravotech.streamers.transports import TCPTransport, UnixTransport
+
+
+def make_machine():
+    machine = SimulatedMachine(marking_time=0.01)
+    machine.files["logo.t2l"] = b"00"
+    return machine
+
+
+def test_default_transport_is_tcp():
+    streamer = IPStreamer("127.0.0.1", 3000)
+
+    assert isinstance(streamer.transport, TCPTransport)
+    assert (streamer.transport.host, streamer.transport.port) == ("127.0.0.1", 3000)
+
+
+def test_loopback_transport_runs_cycle():
+    transport = LoopbackTransport(make_machine())
+
+    with Gravotech("loopback", 0, transport=transport, monitor_connection=True) as g:
+        assert g.Actions.ld("logo.t2l", 1, LDMode.NORMAL) == "LD 1"
+        assert g.Actions.go() == "GO F"
+        assert g.Actions.st() == "ST 4 0 0"
+        assert g.Monitor.transport is transport
+
+
+def test_loopback_read_times_out():
+    streamer = IPStreamer("loopback", 0, timeout=0.05, transport=LoopbackTransport())
+    streamer.connect()
+
+    started = time.monotonic()
+    assert not streamer.wait_readable(0.05)
+    assert time.monotonic() - started >= 0.05
+
+
+def test_unix_transport(tmp_path):
+    path = os.path.join(str(tmp_path), "tl07.sock")
+    with SimulatedEngraver(make_machine(), path=path):
+        with Gravotech("unix", 0, transport=UnixTransport(path)) as g:
+            assert g.Actions.ls() == "1\nlogo.t2l"
+            assert g.Actions.ld("logo.t2l", 1, LDMode.SIMULATION) == "LD 1"
+            assert g.Actions.st() == "ST 4 0 2"
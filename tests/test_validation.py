@@ -0,0 +1,83 @@
+from unittest.mock import Mock
+
+import pytest
+
+from gravotech import Gravotech, LDMode
+from gravotech.actions.actions import GraveuseAction
+from gravotech.actions.validation import CommandValidator
+from gravotech.simulator.handler import SimulatedMachine
+from gravotech.simulator.loopback import LoopbackTransport
+from gravotech.utils.errors import (
+    TL07ContextError,
+    TL07Error,
+    TL07ProcessingError,
+    TL07SyntaxError,
+    check_err,
+)
+
+
+@pytest.mark.parametrize(
+    "call, code",
+    [
+        (lambda a: a.vs(10, "X"), ("1", "7")),
+        (lambda a: a.vg(-1), ("1", "7")),
+        (lambda a: a.ld("logo.t2l", 4294967296, LDMode.NORMAL), ("1", "7")),
+        (lambda a: a.ld('bad".t2l', 1, LDMode.NORMAL), ("1", "4")),
+        (lambda a: a.ld("logo.t2l", 1, "N"), ("1", "4")),
+        (lambda a: a.ls("*.t2l *.dxf"), ("1", "3")),
+        (lambda a: a.rm(""), ("1", "2")),
+        (lambda a: a.vs(0, "line\r"), ("1", "4")),
+    ],
+)
+def test_invalid_parameters_are_not_sent(call, code):
+    streamer = Mock()
+    actions = GraveuseAction(streamer, validator=CommandValidator())
+
+    with pytest.raises(TL07SyntaxError) as info:
+        call(actions)
+
+    assert info.value.code == code
+    assert str(info.value) == check_err(f"ER {code[0]} {code[1]}")
+    streamer.write.assert_not_called()
+
+
+def test_state_checks_follow_responses():
+    streamer = Mock()
+    # Rejections are confirmed with ST before being raised.
+    streamer.write.side_effect = ["ST 2 0 0", "ST 2 0 0", "ST 2 0 0", "LD 1"]
+    streamer.unsafe_read.side_effect = ["GO M", "GO S"]
+    validator = CommandValidator(check_state=True)
+    actions = GraveuseAction(streamer, validator=validator)
+
+    actions.st()
+    with pytest.raises(TL07ContextError, match=r"\(code: 2\.2\)"):
+        actions.go()
+    with pytest.raises(TL07ProcessingError, match=r"\(code: 3\.5\)"):
+        actions.ad()
+    actions.ld("logo.t2l", 1, LDMode.NORMAL)
+    assert actions.go() == "GO S"
+    assert validator.state == 32
+    streamer.unsafe_write.assert_called_once_with("GO")
+
+
+def test_stale_state_is_refreshed_before_rejecting():
+    streamer = Mock()
+    streamer.write.side_effect = ["ST 2 0 0", "LD 1"]
+    validator = CommandValidator(check_state=True)
+    validator.observe("GO S")
+    actions = GraveuseAction(streamer, validator=validator)
+
+    # The fault was acknowledged on the machine panel.
+    assert actions.ld("logo.t2l", 1, LDMode.NORMAL) == "LD 1"
+    assert streamer.write.call_args_list[0][0][0] == "ST\r"
+
+
+def test_client_validation_against_simulator():
+    machine = SimulatedMachine()
+    with Gravotech(
+        "sim", 0, transport=LoopbackTransport(machine), validation=True
+    ) as g:
+        g.Actions.st()
+        with pytest.raises(TL07Error):
+            g.Actions.go()
+    assert machine.cycles == 0